@@ -1,3 +1,12 @@
+import sys
+from startup_profiler import StartupProfiler
+# 启动耗时分析需要在其他导入之前开启
+startup_profiler = StartupProfiler.from_argv(sys.argv, 'back_test')
+
+from sampling_profiler import SamplingProfiler
+# 采样分析，--profile开启，回测在主线程执行
+sampling_profiler = SamplingProfiler.from_argv(sys.argv, 'back_test')
+
 import time
 from datetime import datetime, timedelta
 from data_provider import DataProvider
@@ -41,6 +50,7 @@ def init_strategies(id2stock):
         
         strategy.target_stocks = target_stocks
         strategies.append(strategy)
+        sampling_profiler.tag_strategy(strategy, strategy_id)
         
         logger.info(f"创建策略: {strategy_id}, 目标股票数量: {len(target_stocks)}")
     
@@ -55,6 +65,8 @@ def main():
     对北交所全部股票一起测试，假定有100万资金，看最终收益
     """
     logger.info(f"回测程序启动时间: {datetime.now()}")
+    sampling_profiler.watch_current_thread()
+    sampling_profiler.start()
     
     try:
         # 初始化数据提供者
@@ -73,13 +85,15 @@ def main():
         active_codes.extend(SH50)#TODO 
         active_codes.extend(BJ50)#TODO 
         active_codes.extend(BASKET2)#TODO 先设定为
-        id2stock = init_stocks(active_codes)
+        with startup_profiler.phase('init_stocks'):
+            id2stock = init_stocks(active_codes)
         if not id2stock:
             logger.error("初始化股票对象失败，程序退出")
             return
 
         # 初始化策略
-        strategies = init_strategies(id2stock)
+        with startup_profiler.phase('init_strategies'):
+            strategies = init_strategies(id2stock)
         if not strategies:
             logger.error("初始化策略失败，程序退出")
             return
@@ -89,12 +103,15 @@ def main():
             logger.info(f"开始回测策略: {strategy.__class__.__name__}")
             
             # 准备策略数据
-            if not strategy.fill_data(data_provider, "20240102", "20241231"):
+            with startup_profiler.phase(f'prepare_data {strategy.__class__.__name__}'):
+                success = strategy.fill_data(data_provider, "20240102", "20241231")
+            if not success:
                 logger.error(f"策略 {strategy.__class__.__name__} 数据准备失败，跳过该策略")
                 continue
             
             # 执行回测
-            signals = strategy.back_test()
+            with startup_profiler.phase(f'back_test {strategy.__class__.__name__}'):
+                signals = strategy.back_test()
             
             if signals:
                 logger.info(f"策略 {strategy.__class__.__name__} 产生 {len(signals)} 个交易信号")
@@ -105,7 +122,7 @@ def main():
                     signals,
                     strategy.target_stocks,
                     strategy.code2daily,
-                    trade_days
+                    strategy.daily_dates or trade_days
                 )
                 
                 logger.info(f"策略 {strategy.__class__.__name__} 评分: {score}")
@@ -117,6 +134,10 @@ def main():
     except Exception as e:
         logger.error(f"回测过程发生错误: {e}", exc_info=True)
     finally:
+        sampling_profiler.stop()
+        report_file = startup_profiler.write_report()
+        if report_file:
+            logger.info(f"启动耗时报告: {report_file}")
         logger.info(f"回测程序结束时间: {datetime.now()}")
 
 if __name__ == "__main__":
@@ -1,6 +1,5 @@
 import os
 import json
-import pandas as pd
 from datetime import datetime
 from logger import logger
 
@@ -22,7 +21,8 @@ class BaseAccount:
         self.position_ratio = 0
 
         self.trades = []
-        self.orders = []
+        self.clear_orders()
+        self.prices_dirty = False  # 价格更新后账户和持仓还没有写入文件
 
         self.account_file = os.path.join(self.data_dir, f"{account_id}.json")
         self.positions_file = os.path.join(self.data_dir, f"{account_id}_positions.json")
@@ -71,10 +71,11 @@ class BaseAccount:
         
         logger.info(f"账户 {self.account_id} 初始化完成，总资产: {self.total_asset:.2f}")
     
-    def update_prices(self, code2price):
+    def update_prices(self, code2price, save=True):
         """
         更新持仓股票的价格
         :param code2price: 股票代码到价格的映射
+        :param save: 是否立即写入文件，行情推送中为False，只更新内存，由调用方定时调用save_prices()
         """
         updated = False
         # 先更新每个持仓的市值
@@ -112,13 +113,24 @@ class BaseAccount:
                     position['position_ratio'] = 0.0
             
             # 保存数据
-            self._save_account()
-            self._save_positions()
+            if save:
+                self._save_account()
+                self._save_positions()
+                self.prices_dirty = False
+            else:
+                self.prices_dirty = True
             
             logger.debug(f"更新账户市值: {self.market_value:.2f}, 总资产: {self.total_asset:.2f}")
         
         return updated
 
+    def save_prices(self):
+        """价格更新只在内存中时，把账户和持仓写入文件"""
+        if self.prices_dirty:
+            self._save_account()
+            self._save_positions()
+            self.prices_dirty = False
+
     def _load_account(self):
         """加载账户数据"""
         try:
@@ -234,6 +246,7 @@ class BaseAccount:
     
     def get_positions_df(self):
         """获取持仓信息DataFrame"""
+        import pandas as pd  # 只在需要DataFrame时导入，加快启动
         if not self.positions:
             return pd.DataFrame()
         
@@ -248,9 +261,81 @@ class BaseAccount:
     def get_orders(self):
         """获取交易记录"""
         return self.orders
+
+    def clear_orders(self):
+        """清空委托记录和委托索引"""
+        self.orders = []
+        self.order_id2pos = {}          # 委托编号 -> 在orders中的位置
+        self.order_id2keys = {}         # 委托编号 -> 该委托在索引中的键
+        self.order_index = {}           # (股票代码, 策略备注, 买卖方向) -> {委托状态: 委托数}
+        self.order_allocations = {}     # (股票代码, 委托的策略备注, 买卖方向) -> 轧差合并时参与的全部策略备注
+
+    def register_allocations(self, code, order_type, strategy, allocations):
+        """
+        登记轧差合并的委托参与的策略，柜台返回的委托只带第一个策略，
+        之后同步到的该委托也按参与的每个策略建索引，has_order对每个策略都能查到
+        :param code: 股票代码
+        :param order_type: 买卖方向，'buy'或'sell'
+        :param strategy: 委托的策略备注
+        :param allocations: [(策略备注, 数量)]
+        """
+        if not allocations or len(allocations) <= 1:
+            return
+        strategies = self.order_allocations.setdefault((code, strategy, order_type), [])
+        for remark, _ in allocations:
+            if remark not in strategies:
+                strategies.append(remark)
+
+    def _order_keys(self, order):
+        """委托在索引中的全部键，轧差合并的委托每个参与的策略一个"""
+        code, order_type = order['stock_code'], order.get('order_type', '')
+        key = (code, order.get('strategy', ''), order_type)
+        if order.get('allocations'):
+            strategies = dict.fromkeys(remark for remark, _ in order['allocations'])
+        else:
+            strategies = self.order_allocations.get(key)
+        if not strategies:
+            return [key]
+        return [key] + [(code, remark, order_type) for remark in strategies if remark != key[1]]
+
+    def add_order(self, order):
+        """
+        新增或更新一条委托记录，同时增量维护委托索引
+        同一委托编号再次出现时视为状态更新，替换原记录
+        :param order: 委托记录字典，包含order_id、stock_code、strategy、order_type、status，
+                      可选allocations（轧差合并时参与的策略）
+        """
+        pos = self.order_id2pos.get(order['order_id'])
+        if pos is not None:
+            old = self.orders[pos]
+            for key in self.order_id2keys[order['order_id']]:
+                status2count = self.order_index[key]
+                status2count[old.get('status', '')] -= 1
+            self.orders[pos] = order
+        else:
+            self.order_id2pos[order['order_id']] = len(self.orders)
+            self.orders.append(order)
+        status = order.get('status', '')
+        keys = self._order_keys(order)
+        self.order_id2keys[order['order_id']] = keys
+        for key in keys:
+            status2count = self.order_index.setdefault(key, {})
+            status2count[status] = status2count.get(status, 0) + 1
+
+    def has_order(self, code, strategy, order_type, statuses=("done", "waiting")):
+        """
+        是否存在指定股票、策略、方向且状态在statuses中的委托，O(1)查询
+        :param code: 股票代码
+        :param strategy: 策略备注
+        :param order_type: 买卖方向，'buy'或'sell'
+        :param statuses: 需要统计的委托状态
+        """
+        status2count = self.order_index.get((code, strategy, order_type))
+        return status2count is not None and any(status2count.get(status, 0) > 0 for status in statuses)
     
     def get_trades_df(self):
         """获取交易记录DataFrame"""
+        import pandas as pd
         if not self.trades:
             return pd.DataFrame()
         
@@ -331,6 +416,7 @@ class BaseAccount:
             # 重置持仓和交易记录
             self.positions = {}
             self.trades = []
+            self.clear_orders()
             
             # 保存数据
             self._save_account()
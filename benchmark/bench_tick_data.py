@@ -0,0 +1,125 @@
+"""
+TickData构造微基准
+对比旧版（构造时拷贝全部字段、每个实例分配盘口列表）和当前版本（__slots__ + 按需读取原始字典）
+在5000 tick/秒的负载下的单tick内存分配和构造耗时
+用法: python benchmark/bench_tick_data.py [tick数量]
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 将上一级目录添加到sys.path中
+sys.path.append(parent_dir)
+
+from data.tick_data import TickData
+
+TICKS_PER_SECOND = 5000
+
+
+class LegacyTickData:
+    """旧版TickData，构造时分配全部字段，build_from_dict逐个拷贝"""
+    def __init__(self, stock_code):
+        self.stock_code = stock_code
+        self.time = 0
+        self.lastPrice = 0.0
+        self.open = 0.0
+        self.high = 0.0
+        self.low = 0.0
+        self.lastClose = 0.0
+        self.amount = 0.0
+        self.volume = 0
+        self.transactionNum = 0
+        self.stockStatus = 0
+        self.pe = 0.0
+        self.askPrice = [0.0] * 5
+        self.bidPrice = [0.0] * 5
+        self.askVol = [0] * 5
+        self.bidVol = [0] * 5
+        self.pct_chg = 0.0
+
+    def build_from_dict(self, data_dict):
+        if not data_dict:
+            return self
+        self.time = data_dict.get('time', 0)//1000
+        self.lastPrice = data_dict.get('lastPrice', 0.0)
+        self.open = data_dict.get('open', 0.0)
+        self.high = data_dict.get('high', 0.0)
+        self.low = data_dict.get('low', 0.0)
+        self.lastClose = data_dict.get('lastClose', 0.0)
+        self.amount = data_dict.get('amount', 0.0)
+        self.volume = data_dict.get('volume', 0)
+        self.pvolume = data_dict.get('pvolume', 0)
+        self.stockStatus = data_dict.get('stockStatus', 0)
+        self.pe = data_dict.get('pe', 0.0)
+        self.askPrice = data_dict.get('askPrice', [0.0] * 5)
+        self.bidPrice = data_dict.get('bidPrice', [0.0] * 5)
+        self.askVol = data_dict.get('askVol', [0] * 5)
+        self.bidVol = data_dict.get('bidVol', [0] * 5)
+        if self.lastClose > 0:
+            self.pct_chg = (self.lastPrice / self.lastClose - 1) * 100
+        return self
+
+
+def make_ticks(count):
+    """生成模拟的xtdata tick字典"""
+    base_time = 1744767365000
+    ticks = []
+    for i in range(count):
+        price = 10.0 + (i % 100) * 0.01
+        ticks.append({
+            'time': base_time + i * 200, 'lastPrice': price, 'open': 10.0, 'high': 11.0, 'low': 9.5,
+            'lastClose': 9.9, 'amount': 1.0e6 + i, 'volume': 10000 + i, 'pvolume': 1000000 + i * 100,
+            'stockStatus': 0, 'openInt': 13, 'transactionNum': i, 'pe': 0.0,
+            'askPrice': [price + 0.01 * k for k in range(1, 6)], 'bidPrice': [price - 0.01 * k for k in range(5)],
+            'askVol': [100] * 5, 'bidVol': [200] * 5,
+        })
+    return ticks
+
+
+def consume(tick_cls, ticks):
+    """构造TickData并读取策略常用的几个字段，与TickSequence的使用方式一致"""
+    objs = []
+    for tick in ticks:
+        obj = tick_cls('830001.BJ').build_from_dict(tick)
+        obj.time, obj.lastPrice, obj.volume
+        objs.append(obj)
+    return objs
+
+
+def measure(tick_cls, ticks, rounds=5):
+    """
+    :return: (单tick构造耗时 微秒, 单tick内存分配 字节)
+    """
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        consume(tick_cls, ticks)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    objs = consume(tick_cls, ticks)
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objs
+    return best / len(ticks) * 1e6, allocated / len(ticks)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else TICKS_PER_SECOND
+    ticks = make_ticks(count)
+    print(f"tick数量: {count}，按 {TICKS_PER_SECOND} tick/秒 折算")
+    results = {}
+    for name, tick_cls in (('旧版', LegacyTickData), ('当前', TickData)):
+        cost_us, alloc = measure(tick_cls, ticks)
+        results[name] = (cost_us, alloc)
+        cpu_share = cost_us * TICKS_PER_SECOND / 1e6 * 100
+        print(f"{name}: 构造 {cost_us:.3f} us/tick, 分配 {alloc:.0f} B/tick, "
+              f"每秒占用CPU {cpu_share:.2f}%, 每秒分配 {alloc * TICKS_PER_SECOND / 1024:.1f} KB")
+    old, new = results['旧版'], results['当前']
+    print(f"耗时降低 {(1 - new[0] / old[0]) * 100:.1f}%, 分配降低 {(1 - new[1] / old[1]) * 100:.1f}%")
+
+
+if __name__ == '__main__':
+    main()
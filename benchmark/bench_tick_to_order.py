@@ -0,0 +1,394 @@
+"""
+行情到委托的端到端延迟基准
+使用本地xtquant替身和合成行情驱动真实的main.on_tick_data（全部4个策略、信号轧差、风控、下单），
+统计每次推送各阶段耗时的p50/p99/max，以及回调入口到委托送达交易接口的端到端延迟和吞吐上限
+  decode          TickBatch构造
+  market_state    大盘指数状态更新
+  sim_match       模拟撮合（仅--trader sim）
+  trigger         全部策略trigger合计，trigger.<策略名>为单个策略
+  risk / netting  风控评估 / 通过风控的信号轧差
+  account_refresh 实盘分支同步账户（查询资金、持仓、成交、委托并update_positions）
+  submit          buy_stock/sell_stock合计
+  on_tick_data    整个回调
+  tick_to_order   回调入口到order_stock_async（fake）或handle_order（sim）被调用，按委托统计
+结果写入benchmark/results/tick_to_order_<提交>_<时间>.json，--compare指定旧结果时输出对比
+用法: python benchmark/bench_tick_to_order.py [--codes 500,2000,5000] [--pushes 200] [--trader fake|sim]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import subprocess
+from collections import defaultdict
+from datetime import datetime
+import numpy as np
+
+parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 将上一级目录添加到sys.path中
+sys.path.append(parent_dir)
+
+from simulate_exchange import fake_xtquant
+from simulate_exchange.fake_xtquant import FakeXtdata
+from simulate_exchange.market_generator import MarketGenerator
+
+# 项目代码导入xtquant之前安装替身，不启动推送线程，由基准自己驱动推送
+fake_xtdata = fake_xtquant.install(FakeXtdata(ticks_per_second=0))
+
+import main
+from my_stock import MyStock
+from risk_manager import RiskManager
+from signal_netting import SignalNetter
+from warmup import WarmupScheduler
+from strategy import strategy1003
+from strategy.strategy_factory import StrategyFactory
+from data.volume_profile import VolumeProfile
+
+RESULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+STRATEGY_IDS = (1001, 1002, 1003, 1004)
+
+
+class StageTimer:
+    """
+    按推送累计各阶段耗时，推送结束时每个出现过的阶段记一个样本
+    tick_to_order按委托记样本，委托可能在网关线程中送达
+    """
+    def __init__(self):
+        self.stage2samples = defaultdict(list)
+        self.current = None
+        self.push_start = None
+        self.code2start = {}        # 已调用buy/sell、尚未送达交易接口的委托：股票代码 -> 所属推送的开始时间
+
+    def begin(self):
+        self.current = defaultdict(float)
+        self.push_start = time.perf_counter()
+
+    def end(self):
+        self.add('on_tick_data', time.perf_counter() - self.push_start)
+        for stage, seconds in self.current.items():
+            self.stage2samples[stage].append(seconds)
+        self.current = None
+
+    def add(self, stage, seconds):
+        if self.current is not None:
+            self.current[stage] += seconds
+
+    def wrap(self, owner, name, *stages):
+        """把owner.name替换为计时版本，耗时累计到stages中的每个阶段"""
+        original = getattr(owner, name)
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                for stage in stages:
+                    self.add(stage, elapsed)
+        setattr(owner, name, timed)
+        return original
+
+    def mark_order(self, stock_code):
+        """buy_stock/sell_stock被调用，记录所属推送的开始时间"""
+        self.code2start[stock_code] = self.push_start
+
+    def order_arrived(self, stock_code):
+        """委托送达交易接口"""
+        start = self.code2start.pop(stock_code, None)
+        if start is not None:
+            self.stage2samples['tick_to_order'].append(time.perf_counter() - start)
+
+
+def summarize(samples):
+    """:return: 样本数和毫秒单位的mean/p50/p99/max"""
+    values = np.asarray(samples, dtype=np.float64) * 1000
+    if len(values) == 0:
+        return {'count': 0}
+    p50, p99 = np.percentile(values, [50, 99])
+    return {'count': int(len(values)), 'mean_ms': round(float(values.mean()), 4), 'p50_ms': round(float(p50), 4),
+            'p99_ms': round(float(p99), 4), 'max_ms': round(float(values.max()), 4)}
+
+
+def build_strategies(generator, id2stock):
+    """
+    按合成股票池构造4个策略：北交所配对给1004，其余A股平分给1001/1002/1003
+    1001的安全区间围绕昨收随机设置，盘中持续有股票触发买卖，风控和下单阶段有足够样本
+    """
+    rng = np.random.default_rng(0)
+    bj_codes = list(generator.pairs.keys())
+    a_codes = [code for code in generator.codes if code not in generator.pairs and code in id2stock]
+    thirds = np.array_split(np.array(a_codes, dtype=object), 3)
+    safe_range = {}
+    for code in thirds[0]:
+        price = generator.last_close[generator.code2row[code]]
+        ema8 = price * (1 + rng.uniform(-0.01, 0.01))
+        safe_range[code] = {'short_sma5': price, 'short_ema8': ema8, 'short_atr10': price * 0.003,
+                            'long_ema55': price, 'long_atr20': price * 0.02, 'slope_ema55': 0.001}
+    params = {
+        1001: {'target_codes': list(thirds[0]), 'safe_range': safe_range, 'aggressiveness': 0},
+        1002: {'target_codes': list(thirds[1])},
+        1003: {'target_codes': list(thirds[2])},
+        1004: {'target_codes': bj_codes, 'correlations': generator.correlation_results()},
+    }
+    strategies = []
+    for strategy_id in STRATEGY_IDS:
+        strategy = StrategyFactory.load_strategy_class(strategy_id).from_params(params[strategy_id])
+        strategy.target_stocks = [id2stock[code] for code in strategy.target_codes if code in id2stock]
+        strategy.market_state = main.market_state
+        strategies.append(strategy)
+    return strategies
+
+
+def setup_trader(kind, work_dir, order_rate):
+    """
+    :param kind: fake 为MiniTrader + 假的XtQuantTrader + LocalAccount（实盘分支），sim 为SimTrader + SimAccount
+    :return: (trader, account)
+    """
+    if kind == 'sim':
+        from simulate_exchange.sim_account import SimAccount
+        from simulate_exchange.sim_trader import SimTrader
+        account = SimAccount('bench', data_dir=os.path.join(work_dir, 'sim_data'))
+        return SimTrader(account), account
+
+    from mini_trader import MiniTrader
+    from local_account import LocalAccount
+    trader = MiniTrader('', 'bench')
+    trader.gateway.min_interval = 1.0 / order_rate if order_rate > 0 else 0
+    if not trader.connect():
+        raise RuntimeError('假的交易接口连接失败')
+    account = LocalAccount('bench', data_dir=os.path.join(work_dir, 'online_account_data'))
+    return trader, account
+
+
+def run_scale(count, args, work_dir):
+    """在count只股票的规模下跑一轮，返回该规模的结果"""
+    pairs = max(count // 20, 1)
+    base = MarketGenerator.with_codes(count, pairs=pairs, a_per_pair=3)
+    # 指数也要推送，策略读取大盘涨跌
+    index_codes = [code for code in main.market_state.index_codes if code not in base.code2row]
+    generator = MarketGenerator(base.codes + index_codes, volatility=args.volatility, pairs=base.pairs,
+                                batch_size=args.batch_size, seed=args.seed)
+    id2stock = {code: MyStock(code) for code in base.codes}
+    fake_xtdata.code2tick = {}
+
+    t0 = time.perf_counter()
+    strategies = build_strategies(generator, id2stock)
+    WarmupScheduler(strategies).run()
+    warmup_s = time.perf_counter() - t0
+
+    trader, account = setup_trader(args.trader, work_dir, args.order_rate)
+    main.id2stock = id2stock
+    main.strategies = strategies
+    main.risk_manager = RiskManager()
+    main.signal_netter = SignalNetter()
+    main.trader = trader
+    main.using_account = account
+    if not account.is_simulated:
+        main.risk_manager.order_tracker = trader.tracker
+        account.update_positions(trader.get_account_info(), trader.get_positions(), trader.get_trades(),
+                                 trader.get_orders(), id2stock)
+
+    timer = StageTimer()
+    tick_batch_cls = main.TickBatch
+    def timed_tick_batch(ticks):
+        start = time.perf_counter()
+        batch = tick_batch_cls(ticks)
+        timer.add('decode', time.perf_counter() - start)
+        return batch
+    main.TickBatch = timed_tick_batch
+    market_state_update = timer.wrap(main.market_state, 'update', 'market_state')
+    for strategy in strategies:
+        timer.wrap(strategy, 'trigger', 'trigger', f'trigger.{strategy.__class__.__name__}')
+    timer.wrap(main.signal_netter, 'net', 'netting')
+    timer.wrap(main.risk_manager, 'evaluate_signals', 'risk')
+    if account.is_simulated:
+        timer.wrap(trader, 'realtime_trigger', 'sim_match')
+    else:
+        # 查询接口在update_positions之前求值，一起计入账户同步
+        for name in ('get_account_info', 'get_positions', 'get_trades', 'get_orders'):
+            timer.wrap(trader, name, 'account_refresh')
+        timer.wrap(account, 'update_positions', 'account_refresh')
+
+    for name in ('buy_stock', 'sell_stock'):
+        submit = getattr(trader, name)
+        def timed_submit(stock_code, *a, _submit=submit, **kw):
+            timer.mark_order(stock_code)
+            start = time.perf_counter()
+            try:
+                return _submit(stock_code, *a, **kw)
+            finally:
+                timer.add('submit', time.perf_counter() - start)
+        setattr(trader, name, timed_submit)
+    if account.is_simulated:
+        arrive_owner, arrive_name = trader, 'handle_order'
+        def arrive(account_, stock_code, *a, _original=trader.handle_order, **kw):
+            timer.order_arrived(stock_code)
+            return _original(account_, stock_code, *a, **kw)
+    else:
+        arrive_owner, arrive_name = trader.trader, 'order_stock_async'
+        def arrive(account_, stock_code, *a, _original=trader.trader.order_stock_async, **kw):
+            timer.order_arrived(stock_code)
+            return _original(account_, stock_code, *a, **kw)
+    setattr(arrive_owner, arrive_name, arrive)
+
+    def on_push(batch):
+        fake_xtdata.code2tick.update(batch)
+        timer.begin()
+        try:
+            main.on_tick_data(batch)
+        finally:
+            timer.end()
+
+    try:
+        # 各策略首次trigger时惰性初始化（绑定股票、构建数组），先用一次推送单独触发，不下单也不计入统计
+        first_batch = generator.next_batch()
+        fake_xtdata.code2tick.update(first_batch)
+        first_batch = tick_batch_cls(first_batch)
+        main.market_state.update(first_batch)
+        for strategy in strategies:
+            strategy.trigger(first_batch)
+        run_stats = generator.run(on_push, pushes_per_second=args.pushes_per_second, count=args.pushes)
+        gateway_metrics = None
+        if not account.is_simulated:
+            trader.gateway.wait_idle(timeout=30)
+            trader.gateway.stop()
+            trader.trader.stop()
+            gateway_metrics = trader.gateway.get_metrics()
+    finally:
+        # 大盘状态是模块级共享对象，下一个规模重新包装前先还原
+        main.TickBatch = tick_batch_cls
+        main.market_state.update = market_state_update
+
+    total_callback = sum(timer.stage2samples['on_tick_data'])
+    ticks = run_stats['ticks']
+    result = {
+        'codes': len(base.codes),
+        'pairs': len(generator.pairs),
+        'warmup_s': round(warmup_s, 3),
+        'run': run_stats,
+        'throughput': {
+            'ticks_per_second': round(ticks / total_callback, 1) if total_callback > 0 else 0,
+            'pushes_per_second': round(run_stats['pushes'] / total_callback, 2) if total_callback > 0 else 0,
+        },
+        'signals': main.signal_netter.signal_count,
+        'orders': main.signal_netter.order_count,
+        'submitted': len(timer.stage2samples['tick_to_order']),
+        'gateway': gateway_metrics,
+        'stages': {stage: summarize(samples) for stage, samples in sorted(timer.stage2samples.items())},
+    }
+    return result
+
+
+def print_result(result):
+    print(f"\n股票数 {result['codes']}（配对 {result['pairs']}），预热 {result['warmup_s']}s，"
+          f"推送 {result['run']['pushes']} 次 / {result['run']['ticks']} tick，"
+          f"信号 {result['signals']} -> 轧差后 {result['orders']} -> 送达 {result['submitted']}")
+    print(f"吞吐上限: {result['throughput']['ticks_per_second']:.0f} tick/s，"
+          f"{result['throughput']['pushes_per_second']:.1f} 次全推/s")
+    print(f"{'阶段':<24}{'样本':>8}{'p50(ms)':>12}{'p99(ms)':>12}{'max(ms)':>12}{'mean(ms)':>12}")
+    for stage, stats in result['stages'].items():
+        if stats['count'] == 0:
+            continue
+        print(f"{stage:<24}{stats['count']:>8}{stats['p50_ms']:>12.3f}{stats['p99_ms']:>12.3f}"
+              f"{stats['max_ms']:>12.3f}{stats['mean_ms']:>12.3f}")
+    if result['gateway']:
+        print(f"委托网关: {result['gateway']}")
+
+
+def compare(old_report, new_report):
+    """按规模和阶段对比p50/p99，比值>1表示变慢"""
+    old_results = {result['codes']: result for result in old_report['results']}
+    print(f"\n对比 {old_report.get('commit')} -> {new_report.get('commit')}（新/旧）")
+    changed = {key: (old_report['args'].get(key), value) for key, value in new_report['args'].items()
+               if key not in ('output', 'compare') and old_report['args'].get(key) != value}
+    if changed:
+        print(f"注意：两次运行参数不同 {changed}")
+    for result in new_report['results']:
+        old = old_results.get(result['codes'])
+        if old is None:
+            continue
+        print(f"股票数 {result['codes']}: 吞吐 {old['throughput']['ticks_per_second']:.0f} -> "
+              f"{result['throughput']['ticks_per_second']:.0f} tick/s")
+        for stage, stats in result['stages'].items():
+            old_stats = old['stages'].get(stage)
+            if not old_stats or not old_stats.get('count') or not stats.get('count'):
+                continue
+            ratios = [stats[key] / old_stats[key] if old_stats[key] > 0 else float('nan')
+                      for key in ('p50_ms', 'p99_ms')]
+            print(f"  {stage:<22} p50 {old_stats['p50_ms']:.3f} -> {stats['p50_ms']:.3f} ({ratios[0]:.2f}x)  "
+                  f"p99 {old_stats['p99_ms']:.3f} -> {stats['p99_ms']:.3f} ({ratios[1]:.2f}x)")
+
+
+def git_commit():
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=parent_dir,
+                                         stderr=subprocess.DEVNULL, text=True).strip()
+        dirty = subprocess.check_output(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=parent_dir,
+                                        stderr=subprocess.DEVNULL, text=True).strip()
+        return commit + ('-dirty' if dirty else '')
+    except Exception:
+        return 'unknown'
+
+
+def main_bench():
+    parser = argparse.ArgumentParser(description='行情到委托的端到端延迟基准')
+    parser.add_argument('--codes', type=str, default='500,2000,5000', help='股票数量，逗号分隔的多个规模')
+    parser.add_argument('--pushes', type=int, default=200, help='每个规模的推送次数')
+    parser.add_argument('--pushes-per-second', type=float, default=0, help='推送速率，0为不限速（测吞吐上限）')
+    parser.add_argument('--batch-size', type=int, default=None, help='每次推送的股票数，默认全推')
+    parser.add_argument('--volatility', type=float, default=0.3, help='合成行情的年化波动率')
+    parser.add_argument('--trader', choices=('fake', 'sim'), default='fake',
+                        help='fake: MiniTrader + 假的XtQuantTrader（实盘分支）；sim: SimTrader')
+    parser.add_argument('--order-rate', type=float, default=0, help='委托网关每秒提交数，0为不限速')
+    parser.add_argument('--log-level', type=str, default='ERROR',
+                        help='基准期间的日志级别，风控拒绝是WARNING，INFO会把每个tick写入tick.log')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    parser.add_argument('--output', type=str, default=None, help='结果文件，默认写到benchmark/results')
+    parser.add_argument('--compare', type=str, default=None, help='旧的结果文件，输出新旧对比')
+    args = parser.parse_args()
+
+    level = getattr(logging, args.log_level.upper())
+    for name in ('main', 'tick', 'trader', 'simulate_exchange'):
+        logging.getLogger(name).setLevel(level)
+
+    # 合成股票的缓存和账户文件写到临时目录，不覆盖当天真实的缓存
+    work_dir = tempfile.mkdtemp(prefix='bench_tick_to_order_')
+    strategy1003.CACHE_DIR = os.path.join(work_dir, 'strategy1003')
+    load_or_build = VolumeProfile.load_or_build.__func__
+    VolumeProfile.load_or_build = classmethod(
+        lambda cls, codes, date, days, loader: load_or_build(cls, codes, date, days, loader,
+                                                             os.path.join(work_dir, 'volume_profile')))
+
+    report = {
+        'commit': git_commit(),
+        'time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'args': vars(args),
+        'results': [],
+    }
+    try:
+        for count in (int(c) for c in args.codes.split(',') if c.strip()):
+            result = run_scale(count, args, work_dir)
+            print_result(result)
+            report['results'].append(result)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    output = args.output
+    if output is None:
+        if not os.path.exists(RESULT_DIR):
+            os.makedirs(RESULT_DIR)
+        output = os.path.join(RESULT_DIR, f"tick_to_order_{report['commit']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存: {output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(json.load(f), report)
+
+
+if __name__ == '__main__':
+    main_bench()
@@ -16,4 +16,31 @@ STRATEGY_CONFIG = {
 DATA_CONFIG = {
     "history_days": 10,          # 历史数据天数
     "market_index": "899050.BJ"  # 市场指数代码
-}
\ No newline at end of file
+}
+
+# 行情订阅配置
+SUBSCRIPTION_CONFIG = {
+    "max_slots": 100,           # 单股订阅数量上限，手动订阅100，开VIP可以到300
+    "rotating_slots": 10,       # 超出上限时用于轮换的订阅位
+    "rotate_interval": 60,      # 轮换间隔（秒）
+    "poll_batch": 50,           # 每次get_full_tick轮询的代码数量
+    "poll_interval": 3,         # 轮询间隔（秒）
+}
+
+# 启动预热配置
+WARMUP_CONFIG = {
+    "max_workers": 4,           # 并发下载历史数据的线程数
+}
+
+
+# 实盘委托网关配置
+ORDER_GATEWAY_CONFIG = {
+    "max_orders_per_second": 5,  # 每秒最多提交的委托数
+    "latency_window": 1000,      # 委托回报延迟统计保留的样本数
+}
+
+# 热路径指标配置
+METRICS_CONFIG = {
+    "enabled": True,             # 关闭时计时和计数只做一次开关判断，几乎没有开销
+    "flush_interval": 60,        # 汇总写到logs/metrics_YYYYMMDD.jsonl的间隔（秒）
+}
@@ -0,0 +1,168 @@
+from datetime import datetime
+import numpy as np
+
+
+class MinuteBar:
+    """
+    1分钟K线，标签沿用xtdata的约定：0931对应 093000--093059 的数据
+    """
+    __slots__ = ('label', 'open', 'high', 'low', 'close', 'volume', 'amount')
+
+    def __init__(self, label, price):
+        self.label = label      # 分钟标签，格式YYYYMMDDHHMM00
+        self.open = price
+        self.high = price
+        self.low = price
+        self.close = price
+        self.volume = 0         # 本分钟成交量（由累计成交量差分得到）
+        self.amount = 0.0       # 本分钟成交额
+
+    def __str__(self):
+        return (f"MinuteBar({self.label}) 开:{self.open:.2f} 高:{self.high:.2f} "
+                f"低:{self.low:.2f} 收:{self.close:.2f} 量:{self.volume} 额:{self.amount:.2f}")
+
+
+class MinuteBarAggregator:
+    """
+    分钟线聚合器，根据推送的tick增量生成1分钟OHLCV数据
+    替代每次回调都通过get_market_data_ex拉取分钟线，读取当前/上一分钟成交量为O(1)
+    注意：tick中的volume/amount是当日累计值，分钟成交量取累计值的差分
+    """
+    def __init__(self, max_bars=3):
+        """
+        :param max_bars: 每只股票保留的分钟线数量，只需要当前和前一分钟，默认多保留一根
+        """
+        self.max_bars = max_bars
+        self.code2bars = {}         # 股票代码 -> [MinuteBar, ...]，按时间顺序
+        self.code2tick = {}         # 股票代码 -> 最新tick字典
+        self.code2base = {}         # 股票代码 -> (当前分钟开始前的累计成交量, 累计成交额)
+        self.code2totals = {}       # 股票代码 -> (最近一个tick的累计成交量, 累计成交额)
+        self._minute2label = {}     # 分钟序号 -> 分钟标签，避免每个tick都做时间格式化
+
+    def _get_label(self, tick_time):
+        """
+        根据tick时间（毫秒）计算所属分钟线的标签
+        :return: 分钟标签，集合竞价等非连续交易时段返回None
+        """
+        minute = tick_time // 60000
+        label = self._minute2label.get(minute)
+        if label is None:
+            dt = datetime.fromtimestamp(minute * 60)
+            hhmm = dt.hour * 100 + dt.minute
+            if hhmm < 930 or 1130 < hhmm < 1300:
+                label = ''
+            elif hhmm == 1130 or hhmm >= 1500:
+                # 收盘时刻的tick归入最后一根分钟线
+                label = dt.strftime('%Y%m%d') + ('113000' if hhmm == 1130 else '150000')
+            else:
+                end_minute = (minute + 1) * 60
+                label = datetime.fromtimestamp(end_minute).strftime('%Y%m%d%H%M00')
+            self._minute2label[minute] = label
+        return label or None
+
+    def add_tick(self, code, tick):
+        """
+        添加一个tick
+        :param code: 股票代码
+        :param tick: xtdata的tick字典
+        :return: 是否更新了分钟线
+        """
+        if not tick:
+            return False
+        self.code2tick[code] = tick
+
+        tick_time = tick.get('time', 0)
+        price = tick.get('lastPrice', 0)
+        total_volume = tick.get('volume', 0)
+        total_amount = tick.get('amount', 0.0)
+        if tick_time <= 0 or price <= 0:
+            return False
+
+        label = self._get_label(tick_time)
+        # 上一个tick的累计成交量和成交额，作为新分钟线的基准
+        # 盘中启动时第一个tick没有基准，以其自身为基准，避免把全天成交量算进第一根分钟线
+        last_totals = self.code2totals.get(code, (total_volume, total_amount))
+        if label is None:
+            # 集合竞价/午休的成交只计入基准，不单独成线
+            self.code2totals[code] = (total_volume, total_amount)
+            return False
+
+        bars = self.code2bars.get(code)
+        if bars is None:
+            bars = []
+            self.code2bars[code] = bars
+
+        if not bars or bars[-1].label < label:
+            # 进入新的分钟
+            self.code2base[code] = last_totals
+            bars.append(MinuteBar(label, price))
+            if len(bars) > self.max_bars:
+                del bars[0]
+        elif bars[-1].label > label:
+            # 乱序的旧tick，丢弃
+            return False
+        self.code2totals[code] = (total_volume, total_amount)
+
+        base_volume, base_amount = self.code2base[code]
+        bar = bars[-1]
+        bar.close = price
+        if price > bar.high:
+            bar.high = price
+        if price < bar.low:
+            bar.low = price
+        bar.volume = max(total_volume - base_volume, 0)
+        bar.amount = max(total_amount - base_amount, 0.0)
+        return True
+
+    def update(self, ticks, codes=None):
+        """
+        批量添加tick
+        :param ticks: 股票代码到tick字典的映射
+        :param codes: 只处理这些股票代码（set），None表示全部处理
+        """
+        for code, tick in ticks.items():
+            if codes is None or code in codes:
+                self.add_tick(code, tick)
+
+    def get_bar(self, code, label):
+        """
+        获取指定分钟的K线
+        :param code: 股票代码
+        :param label: 分钟标签，格式YYYYMMDDHHMM00
+        :return: MinuteBar或None
+        """
+        bars = self.code2bars.get(code)
+        if not bars:
+            return None
+        for bar in reversed(bars):
+            if bar.label == label:
+                return bar
+            if bar.label < label:
+                break
+        return None
+
+    def get_volume(self, code, label):
+        """获取指定分钟的成交量，没有数据返回0"""
+        bar = self.get_bar(code, label)
+        return bar.volume if bar else 0
+
+    def get_volumes(self, codes, label):
+        """
+        批量获取指定分钟的成交量
+        :return: np.ndarray，与codes一一对应
+        """
+        return np.fromiter((self.get_volume(code, label) for code in codes), dtype=np.float64, count=len(codes))
+
+    def get_current_bar(self, code):
+        """获取最新（可能尚未走完）的分钟线"""
+        bars = self.code2bars.get(code)
+        return bars[-1] if bars else None
+
+    def get_previous_bar(self, code):
+        """获取上一根已完成的分钟线"""
+        bars = self.code2bars.get(code)
+        return bars[-2] if bars and len(bars) > 1 else None
+
+    def get_latest_tick(self, code):
+        """获取最新tick字典，没有返回空字典"""
+        return self.code2tick.get(code, {})
@@ -0,0 +1,181 @@
+import threading
+from bisect import bisect_left, bisect_right
+import numpy as np
+from logger import logger
+
+
+class PricePanel:
+    """
+    日线价格面板：(股票数 x 交易日数) 的float64矩阵，进程内只加载一次，各策略、评估器共享只读
+    进程内只有一个面板，日期范围为各策略需求的并集，策略拿到的是按自己日期范围切出的视图（slice），不拷贝数据
+    """
+    def __init__(self, codes, dates, matrix, start_date, end_date):
+        """
+        :param codes: 股票代码列表，与矩阵行一一对应
+        :param dates: 交易日列表（YYYYMMDD），与矩阵列一一对应
+        :param matrix: np.ndarray，shape=(len(codes), len(dates))，没有数据为nan或0
+        :param start_date: 加载时请求的开始日期
+        :param end_date: 加载时请求的结束日期
+        """
+        self.codes = list(codes)
+        self.dates = list(dates)
+        self.code2row = {code: i for i, code in enumerate(self.codes)}
+        self.date2col = {date: i for i, date in enumerate(self.dates)}
+        self.matrix = np.asarray(matrix, dtype=np.float64)
+        self.matrix.flags.writeable = False
+        self.start_date = start_date
+        self.end_date = end_date
+        self._code2valid = {}       # 股票代码 -> 有效价格序列，按需生成后缓存
+
+    def covers(self, codes, start_date, end_date):
+        """面板是否包含这些股票，且加载的日期范围包含[start_date, end_date]"""
+        return (self.start_date <= start_date and end_date <= self.end_date
+                and all(code in self.code2row for code in codes))
+
+    def slice(self, start_date, end_date):
+        """
+        按日期范围切出子面板，矩阵为原矩阵的视图，不拷贝
+        :return: PricePanel，列为[start_date, end_date]内的交易日
+        """
+        if start_date == self.start_date and end_date == self.end_date:
+            return self
+        first, last = bisect_left(self.dates, start_date), bisect_right(self.dates, end_date)
+        return PricePanel(self.codes, self.dates[first:last], self.matrix[:, first:last], start_date, end_date)
+
+    def get_row(self, code):
+        """
+        获取某只股票的完整价格行（与dates对齐，只读视图）
+        :return: np.ndarray，不在面板中返回None
+        """
+        row = self.code2row.get(code)
+        return None if row is None else self.matrix[row]
+
+    def get_prices(self, code):
+        """
+        获取某只股票的有效价格序列（过滤掉<=0和缺失的价格），与原get_daily_data的列表一致
+        全部有效时直接返回矩阵行的视图，不拷贝
+        :return: 只读np.ndarray，不在面板中返回空数组
+        """
+        prices = self._code2valid.get(code)
+        if prices is None:
+            row = self.get_row(code)
+            if row is None:
+                prices = np.empty(0, dtype=np.float64)
+            else:
+                valid = row > 0
+                prices = row if valid.all() else row[valid]
+            prices.flags.writeable = False
+            self._code2valid[code] = prices
+        return prices
+
+    def get_code2daily(self, codes):
+        """
+        :return: {股票代码: 价格行}，与dates对齐（第i个价格是dates[i]的收盘价），停牌等没有数据的日期为nan或0，
+                 使用方按 > 0 过滤；不在面板中的股票为空数组
+        """
+        code2daily = {}
+        for code in codes:
+            row = self.get_row(code)
+            if row is None:
+                logger.warning(f"{code} 未在数据中找到")
+                row = np.empty(0, dtype=np.float64)
+            elif not (row > 0).any():
+                logger.warning(f"{code} 在指定时间段内没有有效的价格数据")
+            code2daily[code] = row
+        return code2daily
+
+    def merge(self, other):
+        """
+        合并另一份相同日期范围的面板，返回新面板，已有的股票不重复
+        """
+        new_rows = [i for i, code in enumerate(other.codes) if code not in self.code2row]
+        if not new_rows:
+            return self
+        if other.dates != self.dates:
+            other_matrix = np.full((len(new_rows), len(self.dates)), np.nan)
+            for j, date in enumerate(other.dates):
+                col = self.date2col.get(date)
+                if col is not None:
+                    other_matrix[:, col] = other.matrix[new_rows, j]
+        else:
+            other_matrix = other.matrix[new_rows]
+        return PricePanel(self.codes + [other.codes[i] for i in new_rows], self.dates,
+                          np.vstack([self.matrix, other_matrix]), self.start_date, self.end_date)
+
+
+# 进程内共享的面板，日期范围和股票为各次请求的并集
+_panel = None
+# 预告的需求 (股票代码列表, 开始日期, 结束日期)，第一次加载时一并加载
+_reserved = None
+_cache_lock = threading.Lock()
+
+
+def reserve(codes, start_date, end_date):
+    """
+    预告即将请求的股票和日期范围（如预热时各策略需求的并集），第一次加载时一次加载全部，
+    之后各策略的请求都从这一个面板切片，不会因为日期范围不同重复加载
+    """
+    global _reserved
+    with _cache_lock:
+        if _reserved is None:
+            _reserved = (list(dict.fromkeys(codes)), start_date, end_date)
+        else:
+            old_codes, old_start, old_end = _reserved
+            _reserved = (list(dict.fromkeys(old_codes + list(codes))), min(old_start, start_date), max(old_end, end_date))
+
+
+def get_price_panel(codes, start_date, end_date, loader):
+    """
+    获取覆盖这些股票的价格面板，已加载的直接切片复用，只加载缺少的部分
+    :param codes: 股票代码列表
+    :param start_date: 开始日期，格式YYYYMMDD
+    :param end_date: 结束日期，格式YYYYMMDD
+    :param loader: 函数，参数为 (股票代码列表, 开始日期, 结束日期)，返回PricePanel
+    :return: PricePanel，日期范围为[start_date, end_date]的视图
+    """
+    global _panel
+    with _cache_lock:
+        if _panel is None or not _panel.covers(codes, start_date, end_date):
+            _panel = _load(codes, start_date, end_date, loader)
+        return _panel.slice(start_date, end_date)
+
+
+def _load(codes, start_date, end_date, loader):
+    """
+    加载覆盖请求的面板，股票和日期取已有面板、预告需求和本次请求的并集
+    日期范围在已有面板内时只加载缺少的股票，日期范围扩大时才重新加载全部股票
+    """
+    codes = list(dict.fromkeys(codes))
+    if _reserved is not None:
+        reserved_codes, reserved_start, reserved_end = _reserved
+        codes = list(dict.fromkeys(codes + reserved_codes))
+        start_date, end_date = min(start_date, reserved_start), max(end_date, reserved_end)
+    if _panel is None:
+        panel = loader(codes, start_date, end_date)
+        logger.info(f"价格面板 {start_date}-{end_date} 加载 {len(codes)} 只股票")
+    elif _panel.start_date <= start_date and end_date <= _panel.end_date:
+        missing = [code for code in codes if code not in _panel.code2row]
+        panel = _panel.merge(loader(missing, _panel.start_date, _panel.end_date))
+        logger.info(f"价格面板 {_panel.start_date}-{_panel.end_date} 加载 {len(missing)} 只股票，共 {len(panel.codes)} 只")
+    else:
+        start_date, end_date = min(start_date, _panel.start_date), max(end_date, _panel.end_date)
+        codes = list(dict.fromkeys(_panel.codes + codes))
+        panel = loader(codes, start_date, end_date)
+        logger.warning(f"价格面板日期范围扩大到 {start_date}-{end_date}，重新加载 {len(codes)} 只股票，"
+                       f"应在预热时用reserve预告全部需求")
+    return panel
+
+
+def set_price_panel(panel):
+    """直接设置共享面板，如回测用MarketGenerator生成的面板"""
+    global _panel
+    with _cache_lock:
+        _panel = panel
+
+
+def clear_cache():
+    """清空进程级缓存"""
+    global _panel, _reserved
+    with _cache_lock:
+        _panel = None
+        _reserved = None
@@ -0,0 +1,120 @@
+from collections.abc import Mapping
+import numpy as np
+
+# 盘口档位数量
+DEPTH_LEVELS = 5
+
+TICK_DTYPE = np.dtype([
+    ('time', np.int64),                             # 时间戳(毫秒)
+    ('lastPrice', np.float64),                      # 最新价
+    ('lastClose', np.float64),                      # 昨收价
+    ('open', np.float64),                           # 开盘价
+    ('high', np.float64),                           # 最高价
+    ('low', np.float64),                            # 最低价
+    ('volume', np.int64),                           # 累计成交量
+    ('amount', np.float64),                         # 累计成交额
+    ('askPrice', np.float64, (DEPTH_LEVELS,)),      # 卖价档位
+    ('bidPrice', np.float64, (DEPTH_LEVELS,)),      # 买价档位
+    ('askVol', np.int64, (DEPTH_LEVELS,)),          # 卖量档位
+    ('bidVol', np.int64, (DEPTH_LEVELS,)),          # 买量档位
+])
+
+_EMPTY_LEVELS = (0,) * DEPTH_LEVELS
+
+
+def _levels(values):
+    """盘口数据补齐/截断到固定档位数"""
+    if values is None:
+        return _EMPTY_LEVELS
+    if len(values) == DEPTH_LEVELS:
+        return values
+    values = list(values[:DEPTH_LEVELS])
+    return values + [0] * (DEPTH_LEVELS - len(values))
+
+
+class TickBatch(Mapping):
+    """
+    一次行情推送的批量视图
+    推送到达时转换一次为numpy结构化数组（每只股票一行），涨跌幅等派生字段向量化计算一次，
+    策略和模拟交易共用同一个批次，按 代码->行号 直接取数组
+    同时实现Mapping接口，ticks.get(code)/ticks.items() 仍然返回原始tick字典，兼容逐只处理的旧代码
+    """
+    def __init__(self, ticks):
+        """
+        :param ticks: xtdata推送的 {股票代码: tick字典}
+        """
+        self.ticks = ticks
+        self.codes = list(ticks.keys())
+        self.code2row = {code: i for i, code in enumerate(self.codes)}
+
+        rows = []
+        for tick in ticks.values():
+            get = tick.get
+            rows.append((
+                get('time', 0), get('lastPrice', 0.0), get('lastClose', 0.0),
+                get('open', 0.0), get('high', 0.0), get('low', 0.0),
+                get('volume', 0), get('amount', 0.0),
+                _levels(get('askPrice')), _levels(get('bidPrice')),
+                _levels(get('askVol')), _levels(get('bidVol')),
+            ))
+        self.data = np.array(rows, dtype=TICK_DTYPE)
+
+        # 派生字段，每次推送只算一次
+        last_price = self.data['lastPrice']
+        last_close = self.data['lastClose']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.pct_chg = np.where(last_close > 0, (last_price / last_close - 1) * 100, 0.0)
+
+    @classmethod
+    def from_ticks(cls, ticks):
+        """已经是TickBatch时直接返回，避免重复转换"""
+        if isinstance(ticks, cls):
+            return ticks
+        return cls(ticks)
+
+    def __getitem__(self, code):
+        return self.ticks[code]
+
+    def __iter__(self):
+        return iter(self.ticks)
+
+    def __len__(self):
+        return len(self.ticks)
+
+    def __contains__(self, code):
+        return code in self.code2row
+
+    def get_rows(self, codes):
+        """
+        股票代码转为行号
+        :return: np.ndarray，本次推送中没有的股票为-1
+        """
+        code2row = self.code2row
+        return np.fromiter((code2row.get(code, -1) for code in codes), dtype=np.int64, count=len(codes))
+
+    def take(self, field, codes, fill=np.nan):
+        """
+        按股票代码顺序取某个字段
+        :param field: 字段名，见TICK_DTYPE或'pct_chg'
+        :param codes: 股票代码列表
+        :param fill: 本次推送中没有的股票的填充值
+        :return: np.ndarray，与codes一一对应
+        """
+        rows = self.get_rows(codes)
+        column = self.pct_chg if field == 'pct_chg' else self.data[field]
+        if column.ndim > 1:
+            result = np.full((len(codes),) + column.shape[1:], fill, dtype=np.float64)
+        else:
+            result = np.full(len(codes), fill, dtype=np.float64)
+        found = rows >= 0
+        result[found] = column[rows[found]]
+        return result
+
+    def get_prices(self, codes):
+        """
+        获取有效的最新价
+        :return: {股票代码: 最新价}，只包含本次推送中有且价格大于0的股票
+        """
+        prices = self.take('lastPrice', codes, fill=0.0)
+        valid = np.flatnonzero(prices > 0)
+        return {codes[i]: float(prices[i]) for i in valid}
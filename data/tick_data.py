@@ -1,49 +1,70 @@
 from datetime import datetime
 
+
+class _TickField:
+    """
+    tick字段描述符，访问时才从原始tick字典中读取，不做整体拷贝
+    """
+    __slots__ = ('name', 'default')
+
+    def __init__(self, name, default):
+        self.name = name
+        self.default = default
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        return obj._data.get(self.name, self.default)
+
+
+_EMPTY_TICK = {}
+_EMPTY_LEVELS = (0.0,) * 5       # 盘口默认值，只读元组，所有实例共享
+
+
 class TickData:
     """
     Tick数据类，用于解析和保存股票实时行情数据
+    只持有xtdata推送的原始字典引用，字段在访问时读取，构造时不拷贝、不分配盘口列表
+    注意：原始字典在构造后不应再被修改
     """
-    def __init__(self, stock_code):
+    __slots__ = ('stock_code', '_data', 'time')
+
+    # 基本价格信息
+    lastPrice = _TickField('lastPrice', 0.0)       # 最新价
+    open = _TickField('open', 0.0)                 # 开盘价
+    high = _TickField('high', 0.0)                 # 最高价
+    low = _TickField('low', 0.0)                   # 最低价
+    lastClose = _TickField('lastClose', 0.0)       # 昨收价
+
+    # 成交量和成交额
+    amount = _TickField('amount', 0.0)             # 成交额
+    volume = _TickField('volume', 0)               # 成交量
+    pvolume = _TickField('pvolume', 0)             # 原始成交量
+    transactionNum = _TickField('transactionNum', 0)   # 成交笔数
+
+    # 股票状态
+    stockStatus = _TickField('stockStatus', 0)     # 股票状态
+
+    # 估值指标
+    pe = _TickField('pe', 0.0)                     # 市盈率
+
+    # 盘口数据
+    askPrice = _TickField('askPrice', _EMPTY_LEVELS)   # 卖价档位
+    bidPrice = _TickField('bidPrice', _EMPTY_LEVELS)   # 买价档位
+    askVol = _TickField('askVol', _EMPTY_LEVELS)       # 卖量档位
+    bidVol = _TickField('bidVol', _EMPTY_LEVELS)       # 买量档位
+
+    def __init__(self, stock_code, data_dict=None):
         """
         初始化Tick数据对象
         :param stock_code: 股票代码
+        :param data_dict: 包含tick数据的字典，可选
         """
         self.stock_code = stock_code
-        
-        # 基本价格信息
-        self.time = 0                  # 时间戳(毫秒)
-        self.lastPrice = 0.0           # 最新价
-        self.open = 0.0                # 开盘价
-        self.high = 0.0                # 最高价
-        self.low = 0.0                 # 最低价
-        self.lastClose = 0.0           # 昨收价
-        
-        # 成交量和成交额
-        self.amount = 0.0              # 成交额
-        self.volume = 0                # 成交量
-        #self.pvolume = 0               # 当日累计成交量
-        self.transactionNum = 0        # 成交笔数
-        
-        # 股票状态
-        self.stockStatus = 0           # 股票状态
-        
-        # 期货相关
-        #self.openInt = 0               # 持仓量
-        #self.lastSettlementPrice = 0.0 # 昨结算价
-        #self.settlementPrice = 0.0     # 结算价
-        
-        # 估值指标
-        self.pe = 0.0                  # 市盈率
-        
-        # 盘口数据
-        self.askPrice = [0.0] * 5      # 卖价档位
-        self.bidPrice = [0.0] * 5      # 买价档位
-        self.askVol = [0] * 5          # 卖量档位
-        self.bidVol = [0] * 5          # 买量档位
-
-        # 计算字段
-        self.pct_chg = 0.0             # 涨跌幅
+        self._data = _EMPTY_TICK
+        self.time = 0                  # 时间戳，几乎所有使用方都会读取，构造时直接计算
+        if data_dict:
+            self.build_from_dict(data_dict)
 
     def build_from_dict(self, data_dict):
         """
@@ -53,49 +74,23 @@ class TickData:
         """
         if not data_dict:
             return self
-            
-        # 基本价格信息
+
+        self._data = data_dict
         self.time = data_dict.get('time', 0)//1000
-        self.lastPrice = data_dict.get('lastPrice', 0.0)
-        self.open = data_dict.get('open', 0.0)
-        self.high = data_dict.get('high', 0.0)
-        self.low = data_dict.get('low', 0.0)
-        self.lastClose = data_dict.get('lastClose', 0.0)
-        
-        # 成交量和成交额
-        self.amount = data_dict.get('amount', 0.0)
-        self.volume = data_dict.get('volume', 0)
-        self.pvolume = data_dict.get('pvolume', 0)
-        #self.transactionNum = data_dict.get('transactionNum', 0)
-        
-        # 股票状态
-        self.stockStatus = data_dict.get('stockStatus', 0)
-        
-        # 期货相关
-        #self.openInt = data_dict.get('openInt', 0)
-        #self.lastSettlementPrice = data_dict.get('lastSettlementPrice', 0.0)
-        #self.settlementPrice = data_dict.get('settlementPrice', 0.0)
-        
-        # 估值指标
-        self.pe = data_dict.get('pe', 0.0)
-        
-        # 盘口数据
-        self.askPrice = data_dict.get('askPrice', [0.0] * 5)
-        self.bidPrice = data_dict.get('bidPrice', [0.0] * 5)
-        self.askVol = data_dict.get('askVol', [0] * 5)
-        self.bidVol = data_dict.get('bidVol', [0] * 5)
-        
-        # 其他指标
-        #self.volRatio = data_dict.get('volRatio', 0.0)
-        #self.speed1Min = data_dict.get('speed1Min', 0.0)
-        #self.speed5Min = data_dict.get('speed5Min', 0.0)
-        
-        # 计算涨跌幅
-        if self.lastClose > 0:
-            self.pct_chg = (self.lastPrice / self.lastClose - 1) * 100
-        
         return self
-    
+
+    @property
+    def pct_chg(self):
+        """涨跌幅（%）"""
+        last_close = self.lastClose
+        if last_close > 0:
+            return (self.lastPrice / last_close - 1) * 100
+        return 0.0
+
+    def to_dict(self):
+        """返回原始tick字典"""
+        return self._data
+
     def get_datetime(self):
         """
         获取时间戳对应的datetime对象
@@ -116,4 +111,4 @@ class TickData:
                 f"价格: {self.lastPrice:.2f} (开:{self.open:.2f} 高:{self.high:.2f} "
                 f"低:{self.low:.2f} 昨收:{self.lastClose:.2f})\n"
                 f"涨跌幅: {self.pct_chg:.2f}%\n"
-                f"成交: 量 {self.volume} 额 {self.amount:.2f}")
\ No newline at end of file
+                f"成交: 量 {self.volume} 额 {self.amount:.2f}")
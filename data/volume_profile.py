@@ -0,0 +1,156 @@
+import os
+import numpy as np
+from logger import logger
+
+# 每天240根分钟线，标签沿用xtdata的约定：上午0931-1130，下午1301-1500
+TRADING_MINUTES = 240
+
+
+def _build_minute_table():
+    """HHMM -> 当日分钟序号的查找表"""
+    table = np.full(2400, -1, dtype=np.int16)
+    idx = 0
+    for start, end in ((9 * 60 + 31, 11 * 60 + 30), (13 * 60 + 1, 15 * 60)):
+        for m in range(start, end + 1):
+            table[(m // 60) * 100 + m % 60] = idx
+            idx += 1
+    return table
+
+
+_HHMM2INDEX = _build_minute_table()
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cache', 'volume_profile')
+
+
+def minute_index(label):
+    """
+    分钟标签转为当日分钟序号
+    :param label: 分钟标签，格式YYYYMMDDHHMMSS或HHMM
+    :return: 0-239，非交易分钟返回-1
+    """
+    label = str(label)
+    hhmm = int(label[8:12]) if len(label) >= 12 else int(label)
+    if hhmm < 0 or hhmm >= 2400:
+        return -1
+    return int(_HHMM2INDEX[hhmm])
+
+
+class VolumeProfile:
+    """
+    分钟成交量画像：(股票数 x 240分钟) 的N日平均成交量矩阵
+    按日期缓存到本地，盘中按 行号+分钟序号 直接取值
+    """
+    def __init__(self, codes, matrix, date, days):
+        """
+        :param codes: 股票代码列表，与矩阵行一一对应
+        :param matrix: np.ndarray，shape=(len(codes), TRADING_MINUTES)，没有数据为0
+        :param date: 画像对应的交易日，格式YYYYMMDD（只使用该日之前的数据）
+        :param days: 平均的交易日数量
+        """
+        self.codes = list(codes)
+        self.code2row = {code: i for i, code in enumerate(self.codes)}
+        self.matrix = matrix
+        self.date = date
+        self.days = days
+
+    def get(self, code, idx):
+        """
+        获取某只股票某分钟的历史平均成交量
+        :param code: 股票代码
+        :param idx: 分钟序号，见minute_index
+        :return: 平均成交量，没有数据返回0
+        """
+        row = self.code2row.get(code)
+        if row is None or idx < 0:
+            return 0
+        return self.matrix[row, idx]
+
+    def get_rows(self, codes):
+        """
+        股票代码转为矩阵行号
+        :return: np.ndarray，不在画像中的股票为-1
+        """
+        return np.array([self.code2row.get(code, -1) for code in codes], dtype=np.int64)
+
+    @classmethod
+    def build(cls, data, codes, date, days=5):
+        """
+        由get_local_data返回的分钟数据构建画像
+        :param data: {股票代码: DataFrame(index为YYYYMMDDHHMMSS, 含volume列)}
+        :param codes: 股票代码列表
+        :param date: 画像对应的交易日，只使用该日之前的数据
+        :param days: 取最近几个交易日平均
+        :return: VolumeProfile
+        """
+        import pandas as pd  # 只在构建画像时需要，缓存命中时不导入
+        matrix = np.zeros((len(codes), TRADING_MINUTES), dtype=np.float64)
+        frames = []
+        for row, code in enumerate(codes):
+            stock_df = data.get(code) if data is not None else None
+            if stock_df is None or stock_df.empty or 'volume' not in stock_df.columns:
+                continue
+            time_str = stock_df.index.astype(str)
+            frame = pd.DataFrame({
+                'date': time_str.str[:8],
+                'minute': _HHMM2INDEX[time_str.str[8:12].astype(int).to_numpy()],
+                'volume': stock_df['volume'].to_numpy(dtype=np.float64),
+            })
+            frame = frame[(frame['minute'] >= 0) & (frame['date'] < date) & frame['volume'].notna()]
+            if frame.empty:
+                continue
+            # 只保留最近days个交易日
+            recent_dates = np.sort(frame['date'].unique())[-days:]
+            frames.append(frame[frame['date'].isin(recent_dates)].assign(row=row))
+
+        if frames:
+            avg = pd.concat(frames, ignore_index=True).groupby(['row', 'minute'])['volume'].mean()
+            matrix[avg.index.get_level_values('row'), avg.index.get_level_values('minute')] = avg.to_numpy()
+        return cls(codes, matrix, date, days)
+
+    @classmethod
+    def cache_file(cls, date, days, cache_dir=CACHE_DIR):
+        return os.path.join(cache_dir, f"{date}_{days}d.npz")
+
+    def save(self, cache_dir=CACHE_DIR):
+        """保存到本地缓存"""
+        try:
+            if not os.path.exists(cache_dir):
+                os.makedirs(cache_dir)
+            np.savez(self.cache_file(self.date, self.days, cache_dir), codes=np.array(self.codes), matrix=self.matrix)
+        except Exception as e:
+            logger.error(f"保存分钟成交量画像失败: {e}", exc_info=True)
+
+    @classmethod
+    def load(cls, date, days, codes=None, cache_dir=CACHE_DIR):
+        """
+        从本地缓存加载
+        :param codes: 需要覆盖的股票代码，缓存中缺少时视为未命中
+        :return: VolumeProfile或None
+        """
+        path = cls.cache_file(date, days, cache_dir)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as cached:
+                profile = cls(cached['codes'].tolist(), cached['matrix'], date, days)
+        except Exception as e:
+            logger.error(f"加载分钟成交量画像失败: {e}", exc_info=True)
+            return None
+        if codes is not None and any(code not in profile.code2row for code in codes):
+            return None
+        return profile
+
+    @classmethod
+    def load_or_build(cls, codes, date, days, loader, cache_dir=CACHE_DIR):
+        """
+        优先使用当日缓存，未命中时调用loader获取分钟数据构建并缓存
+        :param loader: 函数，参数为股票代码列表，返回get_local_data格式的分钟数据
+        """
+        profile = cls.load(date, days, codes, cache_dir)
+        if profile is not None:
+            logger.info(f"使用缓存的分钟成交量画像 {date}，股票数量 {len(profile.codes)}")
+            return profile
+        profile = cls.build(loader(codes), codes, date, days)
+        profile.save(cache_dir)
+        logger.info(f"生成分钟成交量画像 {date}，股票数量 {len(profile.codes)}")
+        return profile
@@ -1,16 +1,25 @@
+import threading
 from datetime import datetime
-from xtquant import xtdata
 from logger import logger
-from utils import get_trading_days
+from utils import get_trading_days, LazyModule
+from data.price_panel import PricePanel, get_price_panel, reserve
+import numpy as np
+
+# xtdata导入较慢，第一次调用接口时才导入
+xtdata = LazyModule('xtquant.xtdata')
 
 class DataProvider:
     """
     数据提供者类
     用于获取历史行情数据和离线数据
     """
+    # 本进程已下载的历史数据范围 (股票代码, 周期) -> (开始日期, 结束日期)，避免预热后各策略重复下载
+    _downloaded = {}
+    _downloaded_lock = threading.Lock()
+
     @staticmethod
     def get_trading_calendar(start_date, end_date):
-        #xtdata本来有接口，但需要收费，暂时先使用本地数据,目前只支持2024和2025年日期
+        #xtdata本来有接口，但需要收费，暂时先使用本地数据，目前支持2024到2026年日期
         #return xtdata.get_trading_calendar(start_date, end_date)
         return get_trading_days(start_date, end_date) 
 
@@ -29,6 +38,45 @@ class DataProvider:
         data = xtdata.get_local_data(fileds, codes, period, start_date, end_date)
         return data
 
+    @staticmethod
+    def is_downloaded(code, period, start_date, end_date):
+        """本进程是否已经下载过覆盖该范围的历史数据"""
+        downloaded = DataProvider._downloaded.get((code, period))
+        return downloaded is not None and downloaded[0] <= start_date and downloaded[1] >= end_date
+
+    @staticmethod
+    def download_one(code, period, start_date, end_date):
+        """
+        下载单只股票的历史数据到本地，已下载过的范围直接跳过
+        :return: 是否成功
+        """
+        if DataProvider.is_downloaded(code, period, start_date, end_date):
+            return True
+        try:
+            xtdata.download_history_data(code, period, start_date, end_date)
+        except Exception as e:
+            logger.error(f"下载 {code} {period} 历史数据时出错: {str(e)}")
+            return False
+        with DataProvider._downloaded_lock:
+            downloaded = DataProvider._downloaded.get((code, period))
+            # 与已记录的范围重叠时合并，否则以新范围为准
+            if downloaded and downloaded[0] <= end_date and downloaded[1] >= start_date:
+                start_date, end_date = min(start_date, downloaded[0]), max(end_date, downloaded[1])
+            DataProvider._downloaded[(code, period)] = (start_date, end_date)
+        return True
+
+    @staticmethod
+    def download_history_data(code_list, period, start_date, end_date):
+        """
+        下载指定股票代码列表的历史数据到本地
+        :param code_list: 股票代码列表
+        :param period: 数据周期，如'1d'、'1m'
+        :param start_date: 开始日期，格式：YYYYMMDD
+        :param end_date: 结束日期，格式：YYYYMMDD
+        """
+        for code in code_list:
+            DataProvider.download_one(code, period, start_date, end_date)
+
     @staticmethod
     def download_history_data_incrementally(code_list, period='1d'):
         """
@@ -58,18 +106,13 @@ class DataProvider:
         return success_count
 
     @staticmethod
-    def get_daily_data(code_list, start_date, end_date):
+    def load_price_panel(code_list, start_date, end_date):
         """
-        获取指定日期范围内的股票日均价
-        :param code_list: 股票代码列表
-        :param start_date: 开始日期，格式：YYYYMMDD
-        :param end_date: 结束日期，格式：YYYYMMDD
-        :return: dict, key为股票代码，value为均价
+        下载并读取日线收盘价，构建价格面板
+        :return: PricePanel
         """
         # 确保数据下载
-        #logger.info(f"尝试下载历史数据{code_list} {start_date} {end_date}")
-        for code in code_list:
-            xtdata.download_history_data(code, "1d", start_date, end_date)
+        DataProvider.download_history_data(code_list, "1d", start_date, end_date)
 
         # 获取历史数据
         data = xtdata.get_market_data(
@@ -80,25 +123,40 @@ class DataProvider:
             end_time=end_date,
         )
 
-        code2daily = {}
         if data is not None and 'close' in data:
-            close_data = data['close']
-            for code in code_list:
-                if code in close_data.index:
-                    prices = close_data.loc[code].values
-                    valid_prices = prices[prices > 0]  # 过滤无效价格
-                    if len(valid_prices) > 0:
-                        code2daily[code] = valid_prices.tolist()  # 将 numpy array 转换为 list
-                    else:
-                        code2daily[code] = []
-                        logger.warning(f"{code} 在指定时间段内没有有效的价格数据")
-                else:
-                    code2daily[code] = []
-                    logger.warning(f"{code} 未在数据中找到")
+            close_data = data['close'].reindex(code_list)
+            dates = [str(date) for date in close_data.columns]
+            matrix = close_data.to_numpy(dtype=np.float64)
         else:
             logger.error("获取历史数据失败")
+            dates = []
+            matrix = np.empty((len(code_list), 0), dtype=np.float64)
+        return PricePanel(code_list, dates, matrix, start_date, end_date)
 
-        return code2daily
+    @staticmethod
+    def reserve_daily_data(code_list, start_date, end_date):
+        """预告日线需求，共享价格面板第一次加载时按全部需求的并集一次加载"""
+        reserve(code_list, start_date, end_date)
+
+    @staticmethod
+    def get_price_panel(code_list, start_date, end_date):
+        """
+        获取进程内共享的日线价格面板，已加载的股票和日期不会重复下载和读取
+        :return: PricePanel，日期范围为[start_date, end_date]的视图
+        """
+        return get_price_panel(code_list, start_date, end_date, DataProvider.load_price_panel)
+
+    @staticmethod
+    def get_daily_data(code_list, start_date, end_date):
+        """
+        获取指定日期范围内的股票日收盘价
+        :param code_list: 股票代码列表
+        :param start_date: 开始日期，格式：YYYYMMDD
+        :param end_date: 结束日期，格式：YYYYMMDD
+        :return: dict, key为股票代码，value为与交易日对齐的收盘价（共享价格面板的只读np.ndarray），停牌日为nan或0
+        """
+        panel = DataProvider.get_price_panel(code_list, start_date, end_date)
+        return panel.get_code2daily(code_list)
 
 
 if __name__ == '__main__':
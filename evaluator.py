@@ -16,8 +16,8 @@ class Evaluator:
         :param strategy_name: 策略名称
         :param signals: 交易信号列表，每个信号为 (股票对象, 交易类型, 交易数量, 策略标记，idx)
         :param target_stocks: 目标股票列表
-        :param code2daily: 股票代码到价格序列的映射字典，用于获取历史价格
-        :param trade_days: 交易日列表
+        :param code2daily: 股票代码到价格序列的映射字典，用于获取历史价格（共享价格面板的只读视图，不会被修改）
+        :param trade_days: 与code2daily价格行对齐的交易日列表（策略的daily_dates），信号idx是其中的位置
         :param initial_cash: 初始资金，默认100万
         :return: 评估结果字典
         """
@@ -144,21 +144,19 @@ class Evaluator:
     def _get_date_from_idx(self, idx, trade_days):
         """
         从索引获取日期
-        使用TradeDays获取真实交易日期
+        idx是信号所在价格行的位置，价格行与trade_days对齐（停牌日保留为空值，不会错位），直接取对应的交易日
         :param idx: 日期索引
         :return: 日期字符串
         """
-        # 从trade_days获取真实交易日期
         if 0 <= idx < len(trade_days):
             return trade_days[idx]
-        else:
-            # 索引超出范围时使用相对日期
-            logger.warning(f"日期索引 {idx} 超出交易日范围 [0, {len(trade_days)-1}]")
-            return f"Day-{idx}"
+        # 无法换算时使用相对日期
+        logger.warning(f"日期索引 {idx} 无法换算为交易日")
+        return f"Day-{idx}"
     
     def _get_price_from_idx(self, code, idx):
         """
-        从索引获取价格
+        从索引获取价格，价格行与交易日对齐，停牌日没有价格时取之前最近的有效价格
         :param code: 股票代码
         :param idx: 价格索引
         :return: 价格
@@ -172,7 +170,12 @@ class Evaluator:
             logger.warning(f"股票 {code} 的价格索引 {idx} 超出范围 [0, {len(prices)-1}]")
             return 0.0
             
-        return prices[idx]
+        price = prices[idx]
+        if not price > 0:
+            valid = prices[:idx + 1]
+            valid = valid[valid > 0]
+            price = valid[-1] if len(valid) > 0 else 0.0
+        return price
     
     def _calculate_total_value(self, cash, positions, idx):
         """
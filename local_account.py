@@ -1,6 +1,7 @@
 from datetime import datetime
 from logger import logger, trader_logger
 from base_account import BaseAccount
+from metrics import metrics
 
 class LocalAccount(BaseAccount):
     """
@@ -18,7 +19,8 @@ class LocalAccount(BaseAccount):
         self.created_at = 0
         self.positions = {}
         self.trades = []
-        self.orders = []
+        self.clear_orders()
+        self.orders_date = None         # 委托记录所属日期，跨日时清空
 
         self.submit_trade_count = 0
 
@@ -39,6 +41,7 @@ class LocalAccount(BaseAccount):
         return  (current_time - self.last_update_time) > self.update_interval
 
     
+    @metrics.timed('account.update_positions')
     def update_positions(self, acc_info, positions_df, trades_df, orders_df, id2stock):
         """
         根据服务器端返回的账户信息和持仓信息更新账户状态
@@ -185,8 +188,11 @@ class LocalAccount(BaseAccount):
         #更新委托信息
         try:
             if orders_df is not None and not orders_df.empty:
-                # 清空当前委托记录，重新从服务器数据填充
-                self.orders = []
+                # 服务器只返回当天的委托，按委托编号增量更新，跨日时清空
+                today = datetime.now().strftime("%Y%m%d")
+                if self.orders_date != today:
+                    self.clear_orders()
+                    self.orders_date = today
                 
                 for _, order in orders_df.iterrows():
                     # 创建委托记录字典
@@ -220,8 +226,8 @@ class LocalAccount(BaseAccount):
                         'order_time': order["OrderTime"]
                     }
                     
-                    # 添加到委托记录列表
-                    self.orders.append(order_record)
+                    # 添加到委托记录列表并更新委托索引
+                    self.add_order(order_record)
                     
                 logger.info(f"更新委托记录成功，共 {len(self.orders)} 条记录")
             else:
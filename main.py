@@ -1,36 +1,58 @@
+import sys
+from startup_profiler import StartupProfiler
+# 启动耗时分析需要在其他导入之前开启，才能记录到全部模块的导入耗时
+startup_profiler = StartupProfiler.from_argv(sys.argv, 'main')
+
+from sampling_profiler import SamplingProfiler
+# 采样分析，--profile开启，行情回调线程按5分钟窗口输出collapsed stack
+sampling_profiler = SamplingProfiler.from_argv(sys.argv, 'main')
+
 import time
 from datetime import datetime
 import argparse
-from xtquant import xtdata
-from mini_trader import MiniTrader
 from data_provider import DataProvider
 from risk_manager import RiskManager
-from local_account import LocalAccount
+from signal_netting import SignalNetter
 from strategy.strategy_factory import StrategyFactory
-from strategy.strategy_params import Active_Codes
-from config import ACCOUNT_ID, TRADER_PATH, STRATEGY_CONFIG
+from strategy.strategy_params import get_active_codes
+from subscription_manager import SubscriptionManager
+from market_state import MarketState
+from warmup import WarmupScheduler
+from data.tick_batch import TickBatch
+from config import ACCOUNT_ID, TRADER_PATH, STRATEGY_CONFIG, SUBSCRIPTION_CONFIG, DATA_CONFIG, WARMUP_CONFIG, METRICS_CONFIG
 from stock_code_config import BJSE_INDEX, SHSE_INDEX, HS_INDEX
 from my_stock import MyStock
 from logger import logger, tick_logger  # 修改导入语句
+from metrics import metrics
+from utils import LazyModule
 import os
-import sys
+
+# xtquant导入较慢，用到时才导入；MiniTrader、LocalAccount只在实盘分支导入
+xtdata = LazyModule('xtquant.xtdata')
 
 # 将项目根目录添加到 Python 路径
 current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.append(current_dir)
 
+# 热路径指标按配置开关
+metrics.configure(**METRICS_CONFIG)
+
 # 全局变量
 id2stock = {}  # 股票代码到MyStock对象的映射
 strategies = []  # 策略列表
 risk_manager = None  # 风险管理器
+signal_netter = SignalNetter()  # 跨策略信号轧差
 trader = None  # 交易接口
+subscription_manager = None  # 行情订阅管理器
+market_state = MarketState([SHSE_INDEX, HS_INDEX, BJSE_INDEX, DATA_CONFIG["market_index"]])  # 大盘状态，所有策略共享
 
 def init_stocks():
     """初始化股票对象"""
     global id2stock
     logger.info("初始化股票对象...")
 
-    active_codes = Active_Codes
+    # 只为启用的策略创建股票对象
+    active_codes = get_active_codes(STRATEGY_CONFIG["enabled_strategies"])
     #active_codes.extend(BASKET1)
 
     logger.info(f"活跃股票数量: {active_codes}")
@@ -63,7 +85,9 @@ def init_strategies():
                 logger.warning(f"警告: 股票 {code} 未初始化")
         
         strategy.target_stocks = target_stocks
+        strategy.market_state = market_state
         strategies.append(strategy)
+        sampling_profiler.tag_strategy(strategy, strategy_id)
         
         logger.info(f"创建策略: {strategy_id}, 目标股票数量: {len(target_stocks)}")
     
@@ -75,16 +99,12 @@ def prepare_data():
     global strategies
     logger.info("准备历史数据...")
     
-    # 为每个策略准备数据
-    for strategy in strategies:
-        success = strategy.fill_data()
-        if not success:
-            logger.warning(f"警告: 策略 {strategy.__class__.__name__} 数据准备失败")
-        else:
-            logger.info(f"策略 {strategy.__class__.__name__} 数据准备完成")
+    # 合并各策略的历史数据需求并发下载，各策略数据就绪后立即执行fill_data
+    WarmupScheduler(strategies, **WARMUP_CONFIG).run()
     
     return True
 
+@metrics.timed('on_tick_data')
 def on_tick_data(ticks):
     """
     行情数据回调函数
@@ -92,8 +112,14 @@ def on_tick_data(ticks):
     """
     global strategies, risk_manager, trader, using_account, id2stock
     logger.info(f"接收行情数据: 数量={len(ticks)}, 股票代码列表={list(ticks.keys())}")
-    #index_ticks = xtdata.get_full_tick(['899050.BJ'])
-    #logger.info(f"指数行情数据: {index_ticks}")
+    startup_profiler.mark_first_tick()
+    sampling_profiler.watch_current_thread()
+    metrics.incr('pushes')
+    metrics.incr('ticks', len(ticks))
+    # 每次推送只转换一次，模拟交易和各策略共用同一个批次
+    ticks = TickBatch(ticks)
+    # 每次推送只更新一次指数状态，策略直接读取
+    market_state.update(ticks)
     if using_account.is_simulated:
         trader.realtime_trigger(ticks)
     for code, tick in ticks.items():
@@ -108,9 +134,12 @@ def on_tick_data(ticks):
     
     if not all_signals:
         return
-    
-    # 风险评估
+    metrics.incr('signals', len(all_signals))
+
+    # 风险评估逐个信号检查（查重、冷却、资金、可用持仓），被拒绝的信号不参与轧差
     reviewed_signals = risk_manager.evaluate_signals(all_signals, using_account)
+    # 通过的信号中同一股票的多策略信号再轧差，每只股票每次推送最多一笔委托
+    reviewed_signals = signal_netter.net(reviewed_signals)
     
     #实盘实操的时候，需要从trader接口拉取服务器上的账户和交易信息，实盘模拟的时候，在simTrader里面直接调用了
     #所有这里只对实盘实操的时候生效
@@ -124,12 +153,19 @@ def on_tick_data(ticks):
         return
     
     # 执行交易
+    # 实盘使用本次推送的最新价委托，不再逐笔查询行情；模拟交易仍按盘口价撮合
+    code2price = {} if using_account.is_simulated else ticks.get_prices([stock.code for stock, _, _, _ in reviewed_signals])
     for stock, trade_type, amount, remark in reviewed_signals:
+        price_kwargs = {'price': code2price[stock.code]} if stock.code in code2price else {}
+        allocations = signal_netter.code2contributors.get(stock.code)
         if trade_type == 'buy':
-            ret = trader.buy_stock(stock.code, amount, remark=f'{remark}')
+            ret = trader.buy_stock(stock.code, amount, remark=f'{remark}', allocations=allocations, **price_kwargs)
         else:
-            ret = trader.sell_stock(stock.code, amount, remark=f'{remark}')
+            ret = trader.sell_stock(stock.code, amount, remark=f'{remark}', allocations=allocations, **price_kwargs)
+        # 账户同步到的委托只带第一个策略，登记后参与的每个策略都能查到当天的委托
+        using_account.register_allocations(stock.code, trade_type, remark, allocations)
         
+        metrics.incr(f'orders.{trade_type}')
         logger.info(f"提交交易: {trade_type} {stock.code} {amount}, ret: {ret}")
 
     
@@ -141,9 +177,10 @@ def main(use_sim=False, account_id=ACCOUNT_ID):
     :param use_sim: 是否使用模拟交易
     :param account_id: 交易账户ID
     """
-    global data_provider, risk_manager, trader, using_account, id2stock
+    global data_provider, risk_manager, trader, using_account, id2stock, subscription_manager
     
     logger.info(f"交易程序启动时间: {datetime.now()}")
+    startup_profiler.mark('main_start')
             
     # 初始化数据提供者
     data_provider = DataProvider()
@@ -152,17 +189,23 @@ def main(use_sim=False, account_id=ACCOUNT_ID):
     risk_manager = RiskManager()
     
     # 初始化股票对象
-    if not init_stocks():
+    with startup_profiler.phase('init_stocks'):
+        success = init_stocks()
+    if not success:
         logger.error("初始化股票对象失败，程序退出")
         return
 
     # 初始化策略
-    if not init_strategies():
+    with startup_profiler.phase('init_strategies'):
+        success = init_strategies()
+    if not success:
         logger.error("初始化策略失败，程序退出")
         return
 
     # 准备历史数据
-    if not prepare_data():
+    with startup_profiler.phase('prepare_data'):
+        success = prepare_data()
+    if not success:
         logger.error("准备历史数据失败，程序退出")
         return
     
@@ -184,6 +227,8 @@ def main(use_sim=False, account_id=ACCOUNT_ID):
 
         else:
             # 使用实盘交易
+            from mini_trader import MiniTrader
+            from local_account import LocalAccount
             logger.info(f"使用实盘交易模式，账户ID: {account_id}")
             trader = MiniTrader(TRADER_PATH, account_id)
                     # 连接交易接口
@@ -195,20 +240,38 @@ def main(use_sim=False, account_id=ACCOUNT_ID):
             trader.print_summary()
             local_account = LocalAccount(ACCOUNT_ID)
             using_account = local_account
+            # 风控查重同时看刚提交、账户还没同步到的委托
+            risk_manager.order_tracker = trader.tracker
             using_account.update_positions(trader.get_account_info(), trader.get_positions(), trader.get_trades(), trader.get_orders(), id2stock)
   
         # 订阅行情
-        stock_codes = list(id2stock.keys())
-        index_codes = [SHSE_INDEX, HS_INDEX, BJSE_INDEX]
-        stock_codes.extend(index_codes)
-        logger.info(f"订阅行情: {stock_codes}")
-        xtdata.subscribe_whole_quote(stock_codes, callback=on_tick_data)
+        with startup_profiler.phase('subscribe'):
+            stock_codes = list(id2stock.keys())
+            stock_codes.extend(market_state.index_codes)
+            market_state.prime(xtdata.get_full_tick)
+            logger.info(f"订阅行情: {stock_codes}")
+            subscription_manager = SubscriptionManager(xtdata, **SUBSCRIPTION_CONFIG)
+            subscription_manager.add_whole_quote(stock_codes)
+            for strategy in strategies:
+                quote_requests = strategy.get_quote_requests()
+                if quote_requests:
+                    subscription_manager.request_quote(strategy.__class__.__name__, quote_requests, strategy.on_quote)
+            subscription_manager.start(on_tick_data)
+        # 热路径指标定期汇总到logs/metrics_YYYYMMDD.jsonl
+        metrics.start()
+        sampling_profiler.start()
+        # 非交易时段可能收不到行情，订阅完成时先输出一次报告
+        report_file = startup_profiler.write_report()
+        if report_file:
+            logger.info(f"启动耗时报告: {report_file}")
         
         # 主循环，保持程序运行
         round_count = 0
         while True:
             time.sleep(0.5)
             round_count += 1
+            # 轮换超出上限的单股订阅，并轮询剩余代码
+            subscription_manager.maintain()
             
     except KeyboardInterrupt:
         logger.info("\n程序手动终止")
@@ -216,7 +279,13 @@ def main(use_sim=False, account_id=ACCOUNT_ID):
         logger.error(f"程序异常终止: {e}", exc_info=True)
     finally:
         # 取消订阅
-        xtdata.unsubscribe_quote(list(id2stock.keys()))
+        if subscription_manager:
+            subscription_manager.stop()
+        # 实盘交易接口提交完排队中的委托，模拟交易接口保存内存中的持仓价格
+        if hasattr(trader, 'stop'):
+            trader.stop()
+        metrics.stop()
+        sampling_profiler.stop()
         logger.info(f"程序结束时间: {datetime.now()}")
 
 if __name__ == "__main__":
@@ -224,6 +293,8 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='量化交易程序')
     parser.add_argument('--sim', action='store_true', help='使用模拟交易模式')
     parser.add_argument('--account', type=str, default="sim_id1", help='指定交易账户ID')
+    parser.add_argument('--profile-startup', action='store_true', help='记录导入和各初始化阶段耗时，报告输出到logs目录')
+    parser.add_argument('--profile', action='store_true', help='采样分析行情回调线程，按5分钟窗口输出到logs/profile目录')
     
     args = parser.parse_args()
     
@@ -0,0 +1,51 @@
+from logger import logger
+
+
+class MarketState:
+    """
+    大盘状态服务
+    由on_tick_data在每次推送时更新一次，缓存指数最新tick和涨跌幅，策略直接读取，不再同步拉取行情
+    """
+    def __init__(self, index_codes):
+        """
+        :param index_codes: 需要跟踪的指数代码列表
+        """
+        self.index_codes = list(dict.fromkeys(index_codes))
+        self.code2tick = {}         # 指数代码 -> 最新tick字典
+        self.code2rise = {}         # 指数代码 -> 相对开盘价的涨跌幅（%）
+
+    def update(self, ticks):
+        """
+        用一次推送的行情更新指数状态，推送中没有的指数保留上一次的值
+        :param ticks: 股票代码到tick字典的映射
+        """
+        for code in self.index_codes:
+            tick = ticks.get(code)
+            if tick:
+                self.code2tick[code] = tick
+                self.code2rise[code] = self.calc_rise(tick)
+
+    def prime(self, get_full_tick):
+        """
+        启动时同步拉取一次指数行情，避免开盘前几次推送没有指数数据
+        :param get_full_tick: xtdata.get_full_tick或同接口函数
+        """
+        try:
+            self.update(get_full_tick(self.index_codes) or {})
+        except Exception as e:
+            logger.error(f"初始化指数行情失败: {e}", exc_info=True)
+
+    @staticmethod
+    def calc_rise(market_tick):
+        """计算指数相对开盘价的涨跌幅（%），数据无效返回None"""
+        if not market_tick or market_tick.get('open', 0) <= 0:
+            return None
+        return (market_tick['lastPrice'] / market_tick['open'] - 1) * 100
+
+    def get_tick(self, code):
+        """获取指数最新tick，没有返回None"""
+        return self.code2tick.get(code)
+
+    def get_market_rise(self, code):
+        """获取指数涨跌幅（%），没有数据返回None"""
+        return self.code2rise.get(code)
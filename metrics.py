@@ -0,0 +1,290 @@
+import os
+import json
+import time
+import threading
+from datetime import datetime
+from functools import wraps
+from logger import logger
+
+REPORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs')
+
+
+class Histogram:
+    """
+    HDR风格的对数-线性直方图，记录非负整数（热路径耗时单位为微秒）
+    每个2的幂区间再线性分成2^sub_bucket_bits个桶，相对误差不超过1/2^sub_bucket_bits，
+    记录只是一次下标计算和计数加一，不保存原始样本，内存固定
+    """
+    def __init__(self, sub_bucket_bits=5):
+        """
+        :param sub_bucket_bits: 每个2的幂区间的线性桶数（以2为底的对数），5对应约3%的相对误差
+        """
+        self.sub_bucket_bits = sub_bucket_bits
+        self.sub_bucket_count = 1 << sub_bucket_bits
+        self.counts = [0] * (self.sub_bucket_count * (64 - sub_bucket_bits))
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def _index(self, value):
+        if value < (self.sub_bucket_count << 1):
+            return value
+        shift = value.bit_length() - self.sub_bucket_bits - 1
+        return (shift + 1) * self.sub_bucket_count + (value >> shift) - self.sub_bucket_count
+
+    def _bucket_range(self, index):
+        """:return: 桶覆盖的 [下界, 上界]"""
+        if index < (self.sub_bucket_count << 1):
+            return index, index
+        shift = index // self.sub_bucket_count - 1
+        mantissa = index % self.sub_bucket_count + self.sub_bucket_count
+        return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+    def record(self, value):
+        value = int(value) if value > 0 else 0
+        self.counts[self._index(value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+        if self.min is None or value < self.min:
+            self.min = value
+
+    def merge(self, other):
+        """合并另一个相同精度的直方图"""
+        for i, n in enumerate(other.counts):
+            if n:
+                self.counts[i] += n
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+
+    def percentile(self, p):
+        """
+        :param p: 百分位，0-100
+        :return: 所在桶的上界（不超过记录到的最大值），没有样本时返回0
+        """
+        if self.count == 0:
+            return 0
+        rank = max(1, int(round(p / 100.0 * self.count)))
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(self._bucket_range(i)[1], self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def summary(self, scale=0.001):
+        """
+        :param scale: 输出时乘的系数，默认把微秒换算为毫秒
+        :return: dict，样本数和mean/p50/p90/p99/max
+        """
+        return {
+            'count': self.count,
+            'mean': round(self.mean * scale, 3),
+            'p50': round(self.percentile(50) * scale, 3),
+            'p90': round(self.percentile(90) * scale, 3),
+            'p99': round(self.percentile(99) * scale, 3),
+            'max': round(self.max * scale, 3),
+        }
+
+
+class _NullTimer:
+    """关闭时timer()返回的空上下文"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ('metrics', 'name', 'start')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.observe(self.name, (time.perf_counter_ns() - self.start) // 1000)
+        return False
+
+
+class Metrics:
+    """
+    热路径指标
+    1. 计时：timer()上下文或timed()装饰器，单调时钟，耗时以微秒记入直方图
+    2. 计数：incr()，如tick数、信号数、风控拒绝数、委托数
+    3. 定期汇总：start()启动后台线程，每flush_interval秒把本窗口的直方图摘要和计数写到logs/metrics_YYYYMMDD.jsonl
+    关闭时timer()返回共享的空上下文、incr()/observe()立即返回，装饰过的函数只多一次开关判断，几乎没有开销；
+    共享实例默认开启，不依赖config，由main启动时按METRICS_CONFIG调用configure()
+    记录不加锁，汇总时整体换出当前窗口，极少数与换出同时发生的记录可能落入上一个窗口
+    """
+    def __init__(self, enabled=True, flush_interval=60, report_dir=REPORT_DIR):
+        """
+        :param enabled: 是否开启
+        :param flush_interval: 汇总写文件的间隔（秒）
+        :param report_dir: 汇总文件目录
+        """
+        self.enabled = enabled
+        self.flush_interval = flush_interval
+        self.report_dir = report_dir
+        self.lock = threading.Lock()
+        self.histograms = {}            # 本窗口：名称 -> Histogram
+        self.counters = {}              # 本窗口：名称 -> 计数
+        self.totals = {}                # 启动以来的累计计数
+        self.window_start = time.time()
+        self._stop_event = threading.Event()
+        self._flusher = None
+
+    def configure(self, enabled=None, flush_interval=None):
+        """
+        按配置调整开关和汇总间隔，应在start()之前调用
+        :param enabled: 是否开启，None表示不变
+        :param flush_interval: 汇总间隔（秒），None表示不变
+        """
+        if enabled is not None:
+            self.enabled = enabled
+        if flush_interval is not None:
+            self.flush_interval = flush_interval
+
+    def _histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            with self.lock:
+                histogram = self.histograms.setdefault(name, Histogram())
+        return histogram
+
+    def observe(self, name, value):
+        """记录一个样本，耗时单位为微秒"""
+        if not self.enabled:
+            return
+        self._histogram(name).record(value)
+
+    def incr(self, name, value=1):
+        """计数加value"""
+        if not self.enabled:
+            return
+        counters = self.counters
+        counters[name] = counters.get(name, 0) + value
+
+    def timer(self, name):
+        """
+        计时上下文
+        with metrics.timer('on_tick_data'):
+            ...
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name)
+
+    def timed(self, name, count_result=None):
+        """
+        计时装饰器，实例关闭时返回原函数，运行中关闭时直接调用原函数
+        :param name: 直方图名称
+        :param count_result: 计数器名称，函数返回值非空时按len(返回值)累加，如策略生成的信号数
+        """
+        def decorator(func):
+            if not self.enabled:
+                return func
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter_ns()
+                try:
+                    result = func(*args, **kwargs)
+                finally:
+                    self._histogram(name).record((time.perf_counter_ns() - start) // 1000)
+                if count_result is not None and result:
+                    self.incr(count_result, len(result))
+                return result
+            return wrapper
+        return decorator
+
+    def snapshot(self):
+        """
+        取出本窗口的数据并开始新的窗口
+        :return: dict，窗口结束时间和时长、本窗口计数、累计计数和各直方图摘要（毫秒）
+        """
+        now = time.time()
+        with self.lock:
+            histograms, counters, window_start = self.histograms, self.counters, self.window_start
+            self.histograms, self.counters, self.window_start = {}, {}, now
+        for name, value in counters.items():
+            self.totals[name] = self.totals.get(name, 0) + value
+        return {
+            'time': datetime.fromtimestamp(now).strftime('%Y-%m-%d %H:%M:%S'),
+            'window_s': round(now - window_start, 3),
+            'counters': dict(sorted(counters.items())),
+            'totals': dict(sorted(self.totals.items())),
+            'timings_ms': {name: histogram.summary() for name, histogram in sorted(histograms.items())},
+        }
+
+    def flush(self):
+        """
+        本窗口汇总追加到logs/metrics_YYYYMMDD.jsonl，并开始新的窗口
+        :return: 文件路径，没有数据时返回None
+        """
+        snapshot = self.snapshot()
+        if not snapshot['counters'] and not snapshot['timings_ms']:
+            return None
+        if not os.path.exists(self.report_dir):
+            os.makedirs(self.report_dir)
+        path = os.path.join(self.report_dir, f"metrics_{datetime.now().strftime('%Y%m%d')}.jsonl")
+        try:
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(snapshot, ensure_ascii=False) + '\n')
+        except Exception as e:
+            logger.error(f"保存指标汇总失败: {e}", exc_info=True)
+            return None
+        hot = snapshot['timings_ms'].get('on_tick_data')
+        if hot:
+            logger.info(f"指标汇总 {snapshot['window_s']:.0f}s: 推送 {hot['count']} 次，"
+                        f"on_tick_data p50 {hot['p50']}ms p99 {hot['p99']}ms max {hot['max']}ms，计数 {snapshot['counters']}")
+        return path
+
+    def start(self):
+        """启动定期汇总线程，关闭或已启动时直接返回"""
+        if not self.enabled or self._flusher is not None:
+            return
+        self._stop_event.clear()
+        self._flusher = threading.Thread(target=self._run, name='MetricsFlush', daemon=True)
+        self._flusher.start()
+
+    def stop(self):
+        """停止汇总线程并写出最后一个窗口"""
+        if self._flusher is not None:
+            self._stop_event.set()
+            self._flusher.join(5)
+            self._flusher = None
+        if self.enabled:
+            self.flush()
+
+    def _run(self):
+        while not self._stop_event.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"指标汇总异常: {e}", exc_info=True)
+
+
+# 进程内共享的指标实例，热路径模块在导入时用它装饰
+metrics = Metrics()
@@ -8,24 +8,46 @@ from datetime import datetime
 from xtquant.xttrader import XtQuantTraderCallback
 from xtquant import xtdata
 from logger import logger
+from order_gateway import OrderGateway
+from order_tracker import OrderTracker
+from config import ORDER_GATEWAY_CONFIG
 
 class MiniTraderCallback(XtQuantTraderCallback):
+    def __init__(self, gateway=None, tracker=None):
+        super().__init__()
+        self.gateway = gateway
+        self.tracker = tracker
+
     def on_disconnected(self):
         logger.warning(f'{datetime.now()} 连接断开')
 
     def on_stock_order(self, order):
         logger.info(f'{datetime.now()} 委托回调 {order.order_remark}')
+        if self.tracker is not None:
+            self.tracker.on_stock_order(order)
+        if self.gateway is not None:
+            self.gateway.on_order_update(order.order_id)
 
     def on_stock_trade(self, trade):
         direction = "买入" if trade.offset_flag == 48 else "卖出"
         logger.info(f'{datetime.now()} 成交回调: {direction} {trade.order_remark} '
                    f'成交价格: {trade.traded_price} 成交数量: {trade.traded_volume}')
+        if self.tracker is not None:
+            self.tracker.on_stock_trade(trade)
+        if self.gateway is not None:
+            self.gateway.on_order_update(trade.order_id)
 
     def on_order_error(self, order_error):
         logger.error(f"委托错误: {order_error.order_remark} {order_error.error_msg}")
+        if self.gateway is not None:
+            self.gateway.on_order_error(order_error)
+        if self.tracker is not None:
+            self.tracker.on_order_error(order_error)
 
     def on_order_stock_async_response(self, response):
         logger.info(f"异步委托回调: {response.order_remark}")
+        if self.gateway is not None:
+            self.gateway.on_async_response(response)
 
 class MiniTrader:
     def __init__(self, path, account_id):
@@ -34,7 +56,10 @@ class MiniTrader:
         self.session_id = int(time.time())
         self.trader = XtQuantTrader(path, self.session_id)
         self.account = StockAccount(account_id)
-        self.callback = MiniTraderCallback()
+        # 委托通过网关排队限速提交，生命周期由tracker跟踪
+        self.tracker = OrderTracker()
+        self.gateway = OrderGateway(self.trader, self.account, tracker=self.tracker, **ORDER_GATEWAY_CONFIG)
+        self.callback = MiniTraderCallback(self.gateway, self.tracker)
         self.trader.register_callback(self.callback)
 
     def connect(self):
@@ -50,8 +75,14 @@ class MiniTrader:
 
         logger.info('【软件终端连接成功！】')
         logger.info('【账户信息订阅成功！】')
+        self.gateway.start()
         return True
 
+    def stop(self):
+        """提交完排队中的委托后停止网关，并保存当天的委托记录"""
+        self.gateway.stop()
+        self.tracker.dump()
+
     def get_account_info(self):
         """获取账户资产信息"""
         asset = self.trader.query_stock_asset(self.account)
@@ -148,19 +179,24 @@ class MiniTrader:
         logger.info('-' * 18 + "【持仓信息】" + '-' * 18)
         logger.info(str(positions_df) if not positions_df.empty else "无持仓信息")
 
-    def buy_stock(self, stock_code, amount, price_type=xtconstant.LATEST_PRICE, price=-1, remark=''):
+        logger.info('-' * 18 + "【委托网关】" + '-' * 18)
+        logger.info(str(self.gateway.get_metrics()))
+        logger.info(f"委托状态: {self.tracker.summary()}")
+
+    def buy_stock(self, stock_code, amount, price_type=xtconstant.LATEST_PRICE, price=-1, remark='', allocations=None):
         """
         买入股票
         :param stock_code: 股票代码
         :param amount: 目标买入金额
         :param price_type: 价格类型，默认市价
-        :param price: 委托价格，市价委托时无效
+        :param price: 委托价格，市价委托时传入手上行情的最新价，不传时才查询行情
         :param remark: 委托备注
-        :return: 异步委托序号
+        :param allocations: 轧差合并的委托参与的策略，[(策略备注, 数量)]，记入委托跟踪器
+        :return: 委托网关请求编号
         """
 
-        # 获取当前价格 #TODO
-        if price_type == xtconstant.LATEST_PRICE:
+        # 调用方没有提供价格时才同步查询行情
+        if price_type == xtconstant.LATEST_PRICE and price <= 0:
             full_tick = xtdata.get_full_tick([stock_code])
             current_price = full_tick[stock_code]['lastPrice']
         else:
@@ -172,19 +208,19 @@ class MiniTrader:
             logger.warning(f"可买数量为0，可用资金：{available_cash}，目标金额：{amount}")
             return None
 
-        logger.info(f"买入 {stock_code}: 数量{amount}, 价格类型{price_type}, 价格{price},  备注{remark}")
-        return self.trader.order_stock_async(
-            self.account,
+        logger.info(f"买入 {stock_code}: 数量{amount}, 价格类型{price_type}, 价格{current_price},  备注{remark}")
+        return self.gateway.submit(
             stock_code,
             xtconstant.STOCK_BUY,
             buy_volume,
             price_type,
             current_price,
             remark or 'buy',
-            remark +"_"+ stock_code
+            remark +"_"+ stock_code,
+            allocations
         )
 
-    def sell_stock(self, stock_code, volume, price_type=xtconstant.LATEST_PRICE, price=-1, remark=''):
+    def sell_stock(self, stock_code, volume, price_type=xtconstant.LATEST_PRICE, price=-1, remark='', allocations=None):
         """
         卖出股票
         :param stock_code: 股票代码
@@ -192,7 +228,8 @@ class MiniTrader:
         :param price_type: 价格类型，默认市价
         :param price: 委托价格，市价委托时无效
         :param remark: 委托备注
-        :return: 异步委托序号
+        :param allocations: 轧差合并的委托参与的策略，[(策略备注, 数量)]，记入委托跟踪器
+        :return: 委托网关请求编号
         """
         # 获取持仓信息
         #positions = self.trader.query_stock_positions(self.account)
@@ -208,15 +245,15 @@ class MiniTrader:
             return None
 
         logger.info(f"卖出 {stock_code}: 数量{sell_volume}股 价格类型{price_type}, 价格{price},  备注{remark}")
-        return self.trader.order_stock_async(
-            self.account,
+        return self.gateway.submit(
             stock_code,
             xtconstant.STOCK_SELL,
             sell_volume,
             price_type,
             price,
             remark or 'sell',
-            remark +"_"+ stock_code
+            remark +"_"+ stock_code,
+            allocations
         )
 
 # 使用示例
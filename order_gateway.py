@@ -0,0 +1,241 @@
+import time
+import queue
+import threading
+from collections import deque
+import numpy as np
+from logger import logger
+from order_tracker import DONE_STATES
+
+
+class OrderRequest:
+    """网关内部的一笔委托请求"""
+    __slots__ = ('request_id', 'stock_code', 'order_type', 'volume', 'price_type', 'price', 'strategy_name', 'remark',
+                 'allocations', 'enqueue_time', 'submit_time', 'ack_time', 'seq', 'order_id', 'status', 'error_msg')
+
+    def __init__(self, request_id, stock_code, order_type, volume, price_type, price, strategy_name, remark,
+                 allocations=None):
+        self.request_id = request_id
+        self.stock_code = stock_code
+        self.order_type = order_type
+        self.volume = volume
+        self.price_type = price_type
+        self.price = price
+        self.strategy_name = strategy_name
+        self.remark = remark
+        self.allocations = allocations  # 轧差合并的委托参与的策略，[(策略备注, 数量)]
+        self.enqueue_time = time.perf_counter()
+        self.submit_time = None     # 调用order_stock_async的时间
+        self.ack_time = None        # 收到异步委托回报的时间
+        self.seq = None             # order_stock_async返回的异步请求序号
+        self.order_id = None        # 回报中的委托编号
+        self.status = 'queued'      # queued / submitted / acked / failed
+        self.error_msg = ''
+
+
+class OrderGateway:
+    """
+    委托网关
+    1. 策略线程只把委托放入队列，由后台线程按限速调用order_stock_async，行情回调不被下单阻塞
+    2. 记录异步请求序号，收到on_order_stock_async_response后按seq匹配，统计提交到回报的延迟
+    3. 委托价格由调用方传入（使用手上的行情），网关不再查询行情
+    xt_trader只需要实现order_stock_async，测试时可以替换为假的交易接口
+    """
+    def __init__(self, xt_trader, account, max_orders_per_second=5, latency_window=1000, tracker=None):
+        """
+        :param xt_trader: XtQuantTrader或接口相同的对象
+        :param account: StockAccount
+        :param max_orders_per_second: 每秒最多提交的委托数，<=0表示不限速
+        :param latency_window: 延迟统计保留的最近样本数
+        :param tracker: OrderTracker，提交和回报时同步更新委托生命周期，可为None
+        """
+        self.xt_trader = xt_trader
+        self.account = account
+        self.tracker = tracker
+        self.min_interval = 1.0 / max_orders_per_second if max_orders_per_second > 0 else 0
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.request_count = 0
+        self.seq2request = {}                           # 已提交、未收到回报的请求
+        self.early_seq2response = {}                    # 先于seq登记到达的回报：seq -> (回报, 到达时间)
+        self.order_id2request = {}                      # 委托编号 -> 请求，用于匹配委托错误回调，委托到达终态后删除
+        self.latencies = deque(maxlen=latency_window)   # 提交到回报的延迟，单位秒
+        self.queue_waits = deque(maxlen=latency_window) # 入队到提交的等待时间，单位秒
+        self.submitted_count = 0
+        self.acked_count = 0
+        self.failed_count = 0
+        self._next_submit_time = 0.0
+        self._worker = None
+        self._running = False
+
+    def start(self):
+        """启动后台提交线程"""
+        if self._worker is not None:
+            return
+        self._running = True
+        self._worker = threading.Thread(target=self._run, name='OrderGateway', daemon=True)
+        self._worker.start()
+        logger.info(f"委托网关启动，最小提交间隔 {self.min_interval:.3f}s")
+
+    def stop(self, timeout=5):
+        """提交完队列中剩余的委托后停止"""
+        if self._worker is None:
+            return
+        self.queue.put(None)
+        self._worker.join(timeout)
+        self._worker = None
+        self._running = False
+        logger.info(f"委托网关停止: {self.get_metrics()}")
+
+    def submit(self, stock_code, order_type, volume, price_type, price, strategy_name, remark, allocations=None):
+        """
+        委托放入队列，立即返回
+        参数与order_stock_async一致（不含account）
+        :param allocations: 轧差合并的委托参与的策略，[(策略备注, 数量)]，只记入委托跟踪器，不发给柜台
+        :return: 网关请求编号
+        """
+        with self.lock:
+            self.request_count += 1
+            request_id = self.request_count
+        request = OrderRequest(request_id, stock_code, order_type, volume, price_type, price, strategy_name, remark,
+                               allocations)
+        self.queue.put(request)
+        return request_id
+
+    def wait_idle(self, timeout=5):
+        """等待队列中的委托全部提交，返回是否在超时前完成"""
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            if self.queue.unfinished_tasks == 0:
+                return True
+            time.sleep(0.005)
+        return False
+
+    def _run(self):
+        while self._running:
+            request = self.queue.get()
+            try:
+                if request is None:
+                    break
+                self._throttle()
+                self._submit(request)
+            finally:
+                self.queue.task_done()
+
+    def _throttle(self):
+        """按最小提交间隔限速"""
+        now = time.perf_counter()
+        if now < self._next_submit_time:
+            time.sleep(self._next_submit_time - now)
+            now = time.perf_counter()
+        self._next_submit_time = now + self.min_interval
+
+    def _submit(self, request):
+        request.submit_time = time.perf_counter()
+        self.queue_waits.append(request.submit_time - request.enqueue_time)
+        try:
+            seq = self.xt_trader.order_stock_async(self.account, request.stock_code, request.order_type, request.volume,
+                                                   request.price_type, request.price, request.strategy_name, request.remark)
+        except Exception as e:
+            logger.error(f"提交委托异常 {request.stock_code} {request.remark}: {e}", exc_info=True)
+            seq = -1
+        if self.tracker is not None:
+            self.tracker.on_submit(seq, request.stock_code, request.order_type, request.volume, request.price,
+                                   request.strategy_name, request.remark, request.allocations)
+        with self.lock:
+            self.submitted_count += 1
+            if seq is None or seq < 0:
+                request.status = 'failed'
+                self.failed_count += 1
+                logger.error(f"提交委托失败 {request.stock_code} {request.remark}, seq: {seq}")
+                return
+            request.seq = seq
+            request.status = 'submitted'
+            early = self.early_seq2response.pop(seq, None)
+            if early is None:
+                self.seq2request[seq] = request
+        # 回报可能先于seq登记到达，此时直接补记
+        if early is not None:
+            self._ack(request, *early)
+        logger.info(f"提交委托 {request.stock_code} 数量{request.volume} 价格{request.price} 备注{request.remark}, seq: {seq}, "
+                    f"排队 {(request.submit_time - request.enqueue_time) * 1000:.1f}ms")
+
+    def on_async_response(self, response):
+        """
+        on_order_stock_async_response回调中调用
+        :param response: XtOrderResponse，包含seq、order_id、error_msg
+        """
+        now = time.perf_counter()
+        with self.lock:
+            request = self.seq2request.pop(response.seq, None)
+            if request is None:
+                self.early_seq2response[response.seq] = (response, now)
+                return
+        self._ack(request, response, now)
+
+    def on_order_error(self, order_error):
+        """
+        on_order_error回调中调用，按委托编号标记失败
+        :param order_error: XtOrderError，包含order_id、error_msg
+        """
+        with self.lock:
+            request = self.order_id2request.pop(order_error.order_id, None)
+            if request is not None and request.status != 'failed':
+                request.status = 'failed'
+                request.error_msg = order_error.error_msg
+                self.failed_count += 1
+
+    def on_order_update(self, order_id):
+        """
+        on_stock_order、on_stock_trade回调中在委托跟踪器更新之后调用，
+        跟踪器中该委托已到达终态（已成、已撤、废单）时不会再有错误回调，删除匹配记录
+        :param order_id: 委托编号
+        """
+        if self.tracker is None:
+            return
+        record = self.tracker.get_by_order_id(order_id)
+        if record is not None and record.state in DONE_STATES:
+            with self.lock:
+                self.order_id2request.pop(order_id, None)
+
+    def _ack(self, request, response, ack_time):
+        with self.lock:
+            request.ack_time = ack_time
+            request.order_id = response.order_id
+            request.error_msg = getattr(response, 'error_msg', '')
+            self.latencies.append(ack_time - request.submit_time)
+            self.acked_count += 1
+            if request.error_msg:
+                request.status = 'failed'
+                self.failed_count += 1
+            else:
+                request.status = 'acked'
+                self.order_id2request[request.order_id] = request
+        if self.tracker is not None:
+            self.tracker.on_async_response(request.seq, request.order_id, request.error_msg)
+            # 终态推送可能先于回报到达，此时on_order_update没有可删除的匹配记录
+            if not request.error_msg:
+                self.on_order_update(request.order_id)
+        logger.info(f"委托回报 {request.stock_code} seq: {request.seq}, order_id: {request.order_id}, "
+                    f"延迟 {(ack_time - request.submit_time) * 1000:.1f}ms {request.error_msg}")
+
+    def get_metrics(self):
+        """
+        :return: dict，提交/回报/失败数、排队数、未回报数，以及提交到回报延迟和排队等待的p50/p99/max（毫秒）
+        """
+        with self.lock:
+            latencies = np.array(self.latencies) * 1000
+            queue_waits = np.array(self.queue_waits) * 1000
+            metrics = {
+                'submitted': self.submitted_count,
+                'acked': self.acked_count,
+                'failed': self.failed_count,
+                'queued': self.queue.qsize(),
+                'pending_ack': len(self.seq2request),
+            }
+        for name, values in (('ack_latency', latencies), ('queue_wait', queue_waits)):
+            if len(values) > 0:
+                p50, p99 = np.percentile(values, [50, 99])
+                metrics[f'{name}_p50_ms'] = round(float(p50), 3)
+                metrics[f'{name}_p99_ms'] = round(float(p99), 3)
+                metrics[f'{name}_max_ms'] = round(float(values.max()), 3)
+        return metrics
@@ -0,0 +1,281 @@
+import os
+import json
+import time
+import threading
+from datetime import datetime
+from logger import logger
+
+REPORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs')
+
+# xtconstant中的委托状态 -> 跟踪器状态
+XT_STATUS2STATE = {
+    48: 'acked',        # ORDER_UNREPORTED 未报
+    49: 'acked',        # ORDER_WAIT_REPORTING 待报
+    50: 'reported',     # ORDER_REPORTED 已报
+    51: 'reported',     # ORDER_REPORTED_CANCEL 已报待撤
+    52: 'partial',      # ORDER_PARTSUCC_CANCEL 部成待撤
+    53: 'cancelled',    # ORDER_PART_CANCEL 部撤
+    54: 'cancelled',    # ORDER_CANCELED 已撤
+    55: 'partial',      # ORDER_PART_SUCC 部成
+    56: 'filled',       # ORDER_SUCCEEDED 已成
+    57: 'rejected',     # ORDER_JUNK 废单
+}
+# xtconstant中的买卖方向
+XT_ORDER_TYPE2SIDE = {23: 'buy', 24: 'sell'}
+
+# 终态，不再变化
+DONE_STATES = ('filled', 'cancelled', 'rejected', 'failed')
+# 仍可能成交的状态
+ACTIVE_STATES = ('submitted', 'acked', 'reported', 'partial')
+
+
+class OrderRecord:
+    """一笔委托的生命周期记录，时间均为时间戳（秒）"""
+    __slots__ = ('seq', 'order_id', 'stock_code', 'side', 'volume', 'price', 'strategy', 'remark', 'allocations',
+                 'state', 'filled_volume', 'filled_amount', 'error_msg',
+                 'submit_time', 'ack_time', 'first_fill_time', 'done_time')
+
+    def __init__(self, stock_code, side, volume, price, strategy, remark, seq=None, order_id=None, allocations=None):
+        self.seq = seq
+        self.order_id = order_id
+        self.stock_code = stock_code
+        self.side = side
+        self.volume = volume
+        self.price = price
+        self.strategy = strategy
+        self.remark = remark
+        # 轧差合并的委托：[(策略备注, 数量)]，参与的每个策略；普通委托只有strategy一个策略
+        self.allocations = allocations or [(strategy, volume)]
+        self.state = 'submitted'
+        self.filled_volume = 0
+        self.filled_amount = 0.0
+        self.error_msg = ''
+        self.submit_time = None
+        self.ack_time = None
+        self.first_fill_time = None
+        self.done_time = None
+
+    @property
+    def filled_price(self):
+        return self.filled_amount / self.filled_volume if self.filled_volume > 0 else 0.0
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class OrderTracker:
+    """
+    委托生命周期跟踪
+    由委托网关（提交、异步回报）和交易回调（委托状态、成交、错误）驱动的状态机：
+    submitted -> acked -> reported -> partial -> filled / cancelled / rejected，提交失败为failed
+    按seq、order_id、(股票代码, 策略)建立索引，风控和策略可以O(1)查询，不用等账户30秒一次的同步；
+    轧差合并的委托在参与的每个策略下都建索引
+    回调来自交易线程，所有读写都加锁
+    只记录当天的委托，跨日时清空
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        """清空委托记录和索引"""
+        self.records = []               # 全部委托，按提交/首次出现顺序
+        self.seq2record = {}
+        self.order_id2record = {}
+        self.key2records = {}           # (股票代码, 策略) -> [OrderRecord]
+        self.records_date = datetime.now().strftime('%Y%m%d')
+
+    def _check_date(self):
+        """跨日时清空前一天的委托记录，调用方需持有锁"""
+        today = datetime.now().strftime('%Y%m%d')
+        if self.records_date != today:
+            if self.records:
+                logger.info(f"委托跟踪跨日，清空{self.records_date}的委托记录 {len(self.records)} 条")
+            self.clear()
+
+    def _add(self, record):
+        self.records.append(record)
+        if record.seq is not None:
+            self.seq2record[record.seq] = record
+        if record.order_id is not None:
+            self.order_id2record[record.order_id] = record
+        for strategy in dict.fromkeys(strategy for strategy, _ in record.allocations):
+            self.key2records.setdefault((record.stock_code, strategy), []).append(record)
+
+    def _remove(self, record):
+        self.records.remove(record)
+        if record.seq is not None and self.seq2record.get(record.seq) is record:
+            del self.seq2record[record.seq]
+        if record.order_id is not None and self.order_id2record.get(record.order_id) is record:
+            del self.order_id2record[record.order_id]
+        for strategy in dict.fromkeys(strategy for strategy, _ in record.allocations):
+            key = (record.stock_code, strategy)
+            records = [r for r in self.key2records.get(key, []) if r is not record]
+            if records:
+                self.key2records[key] = records
+            else:
+                self.key2records.pop(key, None)
+
+    def _merge(self, early, record):
+        """
+        委托状态、成交推送先于异步回报到达时，_get_or_create按order_id新建了一条记录，
+        收到异步回报后把这条记录的成交和状态并入按seq提交的记录，再删除
+        """
+        record.filled_volume += early.filled_volume
+        record.filled_amount += early.filled_amount
+        if early.first_fill_time is not None and (record.first_fill_time is None
+                                                  or early.first_fill_time < record.first_fill_time):
+            record.first_fill_time = early.first_fill_time
+        if early.error_msg and not record.error_msg:
+            record.error_msg = early.error_msg
+        if record.state not in DONE_STATES:
+            record.state = early.state
+            record.done_time = early.done_time
+        self._remove(early)
+
+    def _set_state(self, record, state, now):
+        if record.state in DONE_STATES:
+            return
+        record.state = state
+        if state in DONE_STATES:
+            record.done_time = now
+
+    def _get_or_create(self, order_id, stock_code, order_type, volume, price, strategy, remark):
+        """按order_id查找，不存在时（如手工下单、本进程重启前的委托）新建记录"""
+        self._check_date()
+        record = self.order_id2record.get(order_id)
+        if record is None:
+            record = OrderRecord(stock_code, XT_ORDER_TYPE2SIDE.get(order_type, str(order_type)), volume, price,
+                                 strategy, remark, order_id=order_id)
+            record.state = 'reported'
+            self._add(record)
+        return record
+
+    def on_submit(self, seq, stock_code, order_type, volume, price, strategy, remark, allocations=None):
+        """
+        委托已调用order_stock_async，由委托网关调用
+        :param seq: 异步请求序号，提交失败时为None或负数
+        :param allocations: 轧差合并的委托参与的策略，[(策略备注, 数量)]
+        """
+        now = time.time()
+        record = OrderRecord(stock_code, XT_ORDER_TYPE2SIDE.get(order_type, str(order_type)), volume, price,
+                             strategy, remark, seq=seq if seq is not None and seq >= 0 else None,
+                             allocations=allocations)
+        record.submit_time = now
+        with self.lock:
+            self._check_date()
+            if record.seq is None:
+                self._set_state(record, 'failed', now)
+            self._add(record)
+        return record
+
+    def on_async_response(self, seq, order_id, error_msg=''):
+        """收到异步委托回报，由委托网关在seq匹配后调用"""
+        now = time.time()
+        with self.lock:
+            record = self.seq2record.get(seq)
+            if record is None:
+                return
+            record.ack_time = now
+            record.order_id = order_id
+            early = self.order_id2record.get(order_id)
+            if early is not None and early is not record:
+                self._merge(early, record)
+            self.order_id2record[order_id] = record
+            if error_msg:
+                record.error_msg = error_msg
+                self._set_state(record, 'rejected', now)
+            elif record.state == 'submitted':
+                record.state = 'acked'
+
+    def on_stock_order(self, order):
+        """
+        委托状态推送
+        :param order: XtOrder，包含order_id、stock_code、order_type、order_status等
+        """
+        now = time.time()
+        with self.lock:
+            record = self._get_or_create(order.order_id, order.stock_code, order.order_type, order.order_volume,
+                                         order.price, order.strategy_name, order.order_remark)
+            state = XT_STATUS2STATE.get(order.order_status)
+            if state is not None:
+                self._set_state(record, state, now)
+            if order.status_msg and state == 'rejected':
+                record.error_msg = order.status_msg
+
+    def on_stock_trade(self, trade):
+        """
+        成交推送，可能先于委托状态推送到达
+        :param trade: XtTrade，包含order_id、traded_volume、traded_price等
+        """
+        now = time.time()
+        with self.lock:
+            record = self._get_or_create(trade.order_id, trade.stock_code, trade.order_type, trade.traded_volume,
+                                         trade.traded_price, trade.strategy_name, trade.order_remark)
+            if record.first_fill_time is None:
+                record.first_fill_time = now
+            record.filled_volume += trade.traded_volume
+            record.filled_amount += trade.traded_volume * trade.traded_price
+            self._set_state(record, 'filled' if record.filled_volume >= record.volume else 'partial', now)
+
+    def on_order_error(self, order_error):
+        """
+        委托失败推送
+        :param order_error: XtOrderError，包含order_id、error_msg
+        """
+        now = time.time()
+        with self.lock:
+            record = self.order_id2record.get(order_error.order_id)
+            if record is None:
+                return
+            record.error_msg = order_error.error_msg
+            self._set_state(record, 'rejected', now)
+
+    def get_by_seq(self, seq):
+        return self.seq2record.get(seq)
+
+    def get_by_order_id(self, order_id):
+        return self.order_id2record.get(order_id)
+
+    def get_orders(self, stock_code, strategy):
+        """:return: 该股票该策略今天的全部委托记录"""
+        with self.lock:
+            self._check_date()
+        return self.key2records.get((stock_code, strategy), [])
+
+    def has_order(self, stock_code, strategy, side, states=ACTIVE_STATES + ('filled',)):
+        """是否存在指定股票、策略、方向且状态在states中的委托"""
+        return any(record.side == side and record.state in states for record in self.get_orders(stock_code, strategy))
+
+    def summary(self):
+        """:return: {状态: 委托数}"""
+        with self.lock:
+            state2count = {}
+            for record in self.records:
+                state2count[record.state] = state2count.get(record.state, 0) + 1
+        return state2count
+
+    def snapshot(self):
+        """:return: 全部委托记录的字典列表，用于日报"""
+        with self.lock:
+            return [record.to_dict() for record in self.records]
+
+    def dump(self, report_dir=REPORT_DIR):
+        """
+        委托记录写到logs/orders_YYYYMMDD.json
+        :return: 文件路径，没有委托时返回None
+        """
+        records = self.snapshot()
+        if not records:
+            return None
+        if not os.path.exists(report_dir):
+            os.makedirs(report_dir)
+        path = os.path.join(report_dir, f"orders_{datetime.now().strftime('%Y%m%d')}.json")
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(records, f, ensure_ascii=False)
+        except Exception as e:
+            logger.error(f"保存委托记录失败: {e}", exc_info=True)
+            return None
+        logger.info(f"保存委托记录 {len(records)} 条: {path}")
+        return path
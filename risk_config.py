@@ -7,4 +7,11 @@ try:
     PositionLevel = float(os.getenv("PositionLevel", "0.5"))  # 提供默认值 0.5
 except (TypeError, ValueError):
     print("警告：PositionLevel 环境变量不是有效的数字，使用默认值 0.5")
-    PositionLevel = 0.5
\ No newline at end of file
+    PositionLevel = 0.5
+
+# 单个策略当日买入金额上限（元），风控按通过的买入信号金额累计，不等成交
+try:
+    MaxStrategyBuyValue = float(os.getenv("MaxStrategyBuyValue", "200000"))
+except (TypeError, ValueError):
+    print("警告：MaxStrategyBuyValue 环境变量不是有效的数字，使用默认值 200000")
+    MaxStrategyBuyValue = 200000.0
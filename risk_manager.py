@@ -1,6 +1,8 @@
 from datetime import datetime
+import numpy as np
 from logger import logger
-from risk_config import PositionLevel
+from metrics import metrics
+from risk_config import PositionLevel, MaxStrategyBuyValue
 
 class RiskManager:
     """
@@ -16,7 +18,19 @@ class RiskManager:
         self.min_position_value = 0               
         self.soft_max_position_value = 24000          
         self.soft_min_position_value = 8000          
-        self.single_buy_value = 8000         
+        self.single_buy_value = 8000
+
+        # 单个策略当日买入金额上限，按风控通过的信号金额累计（不等成交），见risk_config
+        self.max_strategy_value = MaxStrategyBuyValue
+
+        # 风控内部维护的状态，不修改股票对象
+        self.code2last_buy_time = {}        # 股票代码 -> 最后买入时间戳
+        self.code2last_sell_time = {}       # 股票代码 -> 最后卖出时间戳
+        self.strategy2buy_value = {}        # 策略备注 -> 当日已通过的买入金额
+        self.state_date = None
+
+        # 实盘委托跟踪器（OrderTracker），可以在账户同步之前看到刚提交的委托，模拟交易时为None
+        self.order_tracker = None
     
         logger.info("初始化风险管理器")
 
@@ -51,82 +65,153 @@ class RiskManager:
  
         return available_cash
 
-    def check_today_deal(self, account, stock, remark, trade_type):
+    def review_signals(self, signals, account):
         """
-        检查股票在当天是否已经进行过交易
+        对所有策略本次产生的信号整批做风险评估，在跨策略轧差之前逐个信号检查，只有通过的信号参与轧差：
+        1. 买入：价格有效、买入冷却、当日重复委托（含批内同一策略重复）、个股持仓硬上限、单策略当日买入额度、可用资金
+           软上限只是策略的买入档位（如Strategy1001的第3档），风控不拦截
+        2. 卖出：有可用持仓
+        个股/冷却等检查用数组运算一次算完，额度和资金按信号顺序分配，某个信号超出额度时拒绝该信号，后面的信号继续分配
+        不同策略对同一股票的买入都可以通过，由SignalNetter合并为一笔委托
+        :param signals: list of (stock, 交易类型, 交易数量, 备注)
         :param account: 账户对象
-        :param stock: 股票对象
-        :param remark: 交易备注
-        :param trade_type: 交易类型
-        :return: bool, 如果当天已经有相同备注的交易则返回True，否则返回False
+        :return: (通过的信号列表, [(被拒绝的信号, 拒绝原因)])
         """
-        # 获取当前日期
-        today = datetime.now().strftime('%Y%m%d')
-        
-        # 获取账户的交易记录
-        orders = account.get_orders()
-        
-        # 检查是否有当天的相同股票、相同备注的交易记录
-        for order in orders:
-            # 实盘运行时候，这里获得到交易记录都是今天的
-            #将日期的判断删除，如果是回测，需要注意
-            if (order['stock_code'] == stock.code):
-                logger.info(f" {stock.code} ,{remark}, {trade_type} check {order}")
-                if order.get("strategy", "") == remark  and order.get("status","") in ["done","waiting"] and order.get("order_type","") == trade_type:
-                    logger.warning(f"股票 {stock.code} {remark}今日已委托 ，不允许再次买入")
-                    return True
+        if not signals:
+            return [], []
+        now = int(datetime.now().timestamp())
+        self._reset_daily_state()
+
+        n = len(signals)
+        codes = [stock.code for stock, _, _, _ in signals]
+        remarks = [remark for _, _, _, remark in signals]
+        is_buy = np.fromiter((trade_type == 'buy' for _, trade_type, _, _ in signals), dtype=bool, count=n)
+        is_sell = np.fromiter((trade_type == 'sell' for _, trade_type, _, _ in signals), dtype=bool, count=n)
+        prices = np.fromiter((stock.current_price for stock, _, _, _ in signals), dtype=np.float64, count=n)
+        amounts = np.fromiter((amount for _, _, amount, _ in signals), dtype=np.float64, count=n)
+        held_volumes = np.fromiter((stock.current_position for stock, _, _, _ in signals), dtype=np.float64, count=n)
+        free_volumes = np.fromiter((stock.free_position for stock, _, _, _ in signals), dtype=np.float64, count=n)
+        last_buy_times = np.fromiter((self.code2last_buy_time.get(code, 0) for code in codes), dtype=np.int64, count=n)
+        required_cash = amounts * prices
+        held_values = held_volumes * prices
+
+        passed = np.ones(n, dtype=bool)
+        reasons = np.full(n, None, dtype=object)
+
+        def reject(mask, reason):
+            # 只标记还未被拒绝的信号，保留优先级更高的原因
+            hit = mask & passed
+            reasons[hit] = reason
+            passed[hit] = False
+
+        # 不认识的交易类型直接拒绝
+        reject(~(is_buy | is_sell), "未知的交易类型")
+
+        # 卖出检查
+        reject(is_sell & (free_volumes <= 0), "没有可用持仓")
+
+        # 买入检查，按优先级依次标记，已被拒绝的信号不再覆盖原因
+        available_cash = self.check_account_limits(account) if is_buy.any() else 0
+        if available_cash <= 0:
+            reject(is_buy, "总仓位超限或没有可用资金，只允许卖出")
+        reject(is_buy & (prices <= 0), "价格无效")
+        reject(is_buy & (now - last_buy_times < self.buy_interval), f"距上次买入不足{self.buy_interval}秒")
+        duplicate = np.zeros(n, dtype=bool)
+        for i in np.flatnonzero(is_buy & passed):
+            duplicate[i] = self._has_today_order(account, codes[i], remarks[i], 'buy')
+        reject(duplicate, "今日已有相同策略的委托")
+        # 同一批内同一策略对同一股票只允许第一个买入信号，相当于批内的买入冷却
+        candidate = np.flatnonzero(is_buy & passed)
+        if len(candidate) > 0:
+            keys = np.array([f"{codes[i]}|{remarks[i]}" for i in candidate], dtype=object)
+            _, first = np.unique(keys, return_index=True)
+            batch_duplicate = np.zeros(n, dtype=bool)
+            batch_duplicate[candidate] = True
+            batch_duplicate[candidate[first]] = False
+            reject(batch_duplicate, "同一批次重复买入")
+        # 与策略买入档位的判断一致：持仓市值未到上限时允许再买一笔
+        reject(is_buy & (held_values >= self.max_position_value), f"持仓市值已达上限{self.max_position_value}")
+
+        # 按信号顺序分配单策略额度和可用资金
+        candidate = np.flatnonzero(is_buy & passed)
+        self._allocate_budget(candidate, required_cash, remarks, available_cash, passed, reasons)
+
+        approved = []
+        rejected = []
+        for i, signal in enumerate(signals):
+            if passed[i]:
+                approved.append(signal)
+                if is_buy[i]:
+                    self.code2last_buy_time[codes[i]] = now
+                    self.strategy2buy_value[remarks[i]] = self.strategy2buy_value.get(remarks[i], 0) + required_cash[i]
                 else:
-                    logger.warning(f"股票 {stock.code} 今日已成交 ，但remark不匹配，请检查{remark}, trade_info:{order}")
-                
-        return False
-    
+                    self.code2last_sell_time[codes[i]] = now
+            else:
+                rejected.append((signal, reasons[i]))
+        return approved, rejected
+
+    def _allocate_budget(self, candidate, required_cash, remarks, available_cash, passed, reasons):
+        """
+        按信号顺序分配单策略当日买入额度和账户可用资金
+        对剩余信号求累计需求，第一个超出额度的信号被拒绝，它之前的信号全部通过，再对它之后的信号继续分配
+        :param candidate: 待分配的信号下标，按信号顺序
+        :param required_cash: 每个信号需要的资金
+        :param remarks: 每个信号的策略备注
+        :param available_cash: 可用资金
+        :param passed: 信号是否通过的数组，原地修改
+        :param reasons: 拒绝原因数组，原地修改
+        """
+        strategy2left = {remark: self.max_strategy_value - self.strategy2buy_value.get(remark, 0)
+                         for remark in {remarks[i] for i in candidate}}
+        while len(candidate) > 0:
+            required = required_cash[candidate]
+            over_cash = np.cumsum(required) > available_cash
+            over_strategy = np.zeros(len(candidate), dtype=bool)
+            candidate_remarks = np.array([remarks[i] for i in candidate], dtype=object)
+            for remark, left in strategy2left.items():
+                in_strategy = candidate_remarks == remark
+                over_strategy[in_strategy] = np.cumsum(required[in_strategy]) > left
+            over = np.flatnonzero(over_cash | over_strategy)
+            stop = over[0] if len(over) > 0 else len(candidate)
+            # stop之前的信号通过，扣减额度
+            available_cash -= required[:stop].sum()
+            for i in candidate[:stop]:
+                strategy2left[remarks[i]] -= required_cash[i]
+            if stop == len(candidate):
+                break
+            i = candidate[stop]
+            passed[i] = False
+            if over_strategy[stop]:
+                reasons[i] = f"策略 {remarks[i]} 当日买入额度不足，剩余 {strategy2left[remarks[i]]:.2f}"
+            else:
+                reasons[i] = f"可用资金不足，需要 {required_cash[i]:.2f}，剩余 {available_cash:.2f}"
+            candidate = candidate[stop + 1:]
+
+    def _has_today_order(self, account, code, remark, trade_type):
+        """账户委托索引或委托跟踪器中是否已有当天相同的委托"""
+        if account.has_order(code, remark, trade_type):
+            return True
+        return self.order_tracker is not None and self.order_tracker.has_order(code, remark, trade_type)
+
+    def _reset_daily_state(self):
+        """跨日时清空单策略当日买入额度"""
+        today = datetime.now().strftime('%Y%m%d')
+        if self.state_date != today:
+            self.state_date = today
+            self.strategy2buy_value = {}
+
+    @metrics.timed('risk.evaluate_signals')
     def evaluate_signals(self, signals, account):
         """
-        评估交易信号的风险
-        :param signals: list of  (stock,  交易类型, 交易数量)
-        :return: list of (股票stock, 交易类型, 交易数量), 经过风险评估后的交易信号
+        评估交易信号的风险，在跨策略轧差之前调用
+        :param signals: list of  (stock,  交易类型, 交易数量, 备注)
+        :return: list of (股票stock, 交易类型, 交易数量, 备注), 经过风险评估后的交易信号
         """
-        reviewed_signals = []
-        
-        # 检查账户限制，获取可用资金
-        available_cash = self.check_account_limits(account)
-        only_sell_mode = (available_cash <= 0)
-        
-        current_time = int(datetime.now().timestamp())
-        
-        for stock, trade_type, amount, remark in signals:
-            # 如果通过风险评估，则添加到reviewed_signals并更新交易时间
-            # 更新股票的最后交易时间
-            if trade_type == 'buy' and not only_sell_mode:
-                # 计算此次交易需要的资金
-                if stock.current_price <= 0:
-                    logger.warning(f"股票 {stock.code} 价格为 {stock.current_price:.2f}，不允许买入")
-                    continue
-                required_cash = amount * stock.current_price
-                
-                # 检查资金是否足够
-                if required_cash > available_cash:
-                    logger.warning(f"股票 {stock.code} 买入需要资金 {required_cash:.2f}，超过可用资金 {available_cash:.2f}，不允许买入")
-                    continue
-                
-                if current_time - stock.last_buy_time < self.buy_interval:
-                    logger.warning(f"股票 {stock.code} 最近一次买入时间 {datetime.fromtimestamp(stock.last_buy_time)} 与当前时间 {datetime.fromtimestamp(current_time)} 间隔不足60秒，不允许再次买入")
-                    continue
-                if self.check_today_deal(account, stock, remark, trade_type):
-                    logger.warning(f"股票 {stock.code} 今日已成交 ，不允许再次买入")
-                    continue
-                
-                # 更新可用资金
-                available_cash -= required_cash
-                
-                stock.last_buy_time = current_time
-                reviewed_signals.append((stock, trade_type, amount, remark))
-                #logger.info(f"更新股票 {stock.code} 最后买入时间: {datetime.fromtimestamp(current_time)}")
-            elif trade_type == 'sell':
-                if stock.free_position <= 0:
-                    logger.warning(f"股票 {stock.code} 没有持仓，不允许卖出")
-                    continue
-                stock.last_sell_time = current_time
-                reviewed_signals.append((stock, trade_type, amount, remark))
-                #logger.info(f"更新股票 {stock.code} 最后卖出时间: {datetime.fromtimestamp(current_time)}")
-        return reviewed_signals
\ No newline at end of file
+        approved, rejected = self.review_signals(signals, account)
+        metrics.incr('risk.approved', len(approved))
+        metrics.incr('risk.rejected', len(rejected))
+        for (stock, trade_type, amount, remark), reason in rejected:
+            logger.warning(f"风控拒绝 {remark} {trade_type} {stock.code} {amount}: {reason}")
+        if signals:
+            logger.info(f"风险评估: 信号 {len(signals)} 个，通过 {len(approved)} 个，拒绝 {len(rejected)} 个")
+        return approved
@@ -0,0 +1,166 @@
+import os
+import sys
+import time
+import inspect
+import threading
+from datetime import datetime
+from logger import logger
+
+PROFILE_FLAG = '--profile'
+REPORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs', 'profile')
+
+
+class SamplingProfiler:
+    """
+    采样分析
+    1. 后台线程每interval秒读取一次被观察线程（行情回调线程、回测主线程）的调用栈，被观察线程本身不做任何计时
+    2. 调用栈按标签聚合：栈中有已登记的策略函数（trigger、back_test）时标签为策略，如strategy1001，否则为other
+    3. 按墙钟时间对齐的窗口（默认5分钟）输出collapsed stack文件，每行 "标签;外层函数;...;内层函数 样本数"，
+       可直接用flamegraph.pl / speedscope查看，开盘和午间的窗口分别成文件，不用重启即可对比
+    没有开启时所有接口都是空操作
+    """
+    def __init__(self, enabled=False, name='main', interval=0.01, window_seconds=300, report_dir=REPORT_DIR):
+        """
+        :param enabled: 是否开启
+        :param name: 程序名称，用于报告文件名
+        :param interval: 采样间隔（秒）
+        :param window_seconds: 输出窗口长度（秒）
+        :param report_dir: 输出目录
+        """
+        self.enabled = enabled
+        self.name = name
+        self.interval = interval
+        self.window_seconds = window_seconds
+        self.report_dir = report_dir
+        self.thread_ids = set()         # 被观察的线程
+        self.code2tag = {}              # 策略函数的code对象 -> 标签
+        self.code2label = {}            # code对象 -> 栈帧名称，缓存避免每次采样重新格式化
+        self.stack2count = {}           # 本窗口：(标签, 栈帧名称...) -> 样本数
+        self.sample_count = 0           # 本窗口采样次数（含被观察线程空闲的次数）
+        self.sample_time = 0.0          # 本窗口采样线程自身耗时（秒）
+        self.window_start = None
+        self.report_files = []
+        self._stop_event = threading.Event()
+        self._sampler = None
+
+    @classmethod
+    def from_argv(cls, argv, name='main', **kwargs):
+        """根据命令行参数决定是否开启"""
+        return cls(PROFILE_FLAG in argv, name, **kwargs)
+
+    def watch_current_thread(self):
+        """把当前线程加入采样，行情回调中每次调用，已加入时只是一次集合查找"""
+        if self.enabled:
+            self.thread_ids.add(threading.get_ident())
+
+    def tag_function(self, func, tag):
+        """登记函数，调用栈中出现它时样本记为tag；装饰过的函数按原函数登记"""
+        if not self.enabled or func is None:
+            return
+        self.code2tag[inspect.unwrap(func).__code__] = tag
+
+    def tag_strategy(self, strategy, strategy_id):
+        """登记策略的trigger和back_test，样本标签为strategy<策略ID>"""
+        for name in ('trigger', 'back_test'):
+            self.tag_function(getattr(type(strategy), name, None), f"strategy{strategy_id}")
+
+    def start(self):
+        """启动采样线程，没有开启或已启动时直接返回"""
+        if not self.enabled or self._sampler is not None:
+            return
+        self.window_start = self._align(time.time())
+        self._stop_event.clear()
+        self._sampler = threading.Thread(target=self._run, name='SamplingProfiler', daemon=True)
+        self._sampler.start()
+        logger.info(f"采样分析启动，间隔 {self.interval * 1000:.0f}ms，窗口 {self.window_seconds}s，输出目录 {self.report_dir}")
+
+    def stop(self):
+        """停止采样并输出最后一个窗口"""
+        if self._sampler is None:
+            return
+        self._stop_event.set()
+        self._sampler.join(5)
+        self._sampler = None
+        self.flush()
+
+    def _align(self, timestamp):
+        """窗口按墙钟时间对齐，如09:30:00、09:35:00"""
+        return timestamp - timestamp % self.window_seconds
+
+    def _label(self, code):
+        label = f"{getattr(code, 'co_qualname', code.co_name)} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+        self.code2label[code] = label
+        return label
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                now = time.time()
+                if now >= self.window_start + self.window_seconds:
+                    self.flush()
+                    self.window_start = self._align(now)
+                self.sample()
+            except Exception as e:
+                logger.error(f"采样分析异常: {e}", exc_info=True)
+
+    def sample(self):
+        """采样一次被观察线程的调用栈"""
+        start = time.perf_counter()
+        frames = sys._current_frames()
+        code2tag, code2label, stack2count = self.code2tag, self.code2label, self.stack2count
+        for ident in tuple(self.thread_ids):
+            frame = frames.get(ident)
+            if frame is None:
+                continue
+            labels = []
+            tag = None
+            while frame is not None:
+                code = frame.f_code
+                label = code2label.get(code) or self._label(code)
+                labels.append(label)
+                # 从内向外找到的第一个策略函数为标签
+                if tag is None:
+                    tag = code2tag.get(code)
+                frame = frame.f_back
+            labels.append(tag or 'other')
+            key = tuple(reversed(labels))
+            stack2count[key] = stack2count.get(key, 0) + 1
+        self.sample_count += 1
+        self.sample_time += time.perf_counter() - start
+
+    def format_collapsed(self, stack2count):
+        """:return: collapsed stack文本，按样本数降序"""
+        ranked = sorted(stack2count.items(), key=lambda item: item[1], reverse=True)
+        return "\n".join(f"{';'.join(stack)} {count}" for stack, count in ranked)
+
+    def flush(self):
+        """
+        本窗口写到 <report_dir>/<name>_YYYYMMDD_HHMMSS.collapsed（窗口开始时间），并开始新的窗口
+        :return: 文件路径，没有样本时返回None
+        """
+        stack2count, self.stack2count = self.stack2count, {}
+        sample_count, sample_time = self.sample_count, self.sample_time
+        self.sample_count, self.sample_time = 0, 0.0
+        if not stack2count:
+            return None
+        if not os.path.exists(self.report_dir):
+            os.makedirs(self.report_dir)
+        window_start = datetime.fromtimestamp(self.window_start or time.time())
+        path = os.path.join(self.report_dir, f"{self.name}_{window_start.strftime('%Y%m%d_%H%M%S')}.collapsed")
+        try:
+            # 同一窗口内重启或多次输出时追加，flamegraph.pl会合并相同的栈
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(self.format_collapsed(stack2count) + "\n")
+        except Exception as e:
+            logger.error(f"保存采样结果失败: {e}", exc_info=True)
+            return None
+        self.report_files.append(path)
+
+        tag2count = {}
+        for stack, count in stack2count.items():
+            tag2count[stack[0]] = tag2count.get(stack[0], 0) + count
+        busy = sum(tag2count.values())
+        logger.info(f"采样分析 {window_start.strftime('%H:%M:%S')} 窗口: 采样 {sample_count} 次，有效样本 {busy}，"
+                    f"按标签 {dict(sorted(tag2count.items(), key=lambda item: -item[1]))}，"
+                    f"采样自身耗时 {sample_time * 1000:.0f}ms，输出 {path}")
+        return path
@@ -0,0 +1,89 @@
+from logger import logger, trader_logger
+
+
+class SignalNetter:
+    """
+    跨策略信号轧差
+    同一次行情推送中，多个策略对同一只股票的信号合并为一笔委托：
+    买入和卖出数量相互抵消，只按净数量下一笔单，完全抵消则不下单
+    输入应是已通过风控的信号（查重、冷却、资金、可用持仓都按单个信号检查），被拒绝的买入不会冲掉有效的卖出
+    卖出数量先按可用持仓截断，没有可用持仓的卖出不参与抵消，避免无效卖单冲掉有效买单
+    合并后委托的备注为净方向上第一个策略的备注（真实的策略标识，账户和委托跟踪按它建索引），
+    净方向上参与的全部策略及各自数量记在code2contributors中，数量按比例缩放到合计等于净数量，
+    随委托传给交易接口（委托跟踪器按每个策略建索引）和账户，原始信号写入交易日志
+    """
+    def __init__(self):
+        self.signal_count = 0           # 累计输入的信号数
+        self.order_count = 0            # 累计轧差后输出的委托数
+        self.code2allocations = {}      # 最近一次推送：股票代码 -> [(备注, 交易类型, 数量)]，全部原始信号
+        self.code2contributors = {}     # 最近一次推送：股票代码 -> [(备注, 数量)]，净方向上参与的策略
+
+    def net(self, signals):
+        """
+        对一次推送中通过风控的信号做轧差
+        :param signals: list of (stock, 交易类型, 交易数量, 备注)
+        :return: list of (stock, 交易类型, 交易数量, 备注)，每只股票最多一个信号，保持股票首次出现的顺序；
+                 备注为净方向上第一个策略，参与的策略见code2contributors
+        """
+        code2stock = {}
+        code2allocations = {}
+        code2contributors = {}
+        for stock, trade_type, amount, remark in signals:
+            code2stock.setdefault(stock.code, stock)
+            code2allocations.setdefault(stock.code, []).append((remark, trade_type, amount))
+
+        netted = []
+        for code, allocations in code2allocations.items():
+            stock = code2stock[code]
+            if len(allocations) == 1:
+                remark, trade_type, amount = allocations[0]
+                netted.append((stock, trade_type, amount, remark))
+                code2contributors[code] = [(remark, amount)]
+                continue
+
+            buy_amount = sum(amount for _, trade_type, amount in allocations if trade_type == 'buy')
+            sell_amount = sum(amount for _, trade_type, amount in allocations if trade_type == 'sell')
+            sell_amount = min(sell_amount, max(stock.free_position, 0))
+            net_amount = buy_amount - sell_amount
+            if net_amount > 0:
+                trade_type = 'buy'
+            elif net_amount < 0:
+                trade_type = 'sell'
+            else:
+                trader_logger.info(f"信号轧差 {code}: {allocations} 完全抵消，不下单")
+                continue
+            # 同一策略对同一股票的多个信号合并数量
+            remark2amount = {}
+            for remark, side, amount in allocations:
+                if side == trade_type:
+                    remark2amount[remark] = remark2amount.get(remark, 0) + amount
+            contributors = self._scale(list(remark2amount.items()), abs(net_amount))
+            netted.append((stock, trade_type, abs(net_amount), contributors[0][0]))
+            code2contributors[code] = contributors
+            trader_logger.info(f"信号轧差 {code}: {allocations} -> {trade_type} {abs(net_amount)} {contributors}")
+
+        self.code2allocations = code2allocations
+        self.code2contributors = code2contributors
+        self.signal_count += len(signals)
+        self.order_count += len(netted)
+        if len(netted) < len(signals):
+            logger.info(f"信号轧差: {len(signals)} 个信号合并为 {len(netted)} 笔委托，"
+                        f"累计 {self.signal_count} -> {self.order_count}")
+        return netted
+
+    @staticmethod
+    def _scale(contributors, net_amount):
+        """
+        净方向上各策略的数量按比例缩放，合计等于净数量，余数按最大余数法分配，保持策略顺序
+        :param contributors: [(备注, 数量)]
+        :param net_amount: 净数量
+        :return: [(备注, 数量)]，去掉缩放后为0的策略
+        """
+        total = sum(amount for _, amount in contributors)
+        if total == net_amount:
+            return contributors
+        scaled = [net_amount * amount // total for _, amount in contributors]
+        remainders = [net_amount * amount % total for _, amount in contributors]
+        for i in sorted(range(len(contributors)), key=lambda i: -remainders[i])[:net_amount - sum(scaled)]:
+            scaled[i] += 1
+        return [(remark, amount) for (remark, _), amount in zip(contributors, scaled) if amount > 0]
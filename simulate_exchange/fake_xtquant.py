@@ -0,0 +1,638 @@
+"""
+本地的xtquant替身，用于在没有QMT终端的机器（Linux）上跑通实盘路径，做集成测试和压测
+install()把假的xtquant、xtquant.xtdata、xtquant.xttrader、xtquant.xttype、xtquant.xtconstant放进sys.modules，
+之后项目代码里的 from xtquant import xtdata / LazyModule('xtquant.xtdata') 拿到的都是这里的实现
+行情来自录制的tick文件或合成行情生成器（market_generator），按设定的速率推送，数据查询和委托回报都可以设置延迟
+
+压测main.main：
+    python -m simulate_exchange.fake_xtquant --tps 5000 --duration 60
+"""
+import sys
+import json
+import time
+import zlib
+import queue
+import types
+import argparse
+import threading
+import _thread
+import numpy as np
+from .sim_logger import logger
+from .market_generator import MarketGenerator, _base_price
+
+# xtconstant中用到的常量
+XT_CONSTANTS = {
+    'STOCK_BUY': 23,
+    'STOCK_SELL': 24,
+    'FIX_PRICE': 11,
+    'LATEST_PRICE': 5,
+    'DIRECTION_FLAG_BUY': 48,
+    'DIRECTION_FLAG_SELL': 49,
+    'ORDER_UNREPORTED': 48,
+    'ORDER_WAIT_REPORTING': 49,
+    'ORDER_REPORTED': 50,
+    'ORDER_REPORTED_CANCEL': 51,
+    'ORDER_PARTSUCC_CANCEL': 52,
+    'ORDER_PART_CANCEL': 53,
+    'ORDER_CANCELED': 54,
+    'ORDER_PART_SUCC': 55,
+    'ORDER_SUCCEEDED': 56,
+    'ORDER_JUNK': 57,
+}
+
+# xtdata模块对外提供的接口
+XTDATA_API = ('subscribe_whole_quote', 'subscribe_quote', 'unsubscribe_quote', 'get_full_tick',
+              'get_market_data', 'get_market_data_ex', 'get_local_data', 'download_history_data',
+              'get_trading_calendar')
+
+DEPTH_LEVELS = 5
+PRICE_TICK = 0.01
+
+
+def _minute_labels():
+    """每天240根分钟线的HHMMSS标签，沿用xtdata的约定：上午0931-1130，下午1301-1500"""
+    labels = []
+    for start, end in ((9 * 60 + 31, 11 * 60 + 30), (13 * 60 + 1, 15 * 60)):
+        for m in range(start, end + 1):
+            labels.append(f"{m // 60:02d}{m % 60:02d}00")
+    return labels
+
+
+MINUTE_LABELS = _minute_labels()
+
+
+def make_tick(price, last_close, open_price=None, high=None, low=None, volume=0, amount=0.0, timestamp=None):
+    """
+    构造与xtdata.get_full_tick格式一致的tick字典，盘口按最小价位上下展开
+    :param timestamp: 毫秒时间戳，默认当前时间
+    """
+    price = round(float(price), 2)
+    open_price = price if open_price is None else open_price
+    return {
+        'time': int(time.time() * 1000) if timestamp is None else timestamp,
+        'lastPrice': price,
+        'lastClose': last_close,
+        'open': open_price,
+        'high': max(price, open_price) if high is None else high,
+        'low': min(price, open_price) if low is None else low,
+        'volume': volume,
+        'amount': amount,
+        'askPrice': [round(price + PRICE_TICK * (i + 1), 2) for i in range(DEPTH_LEVELS)],
+        'bidPrice': [round(price - PRICE_TICK * i, 2) for i in range(DEPTH_LEVELS)],
+        'askVol': [100] * DEPTH_LEVELS,
+        'bidVol': [100] * DEPTH_LEVELS,
+    }
+
+
+class RecordedTicks:
+    """
+    录制的行情，文件每行一次推送的JSON：{股票代码: tick字典}
+    回放时把时间戳替换为当前时间，保证策略的行情时效判断通过
+    """
+    def __init__(self, path, loop=True, keep_time=False):
+        """
+        :param path: 录制文件路径
+        :param loop: 回放结束后是否从头循环
+        :param keep_time: 是否保留录制时的时间戳
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            self.batches = [json.loads(line) for line in f if line.strip()]
+        self.loop = loop
+        self.keep_time = keep_time
+        self.codes = list(dict.fromkeys(code for batch in self.batches for code in batch))
+
+    def __iter__(self):
+        while True:
+            for batch in self.batches:
+                if not self.keep_time:
+                    now = int(time.time() * 1000)
+                    batch = {code: dict(tick, time=now) for code, tick in batch.items()}
+                yield batch
+            if not self.loop:
+                return
+
+    @staticmethod
+    def record(batches, path):
+        """把推送序列写成录制文件"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for batch in batches:
+                f.write(json.dumps(batch) + "\n")
+
+
+class FakeXtdata:
+    """
+    xtdata替身
+    subscribe_whole_quote后启动推送线程，按ticks_per_second从行情源取批次推送给全推和单股订阅回调
+    历史数据按股票代码确定性生成，接口返回格式与xtdata一致（pandas DataFrame）
+    """
+    def __init__(self, source=None, ticks_per_second=1000, latency=0.0, push_batch_size=None, seed=0):
+        """
+        :param source: 行情源，可迭代的推送批次；None时在全推订阅后按订阅代码用MarketGenerator生成行情
+        :param ticks_per_second: 每秒推送的tick数（股票数），<=0表示不限速
+        :param latency: 数据查询、下载接口的模拟延迟（秒）
+        :param push_batch_size: 自动生成行情时每次推送的股票数
+        :param seed: 随机种子
+        """
+        self.source = source
+        self.ticks_per_second = ticks_per_second
+        self.latency = latency
+        self.push_batch_size = push_batch_size
+        self.seed = seed
+        self.lock = threading.Lock()
+        self.code2tick = {}
+        self.seq = 0
+        self.seq2whole = {}             # 全推订阅：seq -> (代码集合, 回调)
+        self.seq2quote = {}             # 单股订阅：seq -> (股票代码, 回调)
+        self.push_count = 0             # 累计推送批次数
+        self.tick_count = 0             # 累计推送tick数
+        self.callback_time = 0.0        # 回调累计耗时（秒）
+        self._pusher = None
+        self._running = False
+        self._push_start = None
+
+    def _delay(self):
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+    def _next_seq(self):
+        with self.lock:
+            self.seq += 1
+            return self.seq
+
+    def subscribe_whole_quote(self, code_list, callback=None):
+        seq = self._next_seq()
+        self.seq2whole[seq] = (set(code_list), callback)
+        self.start_push()
+        return seq
+
+    def subscribe_quote(self, stock_code, period='1d', start_time='', end_time='', count=0, callback=None):
+        seq = self._next_seq()
+        self.seq2quote[seq] = (stock_code, callback)
+        return seq
+
+    def unsubscribe_quote(self, seq):
+        self.seq2whole.pop(seq, None)
+        self.seq2quote.pop(seq, None)
+
+    def get_full_tick(self, code_list):
+        self._delay()
+        result = {}
+        for code in code_list:
+            tick = self.code2tick.get(code)
+            if tick is None:
+                price = _base_price(code)
+                tick = make_tick(price, price)
+            result[code] = tick
+        return result
+
+    def get_last_price(self, code):
+        """最新价，供假的交易接口撮合使用"""
+        tick = self.code2tick.get(code)
+        return tick['lastPrice'] if tick else _base_price(code)
+
+    def download_history_data(self, stock_code, period, start_time='', end_time='', incrementally=None):
+        self._delay()
+
+    def get_trading_calendar(self, market, start_time='', end_time=''):
+        from trade_calendar import get_calendar
+        return get_calendar().range(start_time, end_time)
+
+    def _history(self, code, period, start_time, end_time):
+        """
+        确定性生成的历史K线
+        :return: (时间标签列表, {字段: np.ndarray})
+        """
+        from trade_calendar import get_calendar
+        end_time = end_time or time.strftime('%Y%m%d')
+        start_time = start_time or get_calendar().days_back(end_time, 250)
+        days = get_calendar().range(start_time[:8], end_time[:8])
+        rng = np.random.default_rng(zlib.crc32(f"{code}{self.seed}".encode()))
+        bars_per_day = len(MINUTE_LABELS) if period == '1m' else 1
+        sigma = 0.02 / np.sqrt(bars_per_day)
+        count = len(days) * bars_per_day
+        close = _base_price(code) * np.exp(np.cumsum(rng.normal(0, sigma, count)))
+        open_price = np.concatenate([[close[0]], close[:-1]]) if count > 0 else close
+        noise = np.abs(rng.normal(0, sigma, count))
+        volume = rng.integers(1, 100, count) * 100.0 * (1 if period == '1m' else len(MINUTE_LABELS))
+        if period == '1m':
+            labels = [f"{day}{minute}" for day in days for minute in MINUTE_LABELS]
+        else:
+            labels = list(days)
+        fields = {
+            'open': np.round(open_price, 2),
+            'close': np.round(close, 2),
+            'high': np.round(np.maximum(open_price, close) * (1 + noise), 2),
+            'low': np.round(np.minimum(open_price, close) * (1 - noise), 2),
+            'volume': volume,
+            'amount': volume * close,
+        }
+        return labels, fields
+
+    def get_market_data(self, field_list=[], stock_list=[], period='1d', start_time='', end_time='', count=-1,
+                        dividend_type='none', fill_data=True):
+        """:return: {字段: DataFrame(index为股票代码, columns为时间)}"""
+        import pandas as pd
+        self._delay()
+        field_list = field_list or ['open', 'high', 'low', 'close', 'volume', 'amount']
+        field2rows = {field: [] for field in field_list}
+        columns = None
+        for code in stock_list:
+            labels, fields = self._history(code, period, start_time, end_time)
+            columns = labels if columns is None else columns
+            for field in field_list:
+                field2rows[field].append(fields[field])
+        return {field: pd.DataFrame(rows, index=list(stock_list), columns=columns) for field, rows in field2rows.items()}
+
+    def get_market_data_ex(self, field_list=[], stock_list=[], period='1d', start_time='', end_time='', count=-1,
+                           dividend_type='none', fill_data=True):
+        """:return: {股票代码: DataFrame(index为时间, columns为字段)}"""
+        import pandas as pd
+        self._delay()
+        field_list = field_list or ['open', 'high', 'low', 'close', 'volume', 'amount']
+        result = {}
+        for code in stock_list:
+            labels, fields = self._history(code, period, start_time, end_time)
+            result[code] = pd.DataFrame({field: fields[field] for field in field_list}, index=labels)
+        return result
+
+    def get_local_data(self, field_list=[], stock_list=[], period='1d', start_time='', end_time='', count=-1,
+                       dividend_type='none', fill_data=True, data_dir=None):
+        return self.get_market_data_ex(field_list, stock_list, period, start_time, end_time, count, dividend_type, fill_data)
+
+    def push(self, batch):
+        """推送一个批次给订阅回调，推送线程和测试直接调用"""
+        self.code2tick.update(batch)
+        start = time.perf_counter()
+        for codes, callback in list(self.seq2whole.values()):
+            if callback is None:
+                continue
+            ticks = batch if not codes else {code: tick for code, tick in batch.items() if code in codes}
+            if ticks:
+                callback(ticks)
+        for code, callback in list(self.seq2quote.values()):
+            tick = batch.get(code)
+            if tick is not None and callback is not None:
+                callback({code: [tick]})
+        self.callback_time += time.perf_counter() - start
+        self.push_count += 1
+        self.tick_count += len(batch)
+
+    def start_push(self):
+        """启动推送线程，已启动时直接返回"""
+        if self._pusher is not None:
+            return
+        if self.source is None:
+            codes = sorted(set().union(*(codes for codes, _ in self.seq2whole.values())))
+            self.source = MarketGenerator(codes, batch_size=self.push_batch_size, seed=self.seed)
+        self._running = True
+        self._pusher = threading.Thread(target=self._run_push, name='FakeXtdataPush', daemon=True)
+        self._pusher.start()
+
+    def stop_push(self):
+        self._running = False
+        if self._pusher is not None:
+            self._pusher.join(5)
+            self._pusher = None
+
+    def _run_push(self):
+        self._push_start = time.perf_counter()
+        try:
+            for batch in self.source:
+                if not self._running:
+                    break
+                try:
+                    self.push(batch)
+                except Exception as e:
+                    logger.error(f"行情回调异常: {e}", exc_info=True)
+                # 按累计tick数限速，回调耗时超过间隔时不补睡
+                if self.ticks_per_second > 0:
+                    ahead = self.tick_count / self.ticks_per_second - (time.perf_counter() - self._push_start)
+                    if ahead > 0:
+                        time.sleep(ahead)
+        finally:
+            self._running = False
+
+    def get_push_stats(self):
+        """:return: 推送批次数、tick数、实际速率、回调平均耗时"""
+        elapsed = time.perf_counter() - self._push_start if self._push_start else 0
+        return {
+            'batches': self.push_count,
+            'ticks': self.tick_count,
+            'ticks_per_second': round(self.tick_count / elapsed, 1) if elapsed > 0 else 0,
+            'callback_avg_ms': round(self.callback_time / self.push_count * 1000, 3) if self.push_count else 0,
+        }
+
+
+class StockAccount:
+    def __init__(self, account_id, account_type='STOCK'):
+        self.account_id = account_id
+        self.account_type = account_type
+
+
+class XtQuantTraderCallback:
+    """回调基类，方法与xttrader一致，默认不处理"""
+    def on_connected(self):
+        pass
+
+    def on_disconnected(self):
+        pass
+
+    def on_account_status(self, status):
+        pass
+
+    def on_stock_asset(self, asset):
+        pass
+
+    def on_stock_order(self, order):
+        pass
+
+    def on_stock_trade(self, trade):
+        pass
+
+    def on_stock_position(self, position):
+        pass
+
+    def on_order_error(self, order_error):
+        pass
+
+    def on_cancel_error(self, cancel_error):
+        pass
+
+    def on_order_stock_async_response(self, response):
+        pass
+
+    def on_cancel_order_stock_async_response(self, response):
+        pass
+
+
+# 回调和查询返回的对象，只需要按属性访问
+class XtAsset(types.SimpleNamespace):
+    pass
+
+
+class XtOrder(types.SimpleNamespace):
+    pass
+
+
+class XtTrade(types.SimpleNamespace):
+    pass
+
+
+class XtPosition(types.SimpleNamespace):
+    pass
+
+
+class XtOrderResponse(types.SimpleNamespace):
+    pass
+
+
+class XtOrderError(types.SimpleNamespace):
+    pass
+
+
+# install()设置的默认行情，XtQuantTrader(path, session_id)按原接口构造时使用
+_installed = {'xtdata': None, 'trader_kwargs': {}}
+
+
+class FakeXtQuantTrader:
+    """
+    XtQuantTrader替身
+    委托在回报线程中按设定延迟依次处理：异步回报 -> 委托已报 -> 按最新价全部成交（或资金/持仓不足时废单）
+    资金和持仓在本地记账，买入当日不可卖（T+1）
+    """
+    def __init__(self, path, session_id, xtdata=None, latency=0.0, initial_cash=1000000.0, commission_rate=0.0003):
+        """
+        :param path: 终端路径，不使用
+        :param session_id: 会话编号，不使用
+        :param xtdata: 撮合使用的FakeXtdata，默认为install()安装的实例
+        :param latency: 委托到回报的模拟延迟（秒）
+        :param initial_cash: 初始资金
+        :param commission_rate: 手续费率
+        """
+        kwargs = _installed['trader_kwargs']
+        self.xtdata = xtdata or _installed['xtdata'] or FakeXtdata()
+        self.latency = kwargs.get('latency', latency)
+        self.commission_rate = kwargs.get('commission_rate', commission_rate)
+        self.cash = kwargs.get('initial_cash', initial_cash)
+        self.frozen_cash = 0.0
+        self.callback = None
+        self.lock = threading.Lock()
+        self.seq = 0
+        self.order_count = 0
+        self.orders = []
+        self.trades = []
+        self.code2position = {}         # 股票代码 -> XtPosition
+        self._events = queue.Queue()
+        self._worker = None
+
+    def register_callback(self, callback):
+        self.callback = callback
+
+    def start(self):
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name='FakeXtQuantTrader', daemon=True)
+            self._worker.start()
+
+    def stop(self):
+        if self._worker is not None:
+            self._events.put(None)
+            self._worker.join(5)
+            self._worker = None
+
+    def connect(self):
+        return 0
+
+    def subscribe(self, account):
+        return 0
+
+    def order_stock_async(self, account, stock_code, order_type, order_volume, price_type, price, strategy_name='', order_remark=''):
+        with self.lock:
+            self.seq += 1
+            seq = self.seq
+        self._events.put((time.perf_counter() + self.latency, seq, account, stock_code, order_type, order_volume,
+                          price_type, price, strategy_name, order_remark))
+        return seq
+
+    def order_stock(self, account, stock_code, order_type, order_volume, price_type, price, strategy_name='', order_remark=''):
+        """同步下单，直接撮合，返回委托编号"""
+        order = self._match(account, stock_code, order_type, order_volume, price_type, price, strategy_name, order_remark)
+        return order.order_id
+
+    def cancel_order_stock(self, account, order_id):
+        # 委托都是立即全部成交或废单，没有可撤的委托
+        return -1
+
+    def _run(self):
+        while True:
+            event = self._events.get()
+            if event is None:
+                break
+            due_time, seq, *order_args = event
+            wait = due_time - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                order = self._match(*order_args, notify=False)
+                callback = self.callback
+                if callback is None:
+                    continue
+                callback.on_order_stock_async_response(XtOrderResponse(
+                    account_id=order.account_id, order_id=order.order_id, strategy_name=order.strategy_name,
+                    order_remark=order.order_remark, error_msg='', seq=seq))
+                self._notify(order)
+            except Exception as e:
+                logger.error(f"模拟委托处理异常: {e}", exc_info=True)
+
+    def _match(self, account, stock_code, order_type, order_volume, price_type, price, strategy_name, order_remark, notify=True):
+        """按最新价撮合，返回XtOrder"""
+        if price_type == XT_CONSTANTS['LATEST_PRICE'] or price is None or price <= 0:
+            price = self.xtdata.get_last_price(stock_code)
+        now = int(time.time())
+        with self.lock:
+            self.order_count += 1
+            order = XtOrder(account_id=account.account_id, stock_code=stock_code, order_id=self.order_count,
+                            order_sysid=str(self.order_count), order_time=now, order_type=order_type,
+                            order_volume=order_volume, price_type=price_type, price=price, traded_volume=0,
+                            traded_price=0.0, order_status=XT_CONSTANTS['ORDER_REPORTED'], status_msg='',
+                            strategy_name=strategy_name, order_remark=order_remark, trade=None)
+            value = order_volume * price
+            commission = value * self.commission_rate
+            position = self.code2position.get(stock_code)
+            if order_type == XT_CONSTANTS['STOCK_BUY']:
+                ok = value + commission <= self.cash
+            else:
+                ok = position is not None and position.can_use_volume >= order_volume
+            if not ok:
+                order.order_status = XT_CONSTANTS['ORDER_JUNK']
+                order.status_msg = '资金不足' if order_type == XT_CONSTANTS['STOCK_BUY'] else '可用持仓不足'
+            else:
+                if position is None:
+                    position = XtPosition(account_id=account.account_id, stock_code=stock_code, volume=0,
+                                          can_use_volume=0, frozen_volume=0, open_price=price, avg_price=price,
+                                          market_value=0.0, on_road_volume=0, yesterday_volume=0)
+                    self.code2position[stock_code] = position
+                if order_type == XT_CONSTANTS['STOCK_BUY']:
+                    self.cash -= value + commission
+                    position.avg_price = (position.avg_price * position.volume + value) / (position.volume + order_volume)
+                    position.volume += order_volume
+                else:
+                    self.cash += value - commission
+                    position.volume -= order_volume
+                    position.can_use_volume -= order_volume
+                position.market_value = position.volume * price
+                order.order_status = XT_CONSTANTS['ORDER_SUCCEEDED']
+                order.traded_volume = order_volume
+                order.traded_price = price
+                order.trade = XtTrade(account_id=account.account_id, stock_code=stock_code, order_type=order_type,
+                                      traded_id=f"T{order.order_id}", traded_time=now, traded_price=price,
+                                      traded_volume=order_volume, traded_amount=value, order_id=order.order_id,
+                                      order_sysid=order.order_sysid, strategy_name=strategy_name,
+                                      order_remark=order_remark,
+                                      offset_flag=48 if order_type == XT_CONSTANTS['STOCK_BUY'] else 49)
+                self.trades.append(order.trade)
+            self.orders.append(order)
+        if notify:
+            self._notify(order)
+        return order
+
+    def _notify(self, order):
+        callback = self.callback
+        if callback is None:
+            return
+        if order.order_status == XT_CONSTANTS['ORDER_JUNK']:
+            callback.on_order_error(XtOrderError(account_id=order.account_id, order_id=order.order_id, error_id=-1,
+                                                 error_msg=order.status_msg, strategy_name=order.strategy_name,
+                                                 order_remark=order.order_remark))
+        callback.on_stock_order(order)
+        if order.trade is not None:
+            callback.on_stock_trade(order.trade)
+
+    def query_stock_asset(self, account):
+        with self.lock:
+            market_value = sum(position.volume * self.xtdata.get_last_price(code)
+                               for code, position in self.code2position.items())
+            return XtAsset(account_id=account.account_id, cash=self.cash, frozen_cash=self.frozen_cash,
+                           market_value=market_value, total_asset=self.cash + self.frozen_cash + market_value)
+
+    def query_stock_orders(self, account, cancelable_only=False):
+        with self.lock:
+            return [] if cancelable_only else list(self.orders)
+
+    def query_stock_trades(self, account):
+        with self.lock:
+            return list(self.trades)
+
+    def query_stock_positions(self, account):
+        with self.lock:
+            for code, position in self.code2position.items():
+                position.market_value = position.volume * self.xtdata.get_last_price(code)
+            return [position for position in self.code2position.values() if position.volume > 0]
+
+
+def install(xtdata=None, trader_latency=0.0, **trader_kwargs):
+    """
+    把假的xtquant放进sys.modules，需要在项目代码第一次导入xtquant之前调用
+    :param xtdata: FakeXtdata实例，None时使用默认参数创建
+    :param trader_latency: XtQuantTrader委托到回报的延迟（秒）
+    :param trader_kwargs: 传给FakeXtQuantTrader的其他参数，如initial_cash
+    :return: FakeXtdata实例
+    """
+    xtdata = xtdata or FakeXtdata()
+    _installed['xtdata'] = xtdata
+    _installed['trader_kwargs'] = dict(trader_kwargs, latency=trader_latency)
+
+    package = types.ModuleType('xtquant')
+    package.__path__ = []
+    xtdata_module = types.ModuleType('xtquant.xtdata')
+    for name in XTDATA_API:
+        setattr(xtdata_module, name, getattr(xtdata, name))
+    xttrader_module = types.ModuleType('xtquant.xttrader')
+    xttrader_module.XtQuantTrader = FakeXtQuantTrader
+    xttrader_module.XtQuantTraderCallback = XtQuantTraderCallback
+    xttype_module = types.ModuleType('xtquant.xttype')
+    xttype_module.StockAccount = StockAccount
+    xtconstant_module = types.ModuleType('xtquant.xtconstant')
+    for name, value in XT_CONSTANTS.items():
+        setattr(xtconstant_module, name, value)
+
+    modules = {'xtquant': package, 'xtquant.xtdata': xtdata_module, 'xtquant.xttrader': xttrader_module,
+               'xtquant.xttype': xttype_module, 'xtquant.xtconstant': xtconstant_module}
+    for name, module in modules.items():
+        if name != 'xtquant':
+            setattr(package, name.split('.')[1], module)
+        sys.modules[name] = module
+    logger.info("已安装本地xtquant替身")
+    return xtdata
+
+
+def uninstall():
+    """从sys.modules移除假的xtquant"""
+    for name in ('xtquant', 'xtquant.xtdata', 'xtquant.xttrader', 'xtquant.xttype', 'xtquant.xtconstant'):
+        sys.modules.pop(name, None)
+    _installed['xtdata'] = None
+    _installed['trader_kwargs'] = {}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='使用本地xtquant替身运行main.main')
+    parser.add_argument('--tps', type=int, default=1000, help='每秒推送的tick数')
+    parser.add_argument('--batch-size', type=int, default=None, help='每次推送的股票数，默认全部订阅股票')
+    parser.add_argument('--ticks', type=str, default=None, help='录制的行情文件，每行一次推送的JSON')
+    parser.add_argument('--latency', type=float, default=0.0, help='数据接口延迟（秒）')
+    parser.add_argument('--trade-latency', type=float, default=0.005, help='委托回报延迟（秒）')
+    parser.add_argument('--duration', type=float, default=60, help='运行时长（秒）')
+    parser.add_argument('--sim', action='store_true', help='使用模拟交易账户（SimTrader）而不是假的XtQuantTrader')
+    args = parser.parse_args()
+
+    source = RecordedTicks(args.ticks) if args.ticks else None
+    fake_xtdata = install(FakeXtdata(source, args.tps, args.latency, args.batch_size), trader_latency=args.trade_latency)
+
+    import main as trading_main
+    # 到时后在主线程抛出KeyboardInterrupt，走main.main正常的退出流程
+    threading.Timer(args.duration, _thread.interrupt_main).start()
+    if args.sim:
+        trading_main.main(use_sim=True, account_id='sim_id1')
+    else:
+        trading_main.main()
+    fake_xtdata.stop_push()
+    logger.info(f"推送统计: {fake_xtdata.get_push_stats()}")
@@ -0,0 +1,285 @@
+"""
+合成行情生成器，用于规模压测
+按几何布朗运动（或回放给定的价格路径）生成全推行情，格式与xtdata的tick字典一致：
+lastPrice/lastClose/open/high/low/volume/amount和5档盘口
+可以生成北交所-A股相关配对（北交所股票跟随关联A股的共同因子，可设置滞后），供Strategy1004使用
+
+用法：
+    generator = MarketGenerator.with_codes(2000, pairs=50)
+    FakeXtdata(source=generator)               # 作为本地xtquant替身的行情源，驱动main.on_tick_data
+    generator.run(sim_trader.realtime_trigger, pushes_per_second=3, duration=10)
+    generator.daily_panel('20240102', '20241231')   # 回测用的日线价格面板
+"""
+import time
+import zlib
+from datetime import datetime
+import numpy as np
+
+DEPTH_LEVELS = 5
+PRICE_TICK = 0.01
+TRADING_SECONDS = 4 * 3600          # 每个交易日的连续竞价秒数，用于把年化参数换算到每次推送
+TRADING_DAYS = 242
+
+
+def _limit_ratio(code):
+    """涨跌停幅度：北交所30%，创业板/科创板20%，其他10%"""
+    if code.endswith('.BJ'):
+        return 0.3
+    if code.startswith(('300', '301', '688')):
+        return 0.2
+    return 0.1
+
+
+def _base_price(code):
+    """每只股票固定的基准价，保证多次运行结果一致"""
+    return 5 + zlib.crc32(code.encode()) % 4500 / 100
+
+
+def synthetic_codes(count, market='SH'):
+    """生成count个不重复的股票代码"""
+    if market == 'BJ':
+        return [f"83{i:04d}.BJ" for i in range(count)]
+    if market == 'SZ':
+        return [f"00{i:04d}.SZ" for i in range(count)]
+    return [f"60{i:04d}.SH" for i in range(count)]
+
+
+class MarketGenerator:
+    """
+    全推行情生成器
+    每次推送对batch_size只股票（默认全部）前进一步，整批向量化计算，最后才组装tick字典
+    配对：同一组（一只北交所股票和它的关联A股）共享一个因子，组内收益率相关系数约为rho，
+    北交所股票使用lag步之前的因子，模拟北交所跟随A股的滞后
+    """
+    def __init__(self, codes, volatility=0.3, drift=0.0, tick_interval=3.0, batch_size=None, pairs=None, rho=0.6,
+                 lag=0, price_paths=None, realtime=True, start_time=None, seed=0):
+        """
+        :param codes: 股票代码列表
+        :param volatility: 年化波动率，float或与codes对齐的数组
+        :param drift: 年化漂移
+        :param tick_interval: 每次推送代表的行情时间（秒），交易所快照为3秒
+        :param batch_size: 每次推送的股票数，None为全部
+        :param pairs: {北交所代码: [关联A股代码, ...]}，代码需在codes中
+        :param rho: 配对组内收益率的相关系数
+        :param lag: 北交所股票滞后的推送次数
+        :param price_paths: {股票代码: 价格序列}，这些股票回放给定路径（循环），不走几何布朗运动
+        :param realtime: tick时间戳使用当前时间；否则从start_time起按tick_interval推进
+        :param start_time: 非realtime时的起始时间，默认当天09:30
+        :param seed: 随机种子
+        """
+        self.codes = list(codes)
+        self.code2row = {code: i for i, code in enumerate(self.codes)}
+        n = len(self.codes)
+        self.n = n
+        self.batch_size = min(batch_size or n, n)
+        self.rng = np.random.default_rng(seed)
+        self.realtime = realtime
+        self.tick_interval = tick_interval
+        self.clock_ms = int((start_time or datetime.now().replace(hour=9, minute=30, second=0, microsecond=0)).timestamp() * 1000)
+        self.step_count = 0
+
+        # 几何布朗运动每步的均值和标准差
+        dt = tick_interval / (TRADING_SECONDS * TRADING_DAYS)
+        sigma = np.broadcast_to(np.asarray(volatility, dtype=np.float64), (n,))
+        self.step_sigma = sigma * np.sqrt(dt)
+        self.step_mu = (drift - 0.5 * sigma ** 2) * dt
+
+        self.last_close = np.array([_base_price(code) for code in self.codes])
+        self.limit_up = np.round(self.last_close * (1 + np.array([_limit_ratio(code) for code in self.codes])), 2)
+        self.limit_down = np.round(self.last_close * (1 - np.array([_limit_ratio(code) for code in self.codes])), 2)
+        self.open = np.round(self.last_close * np.exp(self.rng.normal(0, 0.005, n)), 2)
+        self.prices = self.open.copy()
+        self.high = self.prices.copy()
+        self.low = self.prices.copy()
+        self.volume = np.zeros(n, dtype=np.int64)
+        self.amount = np.zeros(n, dtype=np.float64)
+
+        # 配对：每组一个共同因子
+        self.pairs = {bj: [a for a in a_codes if a in self.code2row] for bj, a_codes in (pairs or {}).items()
+                      if bj in self.code2row}
+        self.rho = rho
+        self.lag = lag
+        self.group = np.full(n, -1, dtype=np.int64)        # 股票所属的配对组
+        self.is_lagged = np.zeros(n, dtype=bool)           # 是否使用滞后因子（北交所股票）
+        for g, (bj, a_codes) in enumerate(self.pairs.items()):
+            self.group[[self.code2row[code] for code in a_codes]] = g
+            self.group[self.code2row[bj]] = g
+            self.is_lagged[self.code2row[bj]] = True
+        self.factor_history = np.zeros((lag + 1, len(self.pairs)))   # 最近lag+1步的组因子，环形缓冲
+
+        # 回放路径
+        self.replay_rows = np.array([self.code2row[code] for code in (price_paths or {}) if code in self.code2row],
+                                    dtype=np.int64)
+        self.replay_paths = [np.asarray(price_paths[self.codes[row]], dtype=np.float64) for row in self.replay_rows]
+        for row, path in zip(self.replay_rows, self.replay_paths):
+            self.last_close[row] = self.open[row] = self.prices[row] = self.high[row] = self.low[row] = path[0]
+            self.limit_up[row], self.limit_down[row] = np.inf, 0
+
+    @classmethod
+    def with_codes(cls, count, pairs=0, a_per_pair=3, **kwargs):
+        """
+        生成count只股票的行情，其中pairs组北交所-A股配对
+        :param count: 股票总数
+        :param pairs: 配对的北交所股票数
+        :param a_per_pair: 每只北交所股票的关联A股数量
+        """
+        bj_codes = synthetic_codes(pairs, 'BJ')
+        a_codes = synthetic_codes(max(count - pairs, pairs * a_per_pair), 'SH')
+        pair_map = {bj: a_codes[i * a_per_pair:(i + 1) * a_per_pair] for i, bj in enumerate(bj_codes)}
+        return cls(bj_codes + a_codes, pairs=pair_map, **kwargs)
+
+    def step(self, rows):
+        """对rows中的股票前进一步"""
+        z = self.rng.standard_normal(len(rows))
+        if self.pairs:
+            factor = self.rng.standard_normal(len(self.pairs))
+            self.factor_history = np.roll(self.factor_history, 1, axis=0)
+            self.factor_history[0] = factor
+            groups = self.group[rows]
+            in_pair = groups >= 0
+            # 北交所股票使用lag步之前的因子
+            lagged = self.is_lagged[rows] & in_pair
+            shared = np.where(lagged, self.factor_history[-1][groups], factor[groups])
+            loading = np.sqrt(self.rho)
+            z = np.where(in_pair, loading * shared + np.sqrt(1 - self.rho) * z, z)
+        new_prices = self.prices[rows] * np.exp(self.step_mu[rows] + self.step_sigma[rows] * z)
+        self.prices[rows] = np.clip(np.round(new_prices, 2), self.limit_down[rows], self.limit_up[rows])
+
+        for row, path in zip(self.replay_rows, self.replay_paths):
+            self.prices[row] = path[(self.step_count + 1) % len(path)]
+
+        self.high[rows] = np.maximum(self.high[rows], self.prices[rows])
+        self.low[rows] = np.minimum(self.low[rows], self.prices[rows])
+        traded = self.rng.integers(1, 50, len(rows)) * 100
+        self.volume[rows] += traded
+        self.amount[rows] += traded * self.prices[rows]
+        self.step_count += 1
+
+    def next_batch(self):
+        """
+        生成一次全推行情
+        :return: {股票代码: tick字典}
+        """
+        if self.batch_size >= self.n:
+            rows = np.arange(self.n)
+        else:
+            rows = np.sort(self.rng.choice(self.n, self.batch_size, replace=False))
+        self.step(rows)
+        if self.realtime:
+            now = int(time.time() * 1000)
+        else:
+            self.clock_ms += int(self.tick_interval * 1000)
+            now = self.clock_ms
+
+        prices = self.prices[rows]
+        offsets = np.arange(DEPTH_LEVELS) * PRICE_TICK
+        asks = np.round(prices[:, None] + PRICE_TICK + offsets, 2).tolist()
+        bids = np.round(prices[:, None] - offsets, 2).tolist()
+        book_vol = (self.rng.integers(1, 100, (len(rows), 2 * DEPTH_LEVELS)) * 100).tolist()
+        last_close = self.last_close[rows].tolist()
+        opens = self.open[rows].tolist()
+        highs = self.high[rows].tolist()
+        lows = self.low[rows].tolist()
+        volumes = self.volume[rows].tolist()
+        amounts = self.amount[rows].tolist()
+        prices = prices.tolist()
+        codes = self.codes
+        return {
+            codes[row]: {
+                'time': now, 'lastPrice': prices[i], 'lastClose': last_close[i], 'open': opens[i],
+                'high': highs[i], 'low': lows[i], 'volume': volumes[i], 'amount': amounts[i],
+                'askPrice': asks[i], 'bidPrice': bids[i],
+                'askVol': book_vol[i][:DEPTH_LEVELS], 'bidVol': book_vol[i][DEPTH_LEVELS:],
+            }
+            for i, row in enumerate(rows.tolist())
+        }
+
+    def __iter__(self):
+        while True:
+            yield self.next_batch()
+
+    def run(self, callback, pushes_per_second=0, duration=None, count=None):
+        """
+        按设定速率把推送交给回调，如on_tick_data、SimTrader.realtime_trigger
+        :param callback: 参数为 {股票代码: tick字典}
+        :param pushes_per_second: 每秒推送次数，<=0表示不限速
+        :param duration: 运行时长（秒）
+        :param count: 推送次数，与duration都为None时推送一次
+        :return: dict，推送次数、tick数、耗时、生成和回调各自的耗时与吞吐
+        """
+        if duration is None and count is None:
+            count = 1
+        start = time.perf_counter()
+        generate_time = 0.0
+        callback_time = 0.0
+        pushes = 0
+        ticks = 0
+        while (count is None or pushes < count) and (duration is None or time.perf_counter() - start < duration):
+            t0 = time.perf_counter()
+            batch = self.next_batch()
+            t1 = time.perf_counter()
+            callback(batch)
+            t2 = time.perf_counter()
+            generate_time += t1 - t0
+            callback_time += t2 - t1
+            pushes += 1
+            ticks += len(batch)
+            if pushes_per_second > 0:
+                ahead = pushes / pushes_per_second - (time.perf_counter() - start)
+                if ahead > 0:
+                    time.sleep(ahead)
+        elapsed = time.perf_counter() - start
+        return {
+            'pushes': pushes,
+            'ticks': ticks,
+            'elapsed_s': round(elapsed, 3),
+            'ticks_per_second': round(ticks / elapsed, 1) if elapsed > 0 else 0,
+            'generate_ms_per_push': round(generate_time / pushes * 1000, 3) if pushes else 0,
+            'callback_ms_per_push': round(callback_time / pushes * 1000, 3) if pushes else 0,
+            'callback_ticks_per_second': round(ticks / callback_time, 1) if callback_time > 0 else 0,
+        }
+
+    def daily_closes(self, dates):
+        """
+        按同样的波动率和配对结构生成日线收盘价，供回测使用
+        :param dates: 交易日列表
+        :return: np.ndarray，shape=(股票数, 日期数)
+        """
+        n_days = len(dates)
+        rng = np.random.default_rng(self.rng.integers(1 << 31))
+        daily_sigma = self.step_sigma * np.sqrt(TRADING_SECONDS / self.tick_interval)
+        z = rng.standard_normal((self.n, n_days))
+        if self.pairs:
+            factor = rng.standard_normal((len(self.pairs), n_days))
+            in_pair = self.group >= 0
+            z[in_pair] = np.sqrt(self.rho) * factor[self.group[in_pair]] + np.sqrt(1 - self.rho) * z[in_pair]
+        log_returns = (self.step_mu * TRADING_SECONDS / self.tick_interval)[:, None] + daily_sigma[:, None] * z
+        closes = np.round(self.last_close[:, None] * np.exp(np.cumsum(log_returns, axis=1)), 2)
+        for row, path in zip(self.replay_rows, self.replay_paths):
+            closes[row] = path[np.arange(n_days) % len(path)]
+        return closes
+
+    def daily_panel(self, start_date, end_date):
+        """
+        回测用的日线价格面板，可用data.price_panel.set_price_panel放入共享面板，策略fill_data时读取
+        :return: PricePanel
+        """
+        from trade_calendar import get_calendar
+        from data.price_panel import PricePanel
+        dates = get_calendar().range(start_date, end_date)
+        return PricePanel(self.codes, dates, self.daily_closes(dates), start_date, end_date)
+
+    def correlation_results(self, std=0.05):
+        """
+        配对的相关性结果，格式与correlation_results.json一致，可直接用于构造Strategy1004
+        :param std: 价格比对数的标准差
+        """
+        results = {}
+        for bj, a_codes in self.pairs.items():
+            bj_close = self.last_close[self.code2row[bj]]
+            results[bj] = {'similar_stocks': [
+                {'code': a, 'correlation': self.rho, 'mean': float(np.log(bj_close / self.last_close[self.code2row[a]])),
+                 'std': std, 'z_score': 0.0}
+                for a in a_codes
+            ]}
+        return results
@@ -1,7 +1,6 @@
 import os
 import sys
 import json
-import pandas as pd
 from datetime import datetime
 from .sim_logger import logger  # 使用相对导入
 
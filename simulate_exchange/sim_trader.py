@@ -1,7 +1,9 @@
+import time
 from datetime import datetime
 from enum import Enum
-import pandas as pd
 from .sim_logger import logger  # 使用本地的sim_logger
+from data.tick_batch import TickBatch
+from metrics import metrics
 
 class PriceType(Enum):
     LAST_PRICE = 0  # 最新价
@@ -26,6 +28,9 @@ class SimTrader:
         self.commission_rate = 0.0005
         # 行情数据超时时间（秒）
         self.tick_timeout = 2
+        # 行情推送只在内存中更新持仓价格，每隔save_interval秒写一次文件，成交时账户自己写文件
+        self.save_interval = 60
+        self.last_save_time = time.monotonic()
         
         self.code2tick = {}
         
@@ -36,7 +41,7 @@ class SimTrader:
         logger.info("连接模拟交易接口成功")
         return True
     
-    def buy_stock(self, stock_code, amount, price_type=PriceType.LAST_PRICE, price=None, remark=None):
+    def buy_stock(self, stock_code, amount, price_type=PriceType.LAST_PRICE, price=None, remark=None, allocations=None):
         """
         买入股票
         :param stock_code: 股票代码
@@ -44,6 +49,7 @@ class SimTrader:
         :param price_type: 价格类型 暂时没用，只是为了对其实盘的Trader接口，保持一致
         :param price: 买入价格，如果为None则使用市价
         :param remark: 备注
+        :param allocations: 轧差合并的委托参与的策略，[(策略备注, 数量)]
         :return: 订单ID
         """
 
@@ -59,9 +65,9 @@ class SimTrader:
             logger.warning(f"无法获取有效价格，买入失败: {stock_code}")
             return None
         
-        return self.handle_order(self.account, stock_code, 'buy', amount, price, remark)
+        return self.handle_order(self.account, stock_code, 'buy', amount, price, remark, allocations)
     
-    def sell_stock(self, stock_code, amount, price_type=PriceType.LAST_PRICE, price=None, remark=None):
+    def sell_stock(self, stock_code, amount, price_type=PriceType.LAST_PRICE, price=None, remark=None, allocations=None):
         """
         卖出股票
         :param stock_code: 股票代码
@@ -69,6 +75,7 @@ class SimTrader:
         :param price_type: 价格类型 暂时没用，只是为了对其实盘的Trader接口，保持一致
         :param price: 卖出价格，如果为None则使用市价
         :param remark: 备注
+        :param allocations: 轧差合并的委托参与的策略，[(策略备注, 数量)]
         :return: 订单ID
         """
         # 如果没有指定价格，则获取当前行情价格
@@ -83,11 +90,11 @@ class SimTrader:
             logger.warning(f"无法获取有效价格，卖出失败: {stock_code}")
             return None
         
-        return self.handle_order(self.account, stock_code, 'sell', amount, price, remark)
+        return self.handle_order(self.account, stock_code, 'sell', amount, price, remark, allocations)
     
 
 
-    def handle_order(self, account, stock_code, trade_type, amount, price, remark=None):
+    def handle_order(self, account, stock_code, trade_type, amount, price, remark=None, allocations=None):
         """
         处理交易请求，添加到列表，并尝试执行
         :param account: 模拟账户对象
@@ -96,6 +103,7 @@ class SimTrader:
         :param amount: 交易数量
         :param price: 交易价格
         :param remark: 备注
+        :param allocations: 轧差合并的委托参与的策略，[(策略备注, 数量)]
         :return: 订单ID
         """
         try:
@@ -123,6 +131,7 @@ class SimTrader:
                 'trade_value': trade_value,
                 'commission': commission,
                 'remark': remark,
+                'allocations': allocations or [(remark, amount)],
                 'status': 'pending',
                 'create_time': datetime.now(),
                 'account': account
@@ -204,27 +213,25 @@ class SimTrader:
         except Exception as e:
             logger.error(f"检查订单成交失败: {e}", exc_info=True)
     
+    @metrics.timed('sim.realtime_trigger')
     def realtime_trigger(self, ticks):
         """
         处理实时行情数据，触发订单成交
-        :param ticks: 股票代码到行情数据的字典 {code: tick_data}
+        :param ticks: 股票代码到行情数据的字典 {code: tick_data}，或main中转换好的TickBatch
         """
         try:
-            # 构造code2price字典，用于更新账户持仓价格
-            code2price = {}
-            
+            batch = TickBatch.from_ticks(ticks)
             # 更新内部行情缓存
-            for code, tick_data in ticks.items():
-                self.code2tick[code] = tick_data
-                
-                # 同时提取lastPrice到code2price字典
-                last_price = tick_data.get('lastPrice')
-                if last_price is not None and last_price > 0:
-                    code2price[code] = last_price
-            
-            # 调用account的update_price接口更新持仓股票的价格
-            if code2price and hasattr(self.account, 'update_price'):
-                self.account.update_price(code2price)
+            self.code2tick.update(batch.ticks)
+
+            # 只取持仓股票的最新价，一次向量化取数，更新账户持仓价格和市值（只在内存中，定时写文件）
+            code2price = batch.get_prices(list(self.account.positions.keys()))
+            if code2price:
+                self.account.update_prices(code2price, save=False)
+            now = time.monotonic()
+            if now - self.last_save_time >= self.save_interval:
+                self.account.save_prices()
+                self.last_save_time = now
             
             # 遍历待处理订单，检查是否可以成交
             pending_orders = self.pending_orders.copy()  # 创建副本避免遍历时修改
@@ -237,6 +244,10 @@ class SimTrader:
         except Exception as e:
             logger.error(f"处理实时行情数据失败: {e}", exc_info=True)
 
+    def stop(self):
+        """程序退出时把内存中的持仓价格写入文件"""
+        self.account.save_prices()
+
     def cancel_order(self, order_id):
         """
         取消订单
@@ -317,6 +328,7 @@ class SimTrader:
         获取交易历史数据框
         :return: 交易历史数据框
         """
+        import pandas as pd  # 只在需要DataFrame时导入，加快启动
         if not self.trade_history:
             return pd.DataFrame()
         
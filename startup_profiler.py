@@ -0,0 +1,125 @@
+import os
+import sys
+import time
+import builtins
+from contextlib import contextmanager
+from datetime import datetime
+
+PROFILE_FLAG = '--profile-startup'
+REPORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs')
+
+
+class StartupProfiler:
+    """
+    启动耗时分析
+    1. 替换builtins.__import__，记录每个新加载模块的导入耗时（累计耗时和去掉子模块后的自身耗时）
+    2. 记录各初始化阶段（init_stocks/init_strategies/prepare_data/subscribe等）的耗时
+    3. 收到第一笔行情时记录就绪时间，并把报告写到logs目录
+    没有开启时所有接口都是空操作，不影响正常运行
+    """
+    def __init__(self, enabled=False, name='main'):
+        """
+        :param enabled: 是否开启
+        :param name: 程序名称，用于报告文件名
+        """
+        self.enabled = enabled
+        self.name = name
+        self.start_time = time.perf_counter()
+        self.module2cost = {}           # 模块名 -> (累计耗时, 自身耗时)，单位秒
+        self.phases = []                # [(阶段名, 开始时间偏移, 耗时)]
+        self.marks = []                 # [(事件名, 时间偏移)]
+        self._stack = []                # 嵌套导入时子模块耗时的累加栈
+        self._original_import = None
+        self.report_file = None
+
+    @classmethod
+    def from_argv(cls, argv, name='main'):
+        """根据命令行参数决定是否开启，开启时立即安装导入计时"""
+        profiler = cls(PROFILE_FLAG in argv, name)
+        if profiler.enabled:
+            profiler.install_import_hook()
+        return profiler
+
+    def install_import_hook(self):
+        if self._original_import is not None:
+            return
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def remove_import_hook(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        module_count = len(sys.modules)
+        self._stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            cost = time.perf_counter() - start
+            children = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += cost
+            # 只记录真正加载了新模块的导入，已缓存的导入不计
+            if len(sys.modules) != module_count:
+                key = name if level == 0 else '.' * level + (name or ','.join(fromlist or ()))
+                self.module2cost[key] = (cost, cost - children)
+
+    @contextmanager
+    def phase(self, name):
+        """记录一个初始化阶段的耗时"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, start - self.start_time, time.perf_counter() - start))
+
+    def mark(self, name):
+        """记录一个时间点"""
+        if self.enabled:
+            self.marks.append((name, time.perf_counter() - self.start_time))
+
+    def mark_first_tick(self):
+        """收到第一笔行情时调用，记录就绪时间并输出报告，之后的调用直接返回"""
+        if not self.enabled or any(mark_name == 'first_tick' for mark_name, _ in self.marks):
+            return
+        self.mark('first_tick')
+        self.write_report()
+
+    def format_report(self, top=30):
+        """
+        :param top: 导入耗时排名显示的模块数量
+        :return: 报告文本
+        """
+        lines = [f"启动耗时报告 {self.name} {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"]
+        import_total = sum(self_cost for _, self_cost in self.module2cost.values())
+        lines.append(f"导入模块 {len(self.module2cost)} 个，自身耗时合计 {import_total * 1000:.1f} ms")
+        lines.append("-" * 60)
+        lines.append(f"{'模块':<40}{'累计(ms)':>10}{'自身(ms)':>10}")
+        ranked = sorted(self.module2cost.items(), key=lambda item: item[1][0], reverse=True)
+        for module, (cost, self_cost) in ranked[:top]:
+            lines.append(f"{module:<40}{cost * 1000:>10.1f}{self_cost * 1000:>10.1f}")
+        lines.append("-" * 60)
+        lines.append(f"{'阶段':<40}{'开始(ms)':>10}{'耗时(ms)':>10}")
+        for name, offset, cost in self.phases:
+            lines.append(f"{name:<40}{offset * 1000:>10.1f}{cost * 1000:>10.1f}")
+        for name, offset in self.marks:
+            lines.append(f"{name:<40}{offset * 1000:>10.1f}")
+        return "\n".join(lines)
+
+    def write_report(self, report_dir=REPORT_DIR):
+        """写报告文件，返回文件路径"""
+        if not self.enabled:
+            return None
+        if not os.path.exists(report_dir):
+            os.makedirs(report_dir)
+        if self.report_file is None:
+            self.report_file = os.path.join(report_dir, f"startup_{self.name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt")
+        with open(self.report_file, 'w', encoding='utf-8') as f:
+            f.write(self.format_report())
+        return self.report_file
@@ -1,4 +1,7 @@
 from abc import ABC, abstractmethod
+from data.tick_batch import TickBatch
+from metrics import metrics
+from market_state import MarketState
 
 
 class BaseStrategy(ABC):
@@ -9,9 +12,25 @@ class BaseStrategy(ABC):
         #预期mystock对象 从全局获取，全局维持一份#TODO
         self.target_stocks = []                   
         self.data_ready = False                        # 数据准备状态标志
+        self.market_state = None                       # 大盘状态服务，实盘时由外部设置
+        self.daily_dates = []                          # code2daily价格行对应的交易日，回测信号的idx是其中的位置
         self.one_hand_count = 100
         self.single_trade_value = 8000 
     
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # 子类实现的trigger统一计时，并统计生成的信号数
+        if 'trigger' in cls.__dict__:
+            cls.trigger = metrics.timed(f"trigger.{cls.__name__}", f"signals.{cls.__name__}")(cls.trigger)
+
+    @classmethod
+    def from_params(cls, params):
+        """
+        由策略参数创建实例，供StrategyFactory调用，构造参数不同的策略需要覆盖
+        :param params: 策略参数字典，见strategy_params
+        """
+        return cls(params["target_codes"])
+
     def get_buy_volume(self, stock, current_price):
         """逻辑上后面也可以做细化策略，"""
         volume = max(self.one_hand_count, self.single_trade_value // current_price)
@@ -63,14 +82,48 @@ class BaseStrategy(ABC):
         """
         pass
 
+    def get_data_requirements(self):
+        """
+        声明fill_data需要下载的历史数据，启动预热时统一合并、并发下载
+        :return: [(股票代码列表, 周期, 开始日期, 结束日期), ...]，日期格式YYYYMMDD
+        """
+        return []
+
+    def get_quote_requests(self):
+        """
+        策略额外需要单股订阅的代码，由SubscriptionManager统一分配订阅位
+        :return: {股票代码: 优先级}，数值越大越优先
+        """
+        return {}
+
+    def on_quote(self, datas):
+        """
+        单股订阅的行情回调
+        :param datas: {股票代码: [tick字典, ...]}
+        """
+        pass
+
     def _check_market(self, market_tick):
-        """检查大盘状况, 可复用也可以覆盖"""
-        if not market_tick or market_tick.get('open', 0) <= 0:
-            return None
-            
-        market_rise = (market_tick['lastPrice'] / market_tick['open'] - 1) * 100
-        
-        return market_rise
+        """检查大盘状况, 可复用也可以覆盖，默认与大盘状态服务使用同一个涨跌幅计算"""
+        return MarketState.calc_rise(market_tick)
+
+    def get_current_prices(self, ticks):
+        """
+        从本次推送中批量取目标股票的最新价
+        :param ticks: TickBatch或 {股票代码: tick字典}
+        :return: np.ndarray，与target_stocks一一对应，本次推送中没有的股票为nan
+        """
+        batch = TickBatch.from_ticks(ticks)
+        return batch.take('lastPrice', [stock.code for stock in self.target_stocks])
+
+    def get_market_rise(self, ticks, market_index):
+        """
+        获取大盘涨跌幅，优先读取大盘状态服务的缓存，没有设置时从本次推送中计算
+        :return: market_rise，获取失败返回None
+        """
+        if self.market_state is not None:
+            return self.market_state.get_market_rise(market_index)
+        return self._check_market(ticks.get(market_index))
 
     def need_update(self):
         ###LocalAccount需要主动去查询是否更新，
@@ -1,8 +1,9 @@
-from datetime import datetime, timedelta
-from xtquant import xtdata
+from datetime import datetime
 from logger import logger  
 from data_provider import DataProvider
 from .base_strategy import BaseStrategy
+from data.tick_batch import TickBatch
+from trade_calendar import get_calendar
 import numpy as np
 
 class Strategy1001(BaseStrategy):
@@ -20,10 +21,19 @@ class Strategy1001(BaseStrategy):
         self.aggressiveness = aggressiveness
         self.init_params()
 
+        # 安全区间数组，与range_stocks一一对应，见_build_range_arrays
+        self.range_stocks = []
+        self.range_codes = []
+        self._range_source = None
+
 
         self.market_index = '899050.BJ'
 
 
+    @classmethod
+    def from_params(cls, params):
+        return cls(params["target_codes"], params["safe_range"], params["aggressiveness"])
+
     def init_params(self):
         def adjusted_exponential(x):
             #根据激进程度，设置交易阈值
@@ -52,159 +62,150 @@ class Strategy1001(BaseStrategy):
 
         self.sell_increase_rate = 1.05           # 卖出涨幅阈值
 
+    def _build_range_arrays(self):
+        """
+        将目标股票的安全区间预处理为对齐的数组，target_stocks由外部在初始化后设置，变化时重建
+        未配置安全区间的股票直接剔除，数值不完整的股票标记为无效
+        """
+        stocks = []
+        missing = []
+        for stock in self.target_stocks:
+            if self.safe_range.get(stock.code):
+                stocks.append(stock)
+            else:
+                missing.append(stock.code)
+        if missing:
+            logger.warning(f"{len(missing)} 只股票未配置安全区间，跳过计算: {missing}")
+
+        ranges = [self.safe_range[stock.code] for stock in stocks]
+        def column(key):
+            return np.array([r.get(key, 0) for r in ranges], dtype=np.float64)
+
+        self.range_stocks = stocks
+        self.range_codes = [stock.code for stock in stocks]
+        self.short_sma5 = column('short_sma5')
+        self.short_ema8 = column('short_ema8')
+        self.short_atr10 = column('short_atr10')
+        self.long_ema55 = column('long_ema55')
+        self.long_atr20 = column('long_atr20')
+        self.slope_ema55 = column('slope_ema55')
+        self.range_valid = ((self.short_sma5 != 0) & (self.short_ema8 != 0) & (self.short_atr10 != 0)
+                            & (self.long_ema55 != 0) & (self.long_atr20 != 0))
+        invalid = [code for code, valid in zip(self.range_codes, self.range_valid) if not valid]
+        if invalid:
+            logger.warning(f"{len(invalid)} 只股票读取安全区间数值失败，跳过计算: {invalid}")
+        self._range_source = self.target_stocks
+
     def trigger(self, ticks):
         """
-        触发策略判断
+        触发策略判断，全部股票的买卖条件按数组一次计算，只为触发的股票生成信号
         :param ticks: 相关股票行情数据字典
         :return: list of (股票对象, 交易类型, 交易数量, 策略标识) 或 空列表
         """
         trade_signals = []
 
-        market_tick = ticks.get(self.market_index)
-        if not market_tick:
-            market_tick_dict = xtdata.get_full_tick([self.market_index])
-            market_tick = market_tick_dict.get(self.market_index)
-            
         # 检查大盘状况
-        market_rise = self._check_market(market_tick)
+        market_rise = self.get_market_rise(ticks, self.market_index)
         if market_rise is None:
             logger.warning("获取大盘指标失败,set market_rise = 0")
             market_rise = 0
 
-        # 遍历所有目标股票
-        for stock in self.target_stocks:
-            
-            # 获取当前股票行情
-            tick = ticks.get(stock.code)
-            if not tick:
-                continue
-            safe_range = self.safe_range.get(stock.code, {})
-            if not safe_range:
-                logger.warning(f"股票 {stock.code} 未配置安全区间，跳过计算")
-                continue
-            current_price = tick['lastPrice']
-            stock.current_price = current_price
-            
-            
-            # 调用策略核心逻辑
-            signal = self._execute_strategy(stock, current_price, market_rise, safe_range)
-            if signal:
-                trade_signals.append(signal)
-                    
+        if self._range_source is not self.target_stocks:
+            self._build_range_arrays()
+        stocks = self.range_stocks
+        if not stocks:
+            return trade_signals
+
+        prices = TickBatch.from_ticks(ticks).take('lastPrice', self.range_codes)
+        has_tick = ~np.isnan(prices)
+        tick_rows = np.flatnonzero(has_tick)
+        if len(tick_rows) == 0:
+            return trade_signals
+        for i in tick_rows:
+            stocks[i].current_price = float(prices[i])
+
+        buy_step, sell_step = self._evaluate(np.where(has_tick, prices, 0.0), has_tick, market_rise)
+
+        for i in np.flatnonzero(buy_step | sell_step):
+            stock = stocks[i]
+            current_price = float(prices[i])
+            if buy_step[i]:
+                logger.info(f"触发买入信号， step{buy_step[i]} {stock.code},current_price:{current_price},cost_price:{stock.cost_price}, "
+                            f"short_ema8:{self.short_ema8[i]}, short_atr10:{self.short_atr10[i]}")
+                volume = self.get_buy_volume(stock, current_price)
+                trade_signals.append((stock, 'buy', volume, self.str_remark))
+            else:
+                logger.info(f"触发卖出信号， step{sell_step[i]} {stock.code}, current_price:{current_price},cost_price:{stock.cost_price},"
+                            f"open_price:{stock.open_price}, short_ema8:{self.short_ema8[i]}, short_atr10:{self.short_atr10[i]}, "
+                            f"long_ema55:{self.long_ema55[i]}, long_atr20:{self.long_atr20[i]}")
+                min_position = 0
+                if self.min_position_value > 0:
+                    min_position = self.min_position_value // current_price
+                volume = self.get_sell_volume(stock, current_price, stock.current_position, min_position)
+                if volume > 0:
+                    trade_signals.append((stock, 'sell', volume, self.str_remark))
+
         return trade_signals
 
-    def _execute_strategy(self, stock, current_price, market_rise, safe_range):
+    def _evaluate(self, prices, has_tick, market_rise):
         """
-        计算策略信号
-        :param stock: 股票对象
-        :param current_price: 当前价格
-        :param market_rise: 市场涨跌幅
-        TODO 暂时删除了 :param industry_rise: 行业涨跌幅，以及对应逻辑，后续有完备的行业数据再考虑
-        :return: 交易信号元组 (股票对象, 交易类型, 交易数量, 策略标识) 或 None
+        计算全部股票的买卖条件
+        :param prices: 最新价数组，与range_stocks对齐，没有行情的为0
+        :param has_tick: 本次推送中是否有行情
+        :param market_rise: 大盘涨跌幅
+        :return: (buy_step, sell_step)，触发的买入/卖出档位（1-3），不触发为0；买入优先，同一只股票不会同时触发
         """
-        # 判断买入条件
-        if self._should_buy(stock, current_price, market_rise, safe_range):
-            volume = self.get_buy_volume(stock, current_price)
-            return (stock, 'buy', volume,  self.str_remark)
-            
-        # 判断卖出条件
-        elif stock.current_position > 0 and self._should_sell(stock, current_price, market_rise, safe_range):
-            min_position = 0
-            if self.min_position_value  > 0:
-                min_position = self.min_position_value // current_price     
-            volume = self.get_sell_volume(stock, current_price, stock.current_position,  min_position)
-            if volume > 0:
-                return (stock, 'sell', volume,  self.str_remark)
-        
-        return None
-
-    def _should_buy(self, stock, current_price, market_rise, safe_range):
-        """判断是否应该买入"""
-
-        short_sma5 = safe_range.get('short_sma5', 0)
-        short_ema8 = safe_range.get('short_ema8', 0)
-        short_atr10 = safe_range.get('short_atr10', 0)
-        long_ema55 = safe_range.get('long_ema55', 0)
-        long_atr20 = safe_range.get('long_atr20', 0)
-        slope_ema55 = safe_range.get('slope_ema55', 0)
-        if short_sma5 == 0 or short_ema8 == 0 or short_atr10 == 0 or long_ema55 == 0 or long_atr20 == 0:
-            logger.warning(f"股票 {stock.code} 读取安全区间数值失败，跳过计算")
-            return False
-
-        if market_rise < -3:
-            logger.info(f"大盘不好，跳过，code:{stock.code}, market_rise:{market_rise}")
-            return False
-
-        #Regime Filter
-        if slope_ema55 < -0.09 or current_price < long_ema55 - long_atr20:
-            logger.info(f"当前趋势不好，跳过，code:{stock.code}, slope_ema55:{slope_ema55}")
-            return False
-        
-        if current_price > long_ema55 + long_atr20 * 2.5:
-            logger.info(f"当前价格高于长周期EMA55 + 2倍ATR20，跳过，code:{stock.code}, current_price:{current_price}, long_ema55:{long_ema55}, long_atr20:{long_atr20}")
-            return False
-
+        stocks = self.range_stocks
+        n = len(stocks)
+        positions = np.fromiter((stock.current_position for stock in stocks), dtype=np.float64, count=n)
+        cost_prices = np.fromiter((stock.cost_price for stock in stocks), dtype=np.float64, count=n)
+        open_prices = np.fromiter((stock.open_price for stock in stocks), dtype=np.float64, count=n)
+        current_value = positions * prices
+
+        ema8, atr10 = self.short_ema8, self.short_atr10
+        ema55, atr20 = self.long_ema55, self.long_atr20
+        active = has_tick & self.range_valid
+
+        # 买入：大盘过滤 + 趋势过滤(Regime Filter) + 价格上限，之后按仓位分三档
+        buy_allowed = (active & (market_rise >= -3)
+                       & ~(self.slope_ema55 < -0.09) & ~(prices < ema55 - atr20)
+                       & ~(prices > ema55 + atr20 * 2.5))
         # 没有持仓时的买入条件
-        if (stock.cost_price == 0 and current_price < (short_ema8 - self.buy_step1 * short_atr10) ):
-            logger.info(f"触发买入信号， step1 {stock.code},current_price:{current_price}, short_ema8:{short_ema8}, short_atr10:{short_atr10}")
-            return True
-        
-        current_value = stock.current_position * current_price
-
+        buy1 = (cost_prices == 0) & (prices < ema8 - self.buy_step1 * atr10)
         # 普通买入条件
-        if (current_value < self.soft_max_position_value and current_price < (short_ema8 - self.buy_step2 * short_atr10) ):
-            logger.info(f"触发买入信号， step2 {stock.code},current_price:{current_price},cost_price:{stock.cost_price}, short_ema8:{short_ema8}, short_atr10:{short_atr10}")
-            return True
-            
+        buy2 = (current_value < self.soft_max_position_value) & (prices < ema8 - self.buy_step2 * atr10)
         # 接近最大仓位的买入条件
-        if (current_value >= self.soft_max_position_value and 
-            current_value < self.max_position_value and 
-            (current_price < short_ema8 - self.buy_step3 * short_atr10 )):
-            logger.info(f"触发买入信号， step3 {stock.code},current_price:{current_price},cost_price:{stock.cost_price},short_ema8:{short_ema8}, short_atr10:{short_atr10}")
-            return True
-            
-        return False
-
-    def _should_sell(self, stock, current_price, market_rise, safe_range):
-        short_sma5 = safe_range.get('short_sma5', 0)
-        short_ema8 = safe_range.get('short_ema8', 0)
-        short_atr10 = safe_range.get('short_atr10', 0)
-        long_ema55 = safe_range.get('long_ema55', 0)
-        long_atr20 = safe_range.get('long_atr20', 0)
-        if short_sma5 == 0 or short_ema8 == 0 or short_atr10 == 0 or long_ema55 == 0 or long_atr20 == 0:
-            logger.warning(f"股票 {stock.code} 读取安全区间数值失败，跳过计算")
-            return False
-
-        if  market_rise < 4 and current_price > long_ema55 + long_atr20 * 2:
-            logger.info(f"触发卖出信号 当前价格高于长周期EMA55 + 2倍ATR20，卖出，code:{stock.code}, current_price:{current_price}, long_ema55:{long_ema55}, long_atr20:{long_atr20}")
-            return True
-        if  current_price > long_ema55 + long_atr20 * 3:
-            logger.info(f"触发卖出信号 当前价格高于长周期EMA55 + 3倍ATR20，卖出，code:{stock.code}, current_price:{current_price}, long_ema55:{long_ema55}, long_atr20:{long_atr20}")
-            return True
-        
-        """cost_price 为服务端返回的avg_price，可能为0甚至负数"""
-        if stock.open_price <= 0:
-            logger.info(f"开仓价为0，跳过，code:{stock.code}, cost_price:{stock.cost_price}, open_price:{stock.open_price}")
-            return False
-
-
-        current_value = stock.current_position * current_price
+        buy3 = ((current_value >= self.soft_max_position_value) & (current_value < self.max_position_value)
+                & (prices < ema8 - self.buy_step3 * atr10))
+        buy_step = np.select([buy1, buy2, buy3], [1, 2, 3], 0) * buy_allowed
+
+        # 卖出：价格远高于长周期均线时不看开仓价直接卖出
+        sell_high = (((market_rise < 4) & (prices > ema55 + atr20 * 2))
+                     | (prices > ema55 + atr20 * 3))
+        # cost_price 为服务端返回的avg_price，可能为0甚至负数，后面两档依赖open_price
         # 普通卖出条件
-        if (current_value > self.soft_min_position_value and current_price > ( short_ema8 + self.sell_step1 * short_atr10 ) ):
-            logger.info(f"触发卖出信号，  step1 {stock.code}, current_price:{current_price}, cost_price:{stock.cost_price},open_price:{stock.open_price},short_ema8 :{short_ema8} , short_atr10:{short_atr10}:")
-            return True
-            
+        sell1 = (current_value > self.soft_min_position_value) & (prices > ema8 + self.sell_step1 * atr10)
         # 接近最小仓位的卖出条件
-        if current_value <= self.soft_min_position_value and current_value > self.min_position_value:
-            if current_price > ( short_ema8 + self.sell_step2 * short_atr10):
-                logger.info(f"触发卖出信号， step2 {stock.code}, current_price:{current_price},cost_price:{stock.cost_price},open_price:{stock.open_price}, short_ema8 :{short_ema8} , short_atr10:{short_atr10}:")
-                return True
-
-        #因为cost_price 为服务端返回的avg_price，可能为0甚至负数，所以这里依赖open_price，但可能有问题，后续想想怎么弄
-        if current_value > self.min_position_value and current_price > stock.open_price * self.sell_increase_rate:
-            logger.info(f"触发卖出信号， step3 {stock.code}, current_price:{current_price},cost_price:{stock.cost_price},open_price:{stock.open_price}, short_ema8 :{short_ema8}, short_atr10:{short_atr10}:")
-            return True  
-        return False
+        sell2 = ((current_value <= self.soft_min_position_value) & (current_value > self.min_position_value)
+                 & (prices > ema8 + self.sell_step2 * atr10))
+        # 涨幅达到阈值
+        sell3 = (current_value > self.min_position_value) & (prices > open_prices * self.sell_increase_rate)
+        sell_by_open = (open_prices > 0) & (sell1 | sell2 | sell3)
+        sell_allowed = active & (buy_step == 0) & (positions > 0)
+        # 直接卖出的档位记为4，便于日志区分
+        sell_step = np.select([sell_high, sell_by_open & sell1, sell_by_open & sell2, sell_by_open & sell3],
+                              [4, 1, 2, 3], 0) * sell_allowed
+        return buy_step, sell_step
+
+    def _history_range(self):
+        """历史数据日期范围（最近7个交易日，约10个自然日）"""
+        end_date = datetime.now().strftime('%Y%m%d')
+        start_date = get_calendar().days_back(end_date, 7)
+        return start_date, end_date
+
+    def get_data_requirements(self):
+        start_date, end_date = self._history_range()
+        return [([stock.code for stock in self.target_stocks], '1d', start_date, end_date)]
 
     def fill_data(self):
         try:
@@ -215,13 +216,13 @@ class Strategy1001(BaseStrategy):
                 return False
                 
             # 计算日期范围（过去10天）
-            end_date = datetime.now().strftime('%Y%m%d')
-            start_date = (datetime.now() - timedelta(days=10)).strftime('%Y%m%d')
+            start_date, end_date = self._history_range()
             
             # 获取历史均价 - 修改这里，直接使用静态方法
             self.code2daily = DataProvider.get_daily_data(code_list, start_date, end_date)
-            # 计算历史均价
-            self.code2avg = {code: sum(prices) / len(prices) for code, prices in self.code2daily.items() if prices}
+            # 计算历史均价，价格行与交易日对齐，停牌日没有价格
+            self.code2avg = {code: float(prices[prices > 0].mean()) for code, prices in self.code2daily.items()
+                             if (prices > 0).any()}
             
             # 检查数据是否获取成功
             if not self.code2avg:
@@ -229,6 +230,7 @@ class Strategy1001(BaseStrategy):
                 return False
                 
             logger.info(f"成功获取 {len(self.code2avg)} 只股票的历史均价数据")
+            self._build_range_arrays()
             self.data_ready = True
             return True
             
@@ -1,7 +1,8 @@
-from datetime import datetime, timedelta
+from datetime import datetime
 from logger import logger  
 from data_provider import DataProvider
 from .base_strategy import BaseStrategy
+from trade_calendar import get_calendar
 import numpy as np
 
 class Strategy1002(BaseStrategy):
@@ -15,6 +16,7 @@ class Strategy1002(BaseStrategy):
         self.str_remark = "str1002"
         # 历史数据
         self.code2daily = {}  # 股票代码到历史价格的映射
+        self.code2ma_state = {}  # 股票代码到当天不变的均线状态，见_build_ma_state
         
         # 策略参数
         self.short_period = 5        # 短期均线周期
@@ -36,68 +38,60 @@ class Strategy1002(BaseStrategy):
         :return: list of (股票对象, 交易类型, 交易数量, 策略标识) 或 空列表
         """
         trade_signals = []
-        now = int(datetime.now().timestamp())
         
         # 遍历所有目标股票
-        for stock in self.target_stocks:
-            # 获取当前股票行情
-            tick = ticks.get(stock.code)
-            if not tick:
+        current_prices = self.get_current_prices(ticks)
+        for stock, current_price in zip(self.target_stocks, current_prices):
+            # 本次推送中没有该股票行情
+            if np.isnan(current_price):
                 continue
                 
-            current_price = tick['lastPrice']
+            current_price = float(current_price)
             stock.current_price = current_price
             
-            # 更新价格历史
-            if stock.code in self.code2daily:
-                # 获取历史价格数据（不修改）
-                prices = self.code2daily[stock.code]
-            
-                
-                # 调用策略核心逻辑（prices 不包含最新价格
-                singal  = self._execute_strategy(stock, prices, current_price)
+            # 调用策略核心逻辑，均线状态在fill_data中预先计算（不包含最新价格）
+            ma_state = self.code2ma_state.get(stock.code)
+            if ma_state:
+                singal = self._execute_strategy(stock, ma_state, current_price)
                 if singal:
                     trade_signals.append(singal)
                 
         return trade_signals
 
-    def _execute_strategy(self, stock, prices, current_price):
+    def _build_ma_state(self, prices):
         """
-        计算策略信号
-        :param code: 股票代码
-        :param prices: 价格序列
-        :return: 交易信号元组 (股票对象, 交易类型, 交易数量, 策略标识) 或 None
+        根据历史价格预先计算当天不变的均线状态
+        :param prices: 历史价格序列（不包含当天最新价格），与交易日对齐，停牌日不计入均线
+        :return: (前N-1日收盘价之和（短期）, 前N-1日收盘价之和（长期）, 前一天的短期均线, 前一天的长期均线)，数据不足返回None
         """
-        # 确保有足够的数据计算均线
+        prices = np.asarray(prices, dtype=np.float64)
+        prices = prices[prices > 0]
         if len(prices) < self.long_period:
-            logger.warning(f"股票 {stock.code} 历史数据长度不足 {self.long_period} 天，跳过计算")
             return None
-        
+        # 周期为1时前N-1日为空，不能写成prices[-0:]
+        short_base = prices[len(prices) - (self.short_period - 1):].sum()
+        long_base = prices[len(prices) - (self.long_period - 1):].sum()
+        prev_short_ma = prices[-self.short_period:].mean()
+        prev_long_ma = prices[-self.long_period:].mean()
+        return (short_base, long_base, prev_short_ma, prev_long_ma)
+
+    def _execute_strategy(self, stock, ma_state, current_price):
+        """
+        计算策略信号
+        :param stock: 股票对象
+        :param ma_state: 均线状态，见_build_ma_state
+        :param current_price: 最新价格
+        :return: 交易信号元组 (股票对象, 交易类型, 交易数量, 策略标识) 或 None
+        """
         # 检查今天是否已经触发过该股票的信号
         if stock.code in self.code2hit:
             return None
-        # 计算需要的最大长度
-        max_length = max(self.short_period, self.long_period) + 5
-        
-        # 直接创建合适长度的临时价格序列
-        if len(prices) >= max_length:
-            temp_prices = prices[-max_length+1:].copy()
-        else:
-            temp_prices = prices.copy()
 
-        # 添加最新价格
-        temp_prices.append(current_price)
-            
-        # 计算均线
-        short_ma = np.mean(temp_prices[-self.short_period:])
-        long_ma = np.mean(temp_prices[-self.long_period:])
-        
-        # 计算前一天的均线
-        prev_short_ma = np.mean(temp_prices[-(self.short_period+1):-1])
-        prev_long_ma = np.mean(temp_prices[-(self.long_period+1):-1])
-        #logger.info(f"股票 {stock.code} 前一天的短期均线: {prev_short_ma}, 前一天的长期均线: {prev_long_ma}")
-        #logger.info(f"股票 {stock.code} 当天的短期均线: {short_ma}, 当天的长期均线: {long_ma}")
-        
+        short_base, long_base, prev_short_ma, prev_long_ma = ma_state
+        # 加上最新价格计算当天均线
+        short_ma = (short_base + current_price) / self.short_period
+        long_ma = (long_base + current_price) / self.long_period
+
         # 判断金叉
         golden_cross = prev_short_ma <= prev_long_ma and short_ma > long_ma
         # 判断死叉
@@ -120,10 +114,28 @@ class Strategy1002(BaseStrategy):
             return (stock, 'sell', sell_amount, self.str_remark)
         
         return None
+
+    def _calc_crossovers(self, prices):
+        """
+        向量化计算整段历史每天的金叉/死叉
+        :param prices: 历史价格序列
+        :return: (golden_cross, death_cross)，对应第 long_period 天到最后一天
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        windows = np.lib.stride_tricks.sliding_window_view
+        # short_ma[k] / long_ma[k] 为截止到第 k+long_period-1 天的均线
+        short_ma = windows(prices, self.short_period).mean(axis=1)[self.long_period - self.short_period:]
+        long_ma = windows(prices, self.long_period).mean(axis=1)
+        prev_short_ma, today_short_ma = short_ma[:-1], short_ma[1:]
+        prev_long_ma, today_long_ma = long_ma[:-1], long_ma[1:]
+        golden_cross = (prev_short_ma <= prev_long_ma) & (today_short_ma > today_long_ma)
+        death_cross = (prev_short_ma >= prev_long_ma) & (today_short_ma < today_long_ma)
+        return golden_cross, death_cross
         
     def back_test(self):
         """
         回测策略在历史数据上的表现
+        每个交易日各自判断，整段历史一次向量化计算
         """
         backtest_signals = []
         # 遍历所有目标股票
@@ -131,23 +143,37 @@ class Strategy1002(BaseStrategy):
             if stock.code not in self.code2daily:
                 continue
             
-            prices = self.code2daily[stock.code]
+            # 停牌日没有价格，不计入均线；cols为有价格的交易日在价格行中的位置
+            row = self.code2daily[stock.code]
+            cols = np.flatnonzero(row > 0)
+            prices = row[cols]
             if len(prices) < self.long_period:
                 logger.warning(f"股票 {stock.code} 历史数据长度不足 {self.long_period} 天，跳过回测")
                 continue
             
-            round_count = len(prices) - self.long_period
-            for i in range(round_count):
-                current_price = prices[i + self.long_period]
-                # 执行策略逻辑
-                signal = self._execute_strategy(stock, prices[i:i+self.long_period], current_price)
-                if signal:
-                    #在交易信号中添加idx，方便后续反查交易日期
-                    backtest_signals.append(signal + (i+self.long_period,))
+            golden_cross, death_cross = self._calc_crossovers(prices)
+            for k in np.flatnonzero(golden_cross | death_cross):
+                idx = int(cols[int(k) + self.long_period])
+                current_price = row[idx]
+                trade_type = 'buy' if golden_cross[k] else 'sell'
+                #在交易信号中添加idx（与交易日对齐的位置），方便后续反查交易日期
+                backtest_signals.append((stock, trade_type, self.single_trade_value // current_price, self.str_remark, idx))
 
         return backtest_signals
 
 
+    def _history_range(self):
+        """实盘历史数据日期范围，按交易日计算，保证长期均线有足够的数据"""
+        end_date = datetime.now().strftime("%Y%m%d")
+        start_date = get_calendar().days_back(end_date, self.long_period + 5)
+        return start_date, end_date
+
+    def get_data_requirements(self):
+        start_date, end_date = self._history_range()
+        code_list = [stock.code for stock in self.target_stocks]
+        code_list.append(self.market_index)
+        return [(code_list, '1d', start_date, end_date)]
+
     def fill_data(self, start_date=None, end_date=None):
         try:
             # 获取所有目标股票代码
@@ -158,17 +184,24 @@ class Strategy1002(BaseStrategy):
                 return False
             
             if start_date is None:
-                start_date = (datetime.now() - timedelta(days=30)).strftime("%Y%m%d")
-                end_date = datetime.now().strftime("%Y%m%d")
+                start_date, end_date = self._history_range()
             
             # 获取历史价格数据 - 修改这里，直接使用静态方法
-            self.code2daily = DataProvider.get_daily_data(code_list, start_date, end_date)
+            # 价格行与daily_dates对齐，回测信号的idx按它换算交易日
+            panel = DataProvider.get_price_panel(code_list, start_date, end_date)
+            self.code2daily = panel.get_code2daily(code_list)
+            self.daily_dates = panel.dates
             
-            # 初始化信号状态
+            # 初始化信号状态，预先计算当天不变的均线部分
+            self.code2ma_state = {}
             for code in code_list:
                 prices = self.code2daily.get(code, [])
-                if len(prices) >= self.long_period:    
-                    logger.info(f"股票 {code} 历史数据长度: {len(prices)}")  
+                ma_state = self._build_ma_state(prices)
+                if ma_state:
+                    self.code2ma_state[code] = ma_state
+                    logger.info(f"股票 {code} 历史数据长度: {int((prices > 0).sum())}")  
+                else:
+                    logger.warning(f"股票 {code} 历史数据长度不足 {self.long_period} 天，跳过计算")
             
             # 清空code2hit字典，准备新的交易日
             self.code2hit = {}
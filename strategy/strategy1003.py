@@ -1,10 +1,15 @@
-from datetime import datetime, timedelta
+import os
+import json
+from datetime import datetime
 from logger import logger  
 from .base_strategy import BaseStrategy
+from trade_calendar import get_calendar
 from indicators import TechnicalIndicators
 from data_provider import DataProvider
 import numpy as np
 
+CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'cache', 'strategy1003')
+
 class Strategy1003(BaseStrategy):
     """
     KDJ与价格分位数结合策略
@@ -18,6 +23,7 @@ class Strategy1003(BaseStrategy):
         self.str_remark = "str1003"
         # 历史数据
         self.code2daily = {}  # 股票代码到历史价格的映射
+        self.code2state = {}  # 股票代码到当天不变的指标状态，见_build_daily_state
         
         # 策略参数
         self.kdj_period = 9        # KDJ计算周期
@@ -43,22 +49,19 @@ class Strategy1003(BaseStrategy):
         trade_signals = []
         
         # 遍历所有目标股票
-        for stock in self.target_stocks:
-            # 获取当前股票行情
-            tick = ticks.get(stock.code)
-            if not tick:
+        current_prices = self.get_current_prices(ticks)
+        for stock, current_price in zip(self.target_stocks, current_prices):
+            # 本次推送中没有该股票行情
+            if np.isnan(current_price):
                 continue
                 
-            current_price = tick['lastPrice']
+            current_price = float(current_price)
             stock.current_price = current_price
             
-            # 更新价格历史并执行策略
-            if stock.code in self.code2daily:
-                # 添加当前价格到历史数据
-                prices = self.code2daily[stock.code]
-                
-                # 执行策略逻辑
-                signal = self._execute_strategy(stock, prices, current_price)
+            # 指标状态在开盘前预先计算，盘中只比较当前价格
+            daily_state = self.code2state.get(stock.code)
+            if daily_state:
+                signal = self._execute_strategy(stock, daily_state, current_price)
                 if signal:
                     trade_signals.append(signal)
         
@@ -77,7 +80,8 @@ class Strategy1003(BaseStrategy):
             if stock.code not in self.code2daily:
                 continue
             
-            prices = self.code2daily[stock.code]
+            # KDJ逐日递推，使用Python列表比逐个访问ndarray元素更快
+            prices = self.code2daily[stock.code].tolist()
             if len(prices) < self.long_period:
                 logger.warning(f"股票 {stock.code} 历史数据长度不足 {self.long_period} 天，跳过回测")
                 continue
@@ -86,23 +90,23 @@ class Strategy1003(BaseStrategy):
             for i in range(round_count):
                 current_price = prices[i + self.long_period]
                 # 执行策略逻辑
-                signal = self._execute_strategy(stock, prices[i:i+self.long_period], current_price)
+                daily_state = self._build_daily_state(stock.code, prices[i:i+self.long_period])
+                signal = self._execute_strategy(stock, daily_state, current_price) if daily_state else None
                 if signal:
                     #在交易信号中添加idx，方便后续反查交易日期
                     backtest_signals.append(signal + (i+self.long_period,))
 
         return backtest_signals
     
-    def _execute_strategy(self, stock, prices, current_price):
+    def _build_daily_state(self, code, prices):
         """
-        执行策略逻辑
-        :param stock: 股票对象
+        计算当天不变的指标状态，KDJ和分位数都只依赖历史价格（不包含当前价格）
+        :param code: 股票代码
         :param prices: 历史价格序列,不包含当前价格
-        :param current_price: 当前价格
-        :return: (股票对象, 交易类型, 交易数量, 策略标记) 或 None
+        :return: (K, D, J, 75分位数, 中位数)，数据不足或计算失败返回None
         """
         if len(prices) < self.long_period:
-            logger.warning(f"股票 {stock.code} 历史数据长度不足 {self.long_period} 天，跳过")   
+            logger.warning(f"股票 {code} 历史数据长度不足 {self.long_period} 天，跳过")   
             return None
             
         # 计算KDJ指标
@@ -118,25 +122,86 @@ class Strategy1003(BaseStrategy):
             outlier_count=self.outlier_count
         )
         
-        # 只有当两个指标都计算成功时才生成信号
-        if k is not None and d is not None and j is not None and status:
-            max_value, q3, median, q1, min_value = stats
-            
-            # 卖出信号：J值超买 + 价格高于75分位数
-            if j > self.j_high and current_price > q3 and stock.current_position > 0:
-                logger.info(f"触发卖出信号: 股票 {stock.code} J值={j:.2f} > {self.j_high}, 价格={current_price:.2f} > 75分位数={q3:.2f}")
-                sell_amount = self.single_trade_value // current_price
-                if sell_amount > 0:
-                    return (stock, 'sell', sell_amount, self.str_remark)
+        # 只有当两个指标都计算成功时才生成状态
+        if k is None or d is None or j is None or not status:
+            return None
+        max_value, q3, median, q1, min_value = stats
+        return (k, d, j, q3, median)
+
+    def _execute_strategy(self, stock, daily_state, current_price):
+        """
+        执行策略逻辑
+        :param stock: 股票对象
+        :param daily_state: 当天的指标状态，见_build_daily_state
+        :param current_price: 当前价格
+        :return: (股票对象, 交易类型, 交易数量, 策略标记) 或 None
+        """
+        k, d, j, q3, median = daily_state
             
-            # 买入信号：J值超卖 + 价格低于中位数
-            elif j < self.j_low and current_price < median:
-                logger.info(f"触发买入信号: 股票 {stock.code} J值={j:.2f} < {self.j_low}, 价格={current_price:.2f} < 中位数={median:.2f}")
-                buy_amount = self.single_trade_value // current_price
-                return (stock, 'buy', buy_amount, self.str_remark)
+        # 卖出信号：J值超买 + 价格高于75分位数
+        if j > self.j_high and current_price > q3 and stock.current_position > 0:
+            logger.info(f"触发卖出信号: 股票 {stock.code} J值={j:.2f} > {self.j_high}, 价格={current_price:.2f} > 75分位数={q3:.2f}")
+            sell_amount = self.single_trade_value // current_price
+            if sell_amount > 0:
+                return (stock, 'sell', sell_amount, self.str_remark)
+        
+        # 买入信号：J值超卖 + 价格低于中位数
+        elif j < self.j_low and current_price < median:
+            logger.info(f"触发买入信号: 股票 {stock.code} J值={j:.2f} < {self.j_low}, 价格={current_price:.2f} < 中位数={median:.2f}")
+            buy_amount = self.single_trade_value // current_price
+            return (stock, 'buy', buy_amount, self.str_remark)
         
         return None
 
+    def _state_cache_file(self, date):
+        return os.path.join(CACHE_DIR, f"{date}_{self.kdj_period}_{self.long_period}_{self.outlier_count}.json")
+
+    def _load_daily_state(self, date, code_list):
+        """
+        加载当天已计算的指标状态，重启时跳过拉取历史数据和重新计算
+        :return: 缓存覆盖全部股票时返回True
+        """
+        path = self._state_cache_file(date)
+        if not os.path.exists(path):
+            return False
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                code2state = json.load(f)
+        except Exception as e:
+            logger.error(f"加载指标状态缓存失败: {e}", exc_info=True)
+            return False
+        # 计算失败的股票也会记录（值为null），缺少记录说明股票列表有变化
+        if any(code not in code2state for code in code_list):
+            return False
+        self.code2state = {code: tuple(state) for code, state in code2state.items() if state}
+        return True
+
+    def _save_daily_state(self, date, code_list):
+        """保存当天的指标状态"""
+        try:
+            if not os.path.exists(CACHE_DIR):
+                os.makedirs(CACHE_DIR)
+            code2state = {code: self.code2state.get(code) for code in code_list}
+            with open(self._state_cache_file(date), 'w', encoding='utf-8') as f:
+                json.dump(code2state, f)
+        except Exception as e:
+            logger.error(f"保存指标状态缓存失败: {e}", exc_info=True)
+
+    def _history_range(self):
+        """实盘历史数据日期范围（最近245个交易日，约一年）"""
+        end_date = datetime.now().strftime("%Y%m%d")
+        start_date = get_calendar().days_back(end_date, 245)
+        return start_date, end_date
+
+    def get_data_requirements(self):
+        start_date, end_date = self._history_range()
+        # 当天的指标状态已缓存时不需要历史数据
+        if os.path.exists(self._state_cache_file(end_date)):
+            return []
+        code_list = [stock.code for stock in self.target_stocks]
+        code_list.append(self.market_index)
+        return [(code_list, '1d', start_date, end_date)]
+
     def fill_data(self, start_date=None, end_date=None):
         try:
             # 获取所有目标股票代码
@@ -146,13 +211,21 @@ class Strategy1003(BaseStrategy):
                 logger.warning("没有目标股票，无法获取历史数据")
                 return False
     
-            if start_date is None:
-                start_date = (datetime.now() - timedelta(days=365)).strftime("%Y%m%d")
-                end_date = datetime.now().strftime("%Y%m%d")
+            # 实盘模式下，当天的指标状态只计算一次并缓存
+            live = start_date is None
+            if live:
+                start_date, end_date = self._history_range()
+                if self._load_daily_state(end_date, code_list):
+                    logger.info(f"使用缓存的指标状态 {end_date}，股票数量 {len(self.code2state)}")
+                    self.data_ready = True
+                    return True
             
             trade_days = DataProvider.get_trading_calendar(start_date, end_date)
             # 获取历史价格数据 - 修改这里，直接使用静态方法
-            self.code2daily = DataProvider.get_daily_data(code_list, start_date, end_date)
+            # 价格行与daily_dates对齐，回测信号的idx按它换算交易日
+            panel = DataProvider.get_price_panel(code_list, start_date, end_date)
+            self.code2daily = panel.get_code2daily(code_list)
+            self.daily_dates = panel.dates
             
             # 数据完整性验证
             data_lengths = {}
@@ -161,7 +234,8 @@ class Strategy1003(BaseStrategy):
                 prices = self.code2daily.get(code, [])
                 data_lengths[code] = len(prices)
                 
-                if len(prices) > self.long_period and len(prices) == len(trade_days):
+                # 价格行与交易日对齐，有停牌（没有价格）的股票不参与
+                if len(prices) > self.long_period and len(prices) == len(trade_days) and (prices > 0).all():
                     valid_codes.append(code)
                 else:
                     logger.info(f"股票{code} 获得的价格数量 {len(prices)} 不符合预期")
@@ -170,6 +244,15 @@ class Strategy1003(BaseStrategy):
             self.code2daily = {code: self.code2daily[code] for code in valid_codes}
             
             logger.info(f"成功获取 {len(self.code2daily)} 只股票的有效历史价格数据")
+
+            # 开盘前预先计算指标状态，盘中不再重复计算
+            self.code2state = {}
+            for code, prices in self.code2daily.items():
+                daily_state = self._build_daily_state(code, prices)
+                if daily_state:
+                    self.code2state[code] = daily_state
+            if live:
+                self._save_daily_state(end_date, code_list)
             self.data_ready = True
             return True
             
@@ -1,7 +1,9 @@
 from .base_strategy import BaseStrategy
 from data.tick_sequence import TickSequence
+from data.minute_bar import MinuteBarAggregator
+from data.volume_profile import VolumeProfile, minute_index, TRADING_MINUTES
 from data_provider import DataProvider
-from xtquant import xtdata
+from trade_calendar import get_calendar
 import numpy as np
 import datetime
 from logger import logger 
@@ -20,20 +22,19 @@ class Strategy1004(BaseStrategy):
         self.str_remark = "str1004"
 
         self.correlations_results = correlations
-        self.a_codes = []
-        a_code_count = 0
+        # 关联A股按相关性强弱排优先级，订阅位由SubscriptionManager统一分配，不再在这里截断
+        self.a_code2priority = {}
         for k, v in self.correlations_results.items():
-            if a_code_count > 98: #手动订阅 有100的限制，开Vip可以到300
-                break
             sim_stocks = v['similar_stocks']
-            for stock in sim_stocks:
-                self.a_codes.append(stock.get('code'))
-                a_code_count += 1
-
-        self.a_codes = list(set(self.a_codes))
-        #TODO
-        for code in self.a_codes:
-            xtdata.subscribe_quote(code, period='1m', count=-1)
+            for rank, stock in enumerate(sim_stocks):
+                code = stock.get('code')
+                priority = abs(stock.get('correlation', 1.0 / (rank + 1)))
+                self.a_code2priority[code] = max(priority, self.a_code2priority.get(code, 0))
+
+        self.a_codes = list(self.a_code2priority.keys())
+        self.a_code_set = set(self.a_codes)
+        # 关联A股的分钟线由订阅的tick在本地聚合，不再每次回调拉取分钟线
+        self.bar_aggregator = MinuteBarAggregator()
         
         logger.info(f"策略1004初始化，关联股票数量 {len(self.a_codes)}")
 
@@ -48,7 +49,82 @@ class Strategy1004(BaseStrategy):
         self.single_trade_value = 8000
 
         self.code2tick_seq =  {}  
+        self.volume_profile = VolumeProfile([], np.zeros((0, TRADING_MINUTES)), None, 5)
+
+        self._build_pair_arrays()
+
+    @classmethod
+    def from_params(cls, params):
+        return cls(params["target_codes"], params["correlations"])
+
+    def _build_pair_arrays(self):
+        """
+        将相关性结果展开为扁平的 北交所-A股 配对数组，盘中按数组整体计算
+        只保留已订阅且有有效均值/标准差的配对
+        """
+        self.bj_codes = list(self.correlations_results.keys())
+        self.bj_code2idx = {code: i for i, code in enumerate(self.bj_codes)}
+        self.a_code2idx = {code: i for i, code in enumerate(self.a_codes)}
+        self.bj_stocks = [None] * len(self.bj_codes)     # 与bj_codes对齐的股票对象，fill_data/trigger时绑定
+        self._stocks_bound = False
+
+        pair_bj, pair_a, pair_mean, pair_std, pair_yz = [], [], [], [], []
+        for bj_code, v in self.correlations_results.items():
+            for a_stock in v.get('similar_stocks', []):
+                a_idx = self.a_code2idx.get(a_stock.get('code'))
+                mean = a_stock.get('mean')
+                std = a_stock.get('std')
+                if a_idx is None or mean is None or std is None or std == 0:
+                    continue
+                yesterday_z_score = a_stock.get('z_score')
+                pair_bj.append(self.bj_code2idx[bj_code])
+                pair_a.append(a_idx)
+                pair_mean.append(mean)
+                pair_std.append(std)
+                pair_yz.append(np.nan if yesterday_z_score is None else yesterday_z_score)
 
+        self.pair_bj = np.array(pair_bj, dtype=np.int64)
+        self.pair_a = np.array(pair_a, dtype=np.int64)
+        self.pair_mean = np.array(pair_mean, dtype=np.float64)
+        self.pair_std = np.array(pair_std, dtype=np.float64)
+        self.pair_yz = np.array(pair_yz, dtype=np.float64)
+        self.pair_has_yz = ~np.isnan(self.pair_yz)
+
+        # 关联A股最新价和昨收，随tick增量更新
+        self.a_last_price = np.zeros(len(self.a_codes), dtype=np.float64)
+        self.a_last_close = np.zeros(len(self.a_codes), dtype=np.float64)
+        # 关联A股在分钟成交量画像中的行号，fill_data后更新
+        self.a_profile_rows = np.full(len(self.a_codes), -1, dtype=np.int64)
+        logger.info(f"策略1004配对数量 {len(self.pair_bj)}")
+
+    def _bind_stocks(self):
+        """绑定北交所股票对象，target_stocks由外部在初始化后设置"""
+        for stock in self.target_stocks:
+            idx = self.bj_code2idx.get(stock.code)
+            if idx is not None:
+                self.bj_stocks[idx] = stock
+        self._stocks_bound = True
+
+    def _on_a_tick(self, code, tick):
+        """关联A股tick：更新分钟线和最新价数组"""
+        self.bar_aggregator.add_tick(code, tick)
+        idx = self.a_code2idx.get(code)
+        if idx is not None:
+            self.a_last_price[idx] = tick.get('lastPrice', 0)
+            self.a_last_close[idx] = tick.get('lastClose', 0)
+
+    def get_quote_requests(self):
+        """关联A股需要单股tick订阅，优先级为相关性强弱"""
+        return self.a_code2priority
+
+    def on_quote(self, datas):
+        """
+        关联A股的tick订阅回调
+        :param datas: {股票代码: [tick字典, ...]}
+        """
+        for code, tick_list in datas.items():
+            for tick in tick_list:
+                self._on_a_tick(code, tick)
         
     def trigger(self, ticks):
         """
@@ -57,288 +133,150 @@ class Strategy1004(BaseStrategy):
         :return: list of (股票对象, 交易类型, 交易数量, 策略标识) 或 空列表
         """
         trade_signals = []
+        if not self._stocks_bound:
+            self._bind_stocks()
+
+        n_bj = len(self.bj_codes)
+        bj_price = np.zeros(n_bj, dtype=np.float64)
+        bj_increase = np.zeros(n_bj, dtype=np.float64)
+        bj_active = np.zeros(n_bj, dtype=bool)
         for code, tick in ticks.items():
-            if code in self.target_codes:
+            bj_idx = self.bj_code2idx.get(code)
+            if bj_idx is not None:
                 if code not in self.code2tick_seq:
                     self.code2tick_seq[code] = TickSequence(code)          
                 self.code2tick_seq[code].add_tick(tick)
-        
+                stock = self.bj_stocks[bj_idx]
+                current_price = tick['lastPrice']
+                lastClose = tick['lastClose']
+                if stock is None or current_price <= 0:
+                    continue
+                stock.current_price = current_price
+                bj_price[bj_idx] = current_price
+                # 计算股票涨幅
+                bj_increase[bj_idx] = current_price/lastClose - 1 if lastClose else 0
+                bj_active[bj_idx] = True
+            elif code in self.a_code_set:
+                # 全推行情里如果也包含关联A股，同样更新
+                self._on_a_tick(code, tick)
+
+        if not bj_active.any() or len(self.pair_bj) == 0:
+            return trade_signals
 
         current_time = datetime.datetime.now()
         #说明0931分钟对应的是 093000 --093059的数据，所以这里不再-1，直接用当前分钟数就是取前一个分钟的数据
         # 格式化为"YYYYMMDDHHMMSS"格式
         current_minute = current_time.strftime('%Y%m%d%H%M00')
+        minute_idx = minute_index(current_minute)
 
-        #获取最近1分钟数据
-        code2data = self.get_minute_data(self.a_codes, current_minute)
-        #获取最新tick数据，为了最新价格和昨日收盘
-        code2realtime = DataProvider.get_full_ticks(self.a_codes)
+        # 关联A股当前分钟成交量和历史同一分钟平均成交量
+        today_volume = self.bar_aggregator.get_volumes(self.a_codes, current_minute)
+        history_volume = np.zeros(len(self.a_codes), dtype=np.float64)
+        rows = self.a_profile_rows
+        if minute_idx >= 0:
+            has_row = rows >= 0
+            history_volume[has_row] = self.volume_profile.matrix[rows[has_row], minute_idx]
 
-        # 遍历所有目标股票
-        for stock in self.target_stocks:
-            bj_code = stock.code
-            cor_result = self.correlations_results.get(bj_code, {})
-            if not cor_result:
-                logger.warning(f"股票{bj_code}没有对应的A股股票")
-                continue
-            
-            if bj_code not in self.code2tick_seq:
-                logger.warning(f"股票{bj_code}没有对应的tick序列")
-                #TODO get_full_tick 获取最近的历史数据
-                continue
-
-            tick = ticks.get(bj_code)
-            if not tick:
-                continue
-                
-            current_price = tick['lastPrice']
-            lastClose = tick['lastClose']
-            stock.current_price = current_price  
-
-            #slope, pct = self.code2tick_seq[bj_code].calculate_price_trend()
-            # 计算股票涨幅
-            bj_increase = current_price/lastClose - 1 if lastClose else 0
-            logger.info(f"股票{bj_code}涨幅 {bj_increase:.2%} ")
-            
-            # 获取相关联的A股股票
-            sim_stocks = cor_result.get('similar_stocks', [])
-            if not sim_stocks:
-                logger.warning(f"股票{bj_code}没有对应的A股相似股票")
-                continue
-                
-            strong_buy = 0
-            strong_sell = 0
-
-            # 遍历所有关联的A股股票
-            #这里逻辑有个调整，涨幅判断依赖实时取的分钟及数据，然后和昨日收盘价对比
-            sell_remark = []
-            buy_remark = []
-            for a_stock in sim_stocks:
-                buy_support = 0
-                sell_support = 0
-                a_code = a_stock['code']
-                tick = code2realtime.get(a_code, {})
-                lastPrice = tick.get('lastPrice', 0)
-                lastClose = tick.get('lastClose', 0)
-                openPrice = tick.get('open', 0)
-                    
-                if not lastPrice or not lastClose:
-                    logger.warning(f"股票{a_code}没有对应的lastPrice,lastClose")
-                    continue
-                a_pct = lastPrice/lastClose - 1
-                
-                today_minutes = code2data.get(a_code, {})
-                today_minute_volume = today_minutes.get('volume', 0)
-                history_minutes = self.code2minutes_data.get(a_code, {})
-                history_avg_volume = history_minutes.get(current_minute, 0)
-                # 检查最近一分钟成交量是否是过去5个交易日同一时间成交量的3倍以上
-                volume_multiple = today_minute_volume / history_avg_volume if history_avg_volume else 0 
-                volume_surge = volume_multiple >= 3.0
-                
-                # 获取北交所股票当前价格
-                bj_current_price = stock.current_price
-                # 获取A股股票当前价格
-                a_current_price = lastPrice
-                # 计算比值
-                price_ratio = np.log(bj_current_price / a_current_price) if a_current_price else 0
-                
-                # 获取均值和标准差
-                mean = a_stock.get('mean')
-                std = a_stock.get('std')
+        # 所有配对一次性计算
+        pb = self.pair_bj
+        pa = self.pair_a
+        a_price = self.a_last_price[pa]
+        a_close = self.a_last_close[pa]
+        valid = bj_active[pb] & (a_price > 0) & (a_close > 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            a_pct = np.where(valid, a_price / a_close - 1, 0.0)
+            pair_bj_increase = bj_increase[pb]
+            price_ratio = np.where(valid, np.log(bj_price[pb] / a_price), 0.0)
+            z_score = (price_ratio - self.pair_mean) / self.pair_std
+            # 最近一分钟成交量是否是过去5个交易日同一时间成交量的3倍以上
+            hist = history_volume[pa]
+            volume_multiple = np.where(hist > 0, today_volume[pa] / hist, 0.0)
+        volume_surge = volume_multiple >= 3.0
+        dz = z_score - self.pair_yz
 
-                if mean is not None and std is not None and std != 0:
-                    current_z_score = (price_ratio - mean) / std
-                else:
-                    continue
+        # 满足成交量激增条件，且涨幅差大于3%
+        buy_volume = valid & volume_surge & (a_pct - pair_bj_increase > 0.03) & (z_score < -0.5)
+        sell_drop = valid & (a_pct < pair_bj_increase - 0.07) & (a_pct < -0.03)
+        # z-score相关判断，依赖昨日z-score
+        has_yz = valid & self.pair_has_yz
+        buy_z = has_yz & (((z_score < self.undervalued) & (dz < -0.3)) | (z_score < 0 - self.outlier_value))
+        sell_z = has_yz & (((z_score > self.overvalued) & (dz > 0.3)) | (z_score > self.outlier_value))
 
-                # 如果满足成交量激增条件，且涨幅差大于3%，buy_support加1
-                if volume_surge and (a_pct - bj_increase > 0.03) and current_z_score < -0.5:
-                    buy_remark.append(f"股票{a_code}  量价齐涨 分钟点 {current_minute}今日成交量 {today_minute_volume}, 历史平均成交量 {history_avg_volume},今日涨幅: {a_pct:.2%}")
-                    buy_support += 1
+        strong_buy = np.bincount(pb, weights=buy_volume | buy_z, minlength=n_bj)
+        strong_sell = np.bincount(pb, weights=sell_drop | sell_z, minlength=n_bj)
 
-                if a_pct < bj_increase - 0.07 and a_pct < -0.03:
-                    sell_remark.append(f"股票{a_code}  分钟点,大幅下跌，今日涨幅: {a_pct:.2%}")
-                    sell_support += 1
-                
-                # 从历史数据中获取昨日z-score
-                yesterday_z_score = a_stock.get('z_score')
-                
-                if yesterday_z_score is not None:
-                    #logger.info(f"股票{a_code}当前z-score: {current_z_score:.2f}, 昨日z-score: {yesterday_z_score:.2f}, 今日涨幅: {a_pct:.2%},分钟点 {current_minute}今日成交量 {today_minute_volume}, 历史平均成交量 {history_avg_volume}")
-                    
-                    # z-score相关判断
-                    if (current_z_score < self.undervalued and (current_z_score - yesterday_z_score) < -0.3) or (current_z_score < 0 - self.outlier_value):
-                        buy_remark.append(f"股票{a_code} 开始低估 当前z-score: {current_z_score:.2f}, 昨日z-score: {yesterday_z_score:.2f}")
-                        buy_support += 1
-                    
-                    if (current_z_score > self.overvalued and (current_z_score - yesterday_z_score) > 0.3) or (current_z_score > self.outlier_value):
-                        sell_remark.append(f"股票{a_code} 开始高估 当前z-score: {current_z_score:.2f}, 昨日z-score: {yesterday_z_score:.2f}")
-                        sell_support += 1
-
-                if sell_support > 0:
-                    strong_sell += 1
-                if buy_support > 0:
-                    strong_buy += 1
+        # 只对可能触发的北交所股票生成信号
+        for bj_idx in np.nonzero(bj_active & ((strong_sell > 1) | (strong_buy > 1)))[0]:
+            stock = self.bj_stocks[bj_idx]
+            bj_code = stock.code
+            current_price = bj_price[bj_idx]
+            increase = bj_increase[bj_idx]
+            pair_idx = np.nonzero(pb == bj_idx)[0]
 
-            
-            # 生成交易信号
-            if strong_sell > 1 and stock.current_position > 0:
+            if strong_sell[bj_idx] > 1 and stock.current_position > 0:
+                sell_remark = []
+                for i in pair_idx:
+                    a_code = self.a_codes[pa[i]]
+                    if sell_drop[i]:
+                        sell_remark.append(f"股票{a_code}  分钟点,大幅下跌，今日涨幅: {a_pct[i]:.2%}")
+                    if sell_z[i]:
+                        sell_remark.append(f"股票{a_code} 开始高估 当前z-score: {z_score[i]:.2f}, 昨日z-score: {self.pair_yz[i]:.2f}")
                 min_volume = max(self.one_hand_count, self.single_trade_value // current_price)
                 volume = min(min_volume, stock.current_position)
-                remark = f"A股强卖信号: strong_sell={strong_sell} :" + " ".join(sell_remark)
-                logger.info(f"触发卖出信号: 股票 {bj_code} 涨幅 {bj_increase:.2%} {remark}")
+                remark = f"A股强卖信号: strong_sell={int(strong_sell[bj_idx])} :" + " ".join(sell_remark)
+                logger.info(f"触发卖出信号: 股票 {bj_code} 涨幅 {increase:.2%} {remark}")
                 trade_signals.append((stock, 'sell', volume, self.str_remark))
             
-            elif strong_buy > 1:
+            elif strong_buy[bj_idx] > 1:
                 # 检查北交所股票涨幅是否小于阈值
-                if bj_increase < self.bj_max_increase:
+                if increase < self.bj_max_increase:
+                    buy_remark = []
+                    for i in pair_idx:
+                        a_code = self.a_codes[pa[i]]
+                        if buy_volume[i]:
+                            buy_remark.append(f"股票{a_code}  量价齐涨 分钟点 {current_minute}今日成交量 {today_volume[pa[i]]}, 历史平均成交量 {history_volume[pa[i]]},今日涨幅: {a_pct[i]:.2%}")
+                        if buy_z[i]:
+                            buy_remark.append(f"股票{a_code} 开始低估 当前z-score: {z_score[i]:.2f}, 昨日z-score: {self.pair_yz[i]:.2f}")
                     volume = self.get_buy_volume(stock, current_price)
-                    remark = f"A股强买信号: strong_buy={strong_buy} :" + " ".join(buy_remark)
-                    logger.info(f"触发买入信号: 股票 {bj_code} 涨幅 {bj_increase:.2%} {remark}")
+                    remark = f"A股强买信号: strong_buy={int(strong_buy[bj_idx])} :" + " ".join(buy_remark)
+                    logger.info(f"触发买入信号: 股票 {bj_code} 涨幅 {increase:.2%} {remark}")
                     trade_signals.append((stock, 'buy', volume, self.str_remark))
 
         return trade_signals
 
+    def _history_range(self):
+        """分钟线日期范围，画像只使用今天之前的5个交易日"""
+        today = datetime.datetime.now().strftime('%Y%m%d')
+        return get_calendar().days_back(today, 5), today
+
+    def get_data_requirements(self):
+        start_date, today = self._history_range()
+        # 当天的分钟成交量画像已缓存时不需要下载
+        if VolumeProfile.load(today, 5, self.a_codes) is not None:
+            return []
+        return [(self.a_codes, '1m', start_date, today)]
+
     def fill_data(self):
         """
-        目前先只依赖实时行情数据，不需要填充历史数据等
+        实时行情之外，只依赖关联A股的分钟成交量画像
         """
+        self._bind_stocks()
         self.load_history_minute_avg_volume(self.a_codes)
-        return
+        self.a_profile_rows = self.volume_profile.get_rows(self.a_codes)
+        self.data_ready = True
+        return True
 
     def load_history_minute_avg_volume(self, codes):
         """
-        获取过去5个交易日交易时间范围内所有分钟的平均交易量
-        交易时间范围：9:00-11:30和13:00-15:00
+        获取过去5个交易日每个交易分钟的平均成交量，按日缓存
         :param codes: 股票代码列表
-        :return: 无返回值，结果保存在self.code2minutes_data中
+        :return: 无返回值，结果保存在self.volume_profile中
         """
-        import numpy as np
-        
-        # 获取当前日期
-        current_date = datetime.datetime.now()
-        
-        # 计算10天前的日期（为了确保能获取到5个交易日的数据）
-        start_date = (current_date - datetime.timedelta(days=10)).strftime('%Y%m%d')
-        end_date = current_date.strftime('%Y%m%d')
-        
-        # 初始化结果字典
-        self.code2minutes_data = {}
-        
-        # 获取历史分钟数据
-        data = DataProvider.get_local_data(['volume'], codes, '1m', start_date, end_date)
-        
-        if data is not None:
-            # 遍历每个股票代码
-            for code in codes:
-                if code in data:
-                    stock_df = data[code]
-                    
-                    # 初始化该股票的数据字典
-                    self.code2minutes_data[code] = {}
-                    
-                    # 按时间点分组数据
-                    time_point_data = {}
-                    
-                    # 遍历所有时间索引
-                    for time_idx in stock_df.index:
-                        time_str = str(time_idx)
-                        
-                        # 检查时间格式是否正确
-                        if len(time_str) >= 12:
-                            hour = int(time_str[8:10])
-                            minute = int(time_str[10:12])
-                            
-                            # 检查是否在交易时间范围内（9:00-11:30和13:00-15:00）
-                            is_trading_time = (
-                                (9 <= hour < 11) or 
-                                (hour == 11 and minute <= 30) or
-                                (13 <= hour < 15)
-                            )
-                            
-                            if is_trading_time:
-                                # 提取时间点（小时和分钟）作为键
-                                time_point = time_str[8:12]  # 例如：0930, 1345
-                                
-                                # 获取该时间点的交易量
-                                volume = stock_df.loc[time_idx, 'volume']
-                                
-                                # 如果该时间点不在字典中，初始化为空列表
-                                if time_point not in time_point_data:
-                                    time_point_data[time_point] = []
-                                
-                                # 添加交易量到对应时间点的列表中
-                                if not np.isnan(volume):
-                                    time_point_data[time_point].append(volume)
-                    
-                    # 计算每个时间点的平均交易量（最多取最近5个交易日的数据）
-                    for time_point, volumes in time_point_data.items():
-                        # 取最近5个交易日的数据
-                        recent_volumes = volumes[-5:] if len(volumes) > 5 else volumes
-                        
-                        if recent_volumes:
-                            # 计算平均值
-                            avg_volume = sum(recent_volumes) / len(recent_volumes)
-                            
-                            # 构建完整的时间点格式（YYYYMMDDHHMMSS）
-                            # 使用当前日期作为基准
-                            full_time_point = current_date.strftime('%Y%m%d') + time_point + '00'
-                            
-                            # 保存到结果字典中
-                            self.code2minutes_data[code][full_time_point] = avg_volume
-                
-                else:
-                    # 如果没有该股票的数据，初始化为空字典
-                    self.code2minutes_data[code] = {}
-        
-        return
+        start_date, today = self._history_range()
 
-    def get_minute_data(self, codes, start_minutes):
-        #TODO 从设计角度，这里的获取实时行情数据以及处理，应该作为一个独立于策略的模块，后续考虑优化
+        def load_minutes(load_codes):
+            # 关联A股改为tick订阅后，分钟线历史需要主动下载
+            DataProvider.download_history_data(load_codes, '1m', start_date, today)
+            return DataProvider.get_local_data(['volume'], load_codes, '1m', start_date, today)
 
-        code2data = {}
-        data = DataProvider.get_market_data_ex(['close', 'open', 'high', 'low', 'volume'], codes, '1m', start_minutes)
-        # 解析数据（适应实际数据格式）
-        if data is not None:
-            # 打印获取到的股票数量
-            #print(f"获取到的股票: {data}, start_minutes={start_minutes}")
-        
-            # 遍历每个股票的数据
-            for code, stock_df in data.items():
-                
-                # 获取时间索引
-                time_indices = stock_df.index
-                #print(f"股票 {code} 的数据 获取到的数据时间点数量: {len(time_indices)}")
-                
-                # 初始化该股票的数据字典
-                code2data[code] = {}
-                
-                # 如果有数据
-                if len(time_indices) > 0:
-                    # 获取最新的时间戳
-                    latest_ts_str = str(time_indices[-1])
-                    
-                    # 存储时间戳
-                    code2data[code]['timestamp'] = latest_ts_str
-                    
-                    # 获取指定时间点的数据
-                    if start_minutes in time_indices:
-                        # 获取指定时间点的收盘价和成交量
-                        if 'close' in stock_df.columns and 'volume' in stock_df.columns:
-                            target_close = stock_df.loc[start_minutes, 'close']
-                            target_volume = stock_df.loc[start_minutes, 'volume']
-                            
-                            # 存储收盘价和成交量
-                            code2data[code]['close'] = target_close
-                            code2data[code]['volume'] = target_volume
-                            
-                            ##print(f"指定时间点 {start_minutes} 的数据 - 收盘价: {target_close}, 成交量: {target_volume}")
-                        else:
-                            logger.warning(f"数据缺失 - 股票 {code} 没有收盘价或成交量数据")
-                        
-                    else:
-                        logger.warning(f"没有数据 - 股票 {code} 在时间点 {start_minutes} 没有数据")
-                else:
-                    logger.warning(f"没有数据 - 股票 {code} 没有时间序列数据")
-        
-        return code2data
+        self.volume_profile = VolumeProfile.load_or_build(codes, today, 5, load_minutes)
@@ -1,12 +1,38 @@
-from strategy.strategy1001 import Strategy1001
-from strategy.strategy1002 import Strategy1002
-from strategy.strategy1003 import Strategy1003
-from strategy.strategy1004 import Strategy1004
-from .strategy_params import STRATEGY_PARAMS
-from my_stock import MyStock
+import importlib
+from .strategy_params import get_strategy_params
+
+# 策略注册表：策略ID -> 入口 "模块路径:类名"，创建策略时才导入对应模块
+STRATEGY_REGISTRY = {
+    1001: "strategy.strategy1001:Strategy1001",
+    1002: "strategy.strategy1002:Strategy1002",
+    1003: "strategy.strategy1003:Strategy1003",
+    1004: "strategy.strategy1004:Strategy1004",
+}
 
 class StrategyFactory:
     """策略工厂类"""
+    @staticmethod
+    def register(strategy_id, entry_point):
+        """
+        注册策略
+        :param strategy_id: 策略ID
+        :param entry_point: 入口，格式 "模块路径:类名"
+        """
+        STRATEGY_REGISTRY[strategy_id] = entry_point
+
+    @staticmethod
+    def load_strategy_class(strategy_id):
+        """
+        按注册表导入策略类
+        :param strategy_id: 策略ID
+        :return: 策略类
+        """
+        entry_point = STRATEGY_REGISTRY.get(strategy_id)
+        if entry_point is None:
+            raise ValueError(f"未知的策略ID: {strategy_id}")
+        module_path, class_name = entry_point.split(":")
+        return getattr(importlib.import_module(module_path), class_name)
+
     @staticmethod
     def create_strategy(strategy_id):
         """
@@ -14,20 +40,11 @@ class StrategyFactory:
         :param strategy_id: 策略ID
         :return: 策略实例
         """
-        # 从配置中获取目标股票代码
-        if strategy_id not in STRATEGY_PARAMS:
+        # 从配置中获取策略参数
+        params = get_strategy_params(strategy_id)
+        if params is None:
             raise ValueError(f"策略ID {strategy_id} 未配置参数")
-            
-        target_codes = STRATEGY_PARAMS[strategy_id]["target_codes"]
-        
+
         # 创建对应策略实例
-        if strategy_id == 1001:
-            return Strategy1001(target_codes, STRATEGY_PARAMS[1001]["safe_range"], STRATEGY_PARAMS[1001]["aggressiveness"])
-        elif strategy_id == 1002:
-            return Strategy1002(target_codes)
-        elif strategy_id == 1003:
-            return Strategy1003(target_codes)
-        elif strategy_id == 1004:
-            return Strategy1004(target_codes, STRATEGY_PARAMS[1004]["correlations"])           
-        else:
-            raise ValueError(f"未知的策略ID: {strategy_id}")
\ No newline at end of file
+        strategy_class = StrategyFactory.load_strategy_class(strategy_id)
+        return strategy_class.from_params(params)
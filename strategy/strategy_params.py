@@ -4,50 +4,87 @@ import json
 #TODO
 correlation_file_path = "../stock_miner/shared/correlation_results.json"
 safe_range_file_path = "../stock_miner/shared/stock_safe_range.json"
-try:
-    with open(correlation_file_path, 'r', encoding='utf-8') as file:
-        correlation_results = json.load(file)
-except FileNotFoundError:
-    print(f"correlation file not found: {correlation_file_path}")
-    correlation_results = {}
-
-try:
-    with open(safe_range_file_path, 'r', encoding='utf-8') as file:
-        safe_range = json.load(file)
-except FileNotFoundError:
-    print(f"File not found: {correlation_file_path}")
-    safe_range = {}
+
+# 参数文件按需加载，只有用到的策略才读取，读取后缓存
+_path2json = {}
+
+def _load_json(file_path):
+    if file_path not in _path2json:
+        try:
+            with open(file_path, 'r', encoding='utf-8') as file:
+                _path2json[file_path] = json.load(file)
+        except FileNotFoundError:
+            print(f"File not found: {file_path}")
+            _path2json[file_path] = {}
+    return _path2json[file_path]
+
+def get_correlation_results():
+    return _load_json(correlation_file_path)
+
+def get_safe_range():
+    return _load_json(safe_range_file_path)
 
 TempCodes = list(set(BJ50_Trust + HS300) - set(SH50))
 
-STRATEGY_PARAMS = {
-    1001: {
-        "target_codes": TempCodes,  
-        "safe_range": safe_range,
+# 策略ID -> 参数构造函数，调用时才读取参数文件
+STRATEGY_PARAM_BUILDERS = {
+    1001: lambda: {
+        "target_codes": TempCodes,
+        "safe_range": get_safe_range(),
         "aggressiveness" : -2, # -2 超级保守， -1 保守， 0 平衡， 1 激进， 2 超级激进
     },
-    1002: {
+    1002: lambda: {
         "target_codes": SH50  # 策略目标股票代码
     },
-    1003: {
+    1003: lambda: {
         "target_codes": SH50  # 策略目标股票代码
     },
-    1004: {
-        "target_codes": correlation_results.keys(),
-        "correlations":correlation_results
+    1004: lambda: {
+        "target_codes": get_correlation_results().keys(),
+        "correlations": get_correlation_results()
     }
 }
 
-# 收集所有活跃的股票代码
-Active_Codes = []
-# 添加所有策略的目标股票
-for k, v in STRATEGY_PARAMS.items():
-    Active_Codes.extend(v["target_codes"])
-# 添加所有关联的A股代码
-#for k, v in correlation_results.items():
-#    Active_Codes.append(k)
-#    sim_stocks = v['similar_stocks']
-#    for sim_stock in sim_stocks:
-#        Active_Codes.append(sim_stock['code'])
-# 去除重复项
-Active_Codes = list(set(Active_Codes))
\ No newline at end of file
+def get_strategy_params(strategy_id):
+    """
+    获取策略参数
+    :param strategy_id: 策略ID
+    :return: 参数字典，未配置返回None
+    """
+    builder = STRATEGY_PARAM_BUILDERS.get(strategy_id)
+    return builder() if builder else None
+
+def get_active_codes(strategy_ids=None):
+    """
+    收集活跃的股票代码
+    :param strategy_ids: 策略ID列表，None表示全部已配置的策略
+    :return: 去重后的股票代码列表
+    """
+    if strategy_ids is None:
+        strategy_ids = STRATEGY_PARAM_BUILDERS.keys()
+    active_codes = []
+    # 添加所有策略的目标股票
+    for strategy_id in strategy_ids:
+        params = get_strategy_params(strategy_id)
+        if params:
+            active_codes.extend(params["target_codes"])
+    # 添加所有关联的A股代码
+    #for k, v in correlation_results.items():
+    #    Active_Codes.append(k)
+    #    sim_stocks = v['similar_stocks']
+    #    for sim_stock in sim_stocks:
+    #        Active_Codes.append(sim_stock['code'])
+    # 去除重复项
+    return list(set(active_codes))
+
+def __getattr__(name):
+    """兼容旧的模块级变量，访问时才加载"""
+    if name == "STRATEGY_PARAMS":
+        return {strategy_id: get_strategy_params(strategy_id) for strategy_id in STRATEGY_PARAM_BUILDERS}
+    if name == "Active_Codes":
+        return get_active_codes()
+    if name == "correlation_results":
+        return get_correlation_results()
+    if name == "safe_range":
+        return get_safe_range()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,188 @@
+import time
+from logger import logger
+
+
+class SubscriptionManager:
+    """
+    行情订阅管理器
+    1. 合并main的全推订阅和各策略的单股订阅，同一代码只订阅一次
+    2. 单股订阅有数量限制（手动订阅100，开VIP可以到300），按优先级分配订阅位
+    3. 超出的代码轮流占用少量轮换订阅位，未占到订阅位的代码用get_full_tick批量轮询，限制轮询频率
+    xtdata通过参数注入，便于用假的xtdata测试
+    """
+    def __init__(self, xtdata_api, max_slots=100, rotating_slots=10, rotate_interval=60,
+                 poll_batch=50, poll_interval=3):
+        """
+        :param xtdata_api: xtdata模块或实现了相同接口的对象
+        :param max_slots: 单股订阅数量上限
+        :param rotating_slots: 超出上限时，用于轮换的订阅位数量
+        :param rotate_interval: 轮换间隔（秒）
+        :param poll_batch: 每次轮询的代码数量
+        :param poll_interval: 轮询间隔（秒），轮询速率上限为 poll_batch/poll_interval 只/秒
+        """
+        self.xtdata = xtdata_api
+        self.max_slots = max_slots
+        self.rotating_slots = min(rotating_slots, max_slots)
+        self.rotate_interval = rotate_interval
+        self.poll_batch = poll_batch
+        self.poll_interval = poll_interval
+
+        self.whole_codes = []           # 全推订阅代码，保持添加顺序
+        self._whole_code_set = set()
+        self.code2priority = {}         # 单股订阅代码 -> 优先级（多个策略请求时取最大值）
+        self.code2callbacks = {}        # 单股订阅代码 -> 回调列表
+
+        self.pinned_codes = []          # 固定占用订阅位的代码
+        self.overflow_codes = []        # 超出上限的代码，按优先级排序
+        self.code2seq = {}              # 单股订阅代码 -> 订阅号
+        self.whole_seq = None
+        self._rotate_pos = 0
+        self._poll_pos = 0
+        self._last_rotate = 0
+        self._last_poll = 0
+        self._code2poll_time = {}       # 轮询代码 -> 上次推送的tick时间，避免重复推送
+        self.started = False
+
+    def add_whole_quote(self, codes):
+        """添加全推订阅代码"""
+        for code in codes:
+            if code not in self._whole_code_set:
+                self._whole_code_set.add(code)
+                self.whole_codes.append(code)
+
+    def request_quote(self, owner, code2priority, callback):
+        """
+        策略申请单股tick订阅
+        :param owner: 申请方标识，用于日志
+        :param code2priority: {股票代码: 优先级}，数值越大越优先
+        :param callback: 回调函数，参数格式同xtdata.subscribe_quote的回调 {股票代码: [tick字典, ...]}
+        """
+        for code, priority in code2priority.items():
+            self.code2priority[code] = max(priority, self.code2priority.get(code, priority))
+            callbacks = self.code2callbacks.setdefault(code, [])
+            if callback not in callbacks:
+                callbacks.append(callback)
+        logger.info(f"{owner} 申请单股订阅 {len(code2priority)} 只")
+
+    def _allocate(self):
+        """按优先级分配订阅位，全推中已有的代码不占用订阅位"""
+        codes = [code for code in self.code2priority if code not in self._whole_code_set]
+        codes.sort(key=lambda code: self.code2priority[code], reverse=True)
+        if len(codes) <= self.max_slots:
+            self.pinned_codes = codes
+            self.overflow_codes = []
+        else:
+            pinned_count = self.max_slots - self.rotating_slots
+            self.pinned_codes = codes[:pinned_count]
+            self.overflow_codes = codes[pinned_count:]
+
+    def start(self, whole_quote_callback):
+        """
+        开始订阅
+        :param whole_quote_callback: 全推行情回调，参数为 {股票代码: tick字典}
+        """
+        self._allocate()
+        if self.whole_codes:
+            logger.info(f"订阅全推行情: {len(self.whole_codes)} 只")
+            self.whole_seq = self.xtdata.subscribe_whole_quote(self.whole_codes, callback=whole_quote_callback)
+        for code in self.pinned_codes:
+            self._subscribe(code)
+        merged = len([code for code in self.code2priority if code in self._whole_code_set])
+        logger.info(f"单股订阅: 固定 {len(self.pinned_codes)} 只, 轮换/轮询 {len(self.overflow_codes)} 只, 已由全推覆盖 {merged} 只")
+        self.started = True
+        self.maintain()
+
+    def _subscribe(self, code):
+        seq = self.xtdata.subscribe_quote(code, period='tick', count=0, callback=self._on_quote)
+        if seq is not None and seq >= 0:
+            self.code2seq[code] = seq
+        else:
+            logger.warning(f"订阅 {code} 失败, seq={seq}")
+
+    def _unsubscribe(self, code):
+        seq = self.code2seq.pop(code, None)
+        if seq is not None:
+            self.xtdata.unsubscribe_quote(seq)
+
+    def _on_quote(self, datas):
+        """单股订阅回调，分发给申请的策略"""
+        for code, tick_list in datas.items():
+            for callback in self.code2callbacks.get(code, []):
+                callback({code: tick_list})
+
+    def get_rotating_codes(self):
+        """当前占用轮换订阅位的代码"""
+        if not self.overflow_codes:
+            return []
+        count = min(self.rotating_slots, len(self.overflow_codes))
+        return [self.overflow_codes[(self._rotate_pos + i) % len(self.overflow_codes)] for i in range(count)]
+
+    def rotate(self):
+        """轮换订阅位到下一批超出上限的代码"""
+        if not self.overflow_codes or self.rotating_slots <= 0:
+            return
+        for code in self.get_rotating_codes():
+            self._unsubscribe(code)
+        self._rotate_pos = (self._rotate_pos + self.rotating_slots) % len(self.overflow_codes)
+        for code in self.get_rotating_codes():
+            self._subscribe(code)
+
+    def poll(self):
+        """
+        批量轮询未占用订阅位的代码，只推送有更新的tick
+        :return: 本次推送的代码数量
+        """
+        rotating = set(self.get_rotating_codes())
+        candidates = [code for code in self.overflow_codes if code not in rotating]
+        if not candidates:
+            return 0
+        start = self._poll_pos % len(candidates)
+        batch = candidates[start:start + self.poll_batch]
+        if len(batch) < self.poll_batch:
+            batch.extend(candidates[:min(self.poll_batch - len(batch), start)])
+        self._poll_pos = start + len(batch)
+
+        try:
+            code2tick = self.xtdata.get_full_tick(batch) or {}
+        except Exception as e:
+            logger.error(f"轮询行情失败: {e}", exc_info=True)
+            return 0
+
+        pushed = 0
+        for code, tick in code2tick.items():
+            tick_time = tick.get('time', 0)
+            if not tick_time or tick_time == self._code2poll_time.get(code):
+                continue
+            self._code2poll_time[code] = tick_time
+            for callback in self.code2callbacks.get(code, []):
+                callback({code: [tick]})
+            pushed += 1
+        return pushed
+
+    def maintain(self, now=None):
+        """
+        主循环中定期调用，按间隔轮换订阅位和轮询
+        :param now: 当前时间戳（秒），默认取系统时间
+        """
+        if not self.started or not self.overflow_codes:
+            return
+        now = time.time() if now is None else now
+        if now - self._last_rotate >= self.rotate_interval:
+            if self._last_rotate == 0:
+                for code in self.get_rotating_codes():
+                    self._subscribe(code)
+            else:
+                self.rotate()
+            self._last_rotate = now
+        if now - self._last_poll >= self.poll_interval:
+            self.poll()
+            self._last_poll = now
+
+    def stop(self):
+        """取消所有订阅"""
+        for code in list(self.code2seq.keys()):
+            self._unsubscribe(code)
+        if self.whole_seq is not None:
+            self.xtdata.unsubscribe_quote(self.whole_seq)
+            self.whole_seq = None
+        self.started = False
@@ -0,0 +1,173 @@
+import os
+from datetime import datetime, timedelta
+import numpy as np
+from logger import logger
+from trade_days import TradeDays
+
+# 本地交易日文件，每行一个或以空白/逗号分隔的YYYYMMDD，与内置的TradeDays合并，新年份只需更新该文件
+CALENDAR_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'trade_days.txt')
+
+
+def _to_datetime64(days):
+    return np.array([f"{day[:4]}-{day[4:6]}-{day[6:8]}" for day in days], dtype='datetime64[D]')
+
+
+class TradingCalendar:
+    """
+    交易日历
+    交易日按datetime64[D]有序存储，日期<->序号用字典O(1)查找，范围查询用二分
+    对外的日期统一使用YYYYMMDD字符串，与项目其他部分保持一致
+    查询日期超出日历末尾时先尝试从xtdata获取交易日（需要行情权限），仍然无法覆盖时抛出ValueError，
+    不按工作日猜测，否则节假日会被当成交易日，应及时更新trade_days.py或交易日文件
+    """
+    def __init__(self, days):
+        """
+        :param days: 交易日列表，格式YYYYMMDD，可无序、可重复
+        """
+        self._set_days(sorted(set(days)))
+        self._last_known_day = self.days[-1] if self.days else None
+        self._fetching = False          # 正在从xtdata获取，模拟行情的get_trading_calendar会回调本日历
+        self._fetch_failed = False      # xtdata获取失败后本进程不再重试
+
+    def _set_days(self, days):
+        self.days = days
+        self.dates = _to_datetime64(days)
+        self.day2idx = {day: i for i, day in enumerate(days)}
+
+    @classmethod
+    def load(cls, path=CALENDAR_FILE):
+        """
+        加载交易日历：内置TradeDays + 本地交易日文件
+        :param path: 交易日文件路径，不存在时只使用内置数据
+        """
+        days = list(TradeDays)
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    tokens = f.read().replace(',', ' ').split()
+                days.extend(token for token in tokens if len(token) == 8 and token.isdigit())
+            except Exception as e:
+                logger.error(f"加载交易日文件失败: {e}", exc_info=True)
+        return cls(days)
+
+    def save(self, path=CALENDAR_FILE):
+        """保存为本地交易日文件，包含从xtdata获取的日期，下次启动不用再获取"""
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(self.days))
+
+    def _extend_to(self, day):
+        """
+        保证日历覆盖到day：超出日历末尾时从xtdata获取，仍然无法覆盖时抛出ValueError
+        """
+        if self._last_known_day is None or day <= self._last_known_day:
+            return
+        if not self._fetching and not self._fetch_failed:
+            self._fetch(day)
+        if day > self._last_known_day:
+            raise ValueError(f"交易日历只到 {self._last_known_day}，无法确定 {day} 前后的交易日，"
+                             f"请更新 trade_days.py 或 {CALENDAR_FILE}")
+
+    def _fetch(self, day):
+        """从xtdata获取日历末尾到day之后一个月的交易日，多取一个月保证day落在节假日时也能确认已覆盖"""
+        end = (datetime.strptime(day, '%Y%m%d') + timedelta(days=31)).strftime('%Y%m%d')
+        self._fetching = True
+        try:
+            from xtquant import xtdata
+            fetched = xtdata.get_trading_calendar('SH', self._last_known_day, end)
+        except Exception as e:
+            self._fetch_failed = True
+            logger.warning(f"从xtdata获取 {self._last_known_day} 到 {end} 的交易日历失败: {e}")
+            return
+        finally:
+            self._fetching = False
+        # 不同版本返回YYYYMMDD字符串或毫秒时间戳
+        days = [str(d)[:8] if isinstance(d, str) else datetime.fromtimestamp(d / 1000).strftime('%Y%m%d')
+                for d in fetched or []]
+        extra = sorted({d for d in days if d > self._last_known_day})
+        if not extra:
+            self._fetch_failed = True
+            logger.warning(f"xtdata没有 {self._last_known_day} 之后的交易日")
+            return
+        self._set_days(self.days + extra)
+        self._last_known_day = extra[-1]
+        logger.info(f"从xtdata补充交易日 {extra[0]} - {extra[-1]}，共 {len(extra)} 天")
+
+    def _search(self, day, side):
+        return int(np.searchsorted(self.dates, np.datetime64(f"{day[:4]}-{day[4:6]}-{day[6:8]}"), side=side))
+
+    def is_trading_day(self, day):
+        self._extend_to(day)
+        return day in self.day2idx
+
+    def index(self, day):
+        """
+        交易日转为序号
+        :return: 序号，非交易日返回-1
+        """
+        self._extend_to(day)
+        return self.day2idx.get(day, -1)
+
+    def get_day(self, idx):
+        """
+        序号转为交易日
+        :return: 交易日，超出范围返回None
+        """
+        if 0 <= idx < len(self.days):
+            return self.days[idx]
+        return None
+
+    def range(self, start_date, end_date):
+        """
+        获取 [start_date, end_date] 之间的交易日
+        :return: 按时间顺序排列的交易日列表
+        """
+        self._extend_to(end_date)
+        return self.days[self._search(start_date, 'left'):self._search(end_date, 'right')]
+
+    def next_day(self, day):
+        """day之后的下一个交易日（不含day）"""
+        return self.shift(day, 1)
+
+    def prev_day(self, day):
+        """day之前的上一个交易日（不含day），超出日历返回None"""
+        return self.shift(day, -1)
+
+    def shift(self, day, n):
+        """
+        向后/向前数n个交易日
+        :param day: 基准日期，可以不是交易日
+        :param n: 正数向后，负数向前，0表示day本身（非交易日时取之前最近的交易日）
+        :return: 交易日，向前超出日历返回None，向后超出日历且无法补充时抛出ValueError
+        """
+        if n > 0:
+            self._extend_to(day)
+            idx = self._search(day, 'right') + n - 1
+            while idx >= len(self.days):
+                # 超出日历末尾，按还差的交易日数预留自然日补充，无法补充时抛出异常
+                missing = idx - len(self.days) + 1
+                self._extend_to((datetime.strptime(self.days[-1], '%Y%m%d')
+                                 + timedelta(days=missing * 2 + 7)).strftime('%Y%m%d'))
+            return self.get_day(idx)
+        self._extend_to(day)
+        if n == 0:
+            return day if day in self.day2idx else self.get_day(self._search(day, 'left') - 1)
+        return self.get_day(self._search(day, 'left') + n)
+
+    def days_back(self, day, n):
+        """
+        day之前（不含day）最近n个交易日中最早的一天，用于计算历史数据的开始日期
+        超出日历时返回日历第一天
+        """
+        result = self.shift(day, -n)
+        return result if result is not None else self.get_day(0)
+
+
+_calendar = None
+
+
+def get_calendar():
+    """获取进程内共享的交易日历"""
+    global _calendar
+    if _calendar is None:
+        _calendar = TradingCalendar.load()
+    return _calendar
@@ -1,4 +1,4 @@
-# 2024年交易日数组
+# 2024-2026年交易日数组，新年份在末尾追加或写入trade_days.txt
 TradeDays = [
     "20240102", "20240103", "20240104", "20240105", "20240108",
     "20240109", "20240110", "20240111", "20240112", "20240115",
@@ -97,5 +97,55 @@ TradeDays = [
     "20251208", "20251209", "20251210", "20251211", "20251212",
     "20251215", "20251216", "20251217", "20251218", "20251219",
     "20251222", "20251223", "20251224", "20251225", "20251226",
-    "20251229", "20251230", "20251231"
+    "20251229", "20251230", "20251231",
+    # 2026年，按交易所休市安排：元旦、春节、清明、劳动节、端午、中秋、国庆
+    "20260105", "20260106", "20260107", "20260108", "20260109",
+    "20260112", "20260113", "20260114", "20260115", "20260116",
+    "20260119", "20260120", "20260121", "20260122", "20260123",
+    "20260126", "20260127", "20260128", "20260129", "20260130",
+    "20260202", "20260203", "20260204", "20260205", "20260206",
+    "20260209", "20260210", "20260211", "20260212", "20260213",
+    "20260224", "20260225", "20260226", "20260227", "20260302",
+    "20260303", "20260304", "20260305", "20260306", "20260309",
+    "20260310", "20260311", "20260312", "20260313", "20260316",
+    "20260317", "20260318", "20260319", "20260320", "20260323",
+    "20260324", "20260325", "20260326", "20260327", "20260330",
+    "20260331", "20260401", "20260402", "20260403", "20260407",
+    "20260408", "20260409", "20260410", "20260413", "20260414",
+    "20260415", "20260416", "20260417", "20260420", "20260421",
+    "20260422", "20260423", "20260424", "20260427", "20260428",
+    "20260429", "20260430", "20260506", "20260507", "20260508",
+    "20260511", "20260512", "20260513", "20260514", "20260515",
+    "20260518", "20260519", "20260520", "20260521", "20260522",
+    "20260525", "20260526", "20260527", "20260528", "20260529",
+    "20260601", "20260602", "20260603", "20260604", "20260605",
+    "20260608", "20260609", "20260610", "20260611", "20260612",
+    "20260615", "20260616", "20260617", "20260618", "20260622",
+    "20260623", "20260624", "20260625", "20260626", "20260629",
+    "20260630", "20260701", "20260702", "20260703", "20260706",
+    "20260707", "20260708", "20260709", "20260710", "20260713",
+    "20260714", "20260715", "20260716", "20260717", "20260720",
+    "20260721", "20260722", "20260723", "20260724", "20260727",
+    "20260728", "20260729", "20260730", "20260731", "20260803",
+    "20260804", "20260805", "20260806", "20260807", "20260810",
+    "20260811", "20260812", "20260813", "20260814", "20260817",
+    "20260818", "20260819", "20260820", "20260821", "20260824",
+    "20260825", "20260826", "20260827", "20260828", "20260831",
+    "20260901", "20260902", "20260903", "20260904", "20260907",
+    "20260908", "20260909", "20260910", "20260911", "20260914",
+    "20260915", "20260916", "20260917", "20260918", "20260921",
+    "20260922", "20260923", "20260924", "20260928", "20260929",
+    "20260930", "20261008", "20261009", "20261012", "20261013",
+    "20261014", "20261015", "20261016", "20261019", "20261020",
+    "20261021", "20261022", "20261023", "20261026", "20261027",
+    "20261028", "20261029", "20261030", "20261102", "20261103",
+    "20261104", "20261105", "20261106", "20261109", "20261110",
+    "20261111", "20261112", "20261113", "20261116", "20261117",
+    "20261118", "20261119", "20261120", "20261123", "20261124",
+    "20261125", "20261126", "20261127", "20261130", "20261201",
+    "20261202", "20261203", "20261204", "20261207", "20261208",
+    "20261209", "20261210", "20261211", "20261214", "20261215",
+    "20261216", "20261217", "20261218", "20261221", "20261222",
+    "20261223", "20261224", "20261225", "20261228", "20261229",
+    "20261230", "20261231"
 ]
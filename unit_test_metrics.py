@@ -0,0 +1,89 @@
+"""
+Metrics、Histogram单元测试
+"""
+import os
+import json
+import time
+import tempfile
+import numpy as np
+from metrics import Histogram, Metrics
+
+
+def unit_test():
+    # 直方图分位数与精确值的相对误差应在桶宽以内
+    rng = np.random.default_rng(0)
+    values = rng.lognormal(mean=6, sigma=1.5, size=100000).astype(np.int64)
+    histogram = Histogram()
+    for value in values.tolist():
+        histogram.record(value)
+    for p in (50, 90, 99, 99.9):
+        exact = float(np.percentile(values, p))
+        approx = histogram.percentile(p)
+        print(f"p{p}: 精确 {exact:.0f}, 直方图 {approx}, 误差 {abs(approx - exact) / exact:.2%}")
+        assert abs(approx - exact) / exact < 0.05
+    assert histogram.max == values.max() and histogram.count == len(values)
+
+    other = Histogram()
+    other.record(10 ** 9)
+    histogram.merge(other)
+    print(f"合并后: 样本 {histogram.count}, 最大 {histogram.max}")
+    assert histogram.percentile(100) == 10 ** 9
+
+    # 开启：计时、计数、汇总写文件
+    report_dir = tempfile.mkdtemp()
+    metrics = Metrics(enabled=True, flush_interval=0.05, report_dir=report_dir)
+
+    @metrics.timed('work', 'work.items')
+    def work(n):
+        time.sleep(0.001)
+        return list(range(n))
+
+    for i in range(5):
+        work(i)
+    with metrics.timer('block'):
+        time.sleep(0.002)
+    metrics.incr('ticks', 100)
+    metrics.start()
+    time.sleep(0.12)
+    metrics.incr('ticks', 50)
+    metrics.stop()
+    path = [os.path.join(report_dir, name) for name in os.listdir(report_dir)][0]
+    with open(path, 'r', encoding='utf-8') as f:
+        windows = [json.loads(line) for line in f]
+    print(f"汇总窗口 {len(windows)} 个: {windows[0]}")
+    assert windows[0]['timings_ms']['work']['count'] == 5 and windows[0]['counters']['work.items'] == 10
+    assert windows[0]['timings_ms']['block']['p50'] >= 2
+    assert windows[-1]['totals']['ticks'] == 150
+
+    # 关闭：装饰器返回原函数，计时和计数不记录
+    disabled = Metrics(enabled=False, report_dir=report_dir)
+
+    def plain(n):
+        return n
+
+    assert disabled.timed('plain')(plain) is plain
+    with disabled.timer('block'):
+        pass
+    disabled.incr('ticks')
+    assert not disabled.histograms and not disabled.counters
+
+    loops = 200000
+    start = time.perf_counter()
+    for _ in range(loops):
+        disabled.incr('ticks')
+        with disabled.timer('block'):
+            pass
+    cost = (time.perf_counter() - start) / loops * 1e9
+    print(f"关闭时incr+timer开销: {cost:.0f} ns/次")
+
+    enabled_work = metrics.timed('plain')(plain)
+    start = time.perf_counter()
+    for _ in range(loops):
+        enabled_work(1)
+    cost = (time.perf_counter() - start) / loops * 1e9
+    print(f"开启时装饰器开销: {cost:.0f} ns/次")
+    print("测试完成")
+
+
+if __name__ == "__main__":
+    unit_test()
@@ -0,0 +1,112 @@
+"""
+OrderGateway、OrderTracker单元测试
+使用假的XtQuantTrader，不依赖QMT终端
+"""
+import time
+import threading
+from types import SimpleNamespace
+from order_gateway import OrderGateway
+from order_tracker import OrderTracker
+
+
+class FakeResponse:
+    def __init__(self, seq, order_id, error_msg=''):
+        self.seq = seq
+        self.order_id = order_id
+        self.error_msg = error_msg
+
+
+class FakeXtQuantTrader:
+    """模拟XtQuantTrader的异步下单接口，在另一个线程里回调异步委托回报"""
+    def __init__(self, ack_delay=0.01, immediate_ack_seqs=()):
+        self.seq = 0
+        self.orders = []
+        self.submit_times = []
+        self.gateway = None
+        self.ack_delay = ack_delay
+        self.immediate_ack_seqs = set(immediate_ack_seqs)
+
+    def order_stock_async(self, account, stock_code, order_type, order_volume, price_type, price, strategy_name, order_remark):
+        self.seq += 1
+        seq = self.seq
+        self.orders.append((stock_code, order_type, order_volume, price, strategy_name, order_remark))
+        self.submit_times.append(time.perf_counter())
+        if seq in self.immediate_ack_seqs:
+            # 模拟回报先于order_stock_async返回到达
+            self.gateway.on_async_response(FakeResponse(seq, 1000 + seq))
+        else:
+            threading.Timer(self.ack_delay, self.gateway.on_async_response, args=(FakeResponse(seq, 1000 + seq),)).start()
+        return seq
+
+
+def unit_test():
+    print("===== 测试限速提交和回报匹配 =====")
+    fake = FakeXtQuantTrader(immediate_ack_seqs=[2])
+    tracker = OrderTracker()
+    gateway = OrderGateway(fake, account='test', max_orders_per_second=50, tracker=tracker)
+    fake.gateway = gateway
+    gateway.start()
+
+    start = time.perf_counter()
+    request_ids = [gateway.submit(f"8300{i:02d}.BJ", 23, 100, 5, 10.0 + i, 'str1001', f'str1001_8300{i:02d}.BJ') for i in range(10)]
+    print(f"入队耗时: {(time.perf_counter() - start) * 1000:.2f}ms, 请求编号: {request_ids}")
+    print(f"队列清空: {gateway.wait_idle(timeout=2)}")
+    time.sleep(0.1)
+
+    intervals = [b - a for a, b in zip(fake.submit_times, fake.submit_times[1:])]
+    print(f"提交数量: {len(fake.orders)}, 最小提交间隔: {min(intervals) * 1000:.1f}ms (限速20ms)")
+    print(f"委托价格来自调用方: {[order[3] for order in fake.orders[:3]]}")
+    metrics = gateway.get_metrics()
+    print(f"网关指标: {metrics}")
+    assert metrics['submitted'] == 10 and metrics['acked'] == 10 and metrics['pending_ack'] == 0
+    assert min(intervals) >= 0.019
+
+    print("===== 测试委托生命周期 =====")
+    record = tracker.get_by_seq(1)
+    print(f"seq 1: 状态 {record.state}, order_id {record.order_id}")
+    order = SimpleNamespace(order_id=1001, stock_code='830000.BJ', order_type=23, order_volume=100, price=10.0,
+                            strategy_name='str1001', order_remark='str1001_830000.BJ', order_status=50, status_msg='')
+    tracker.on_stock_order(order)
+    trade = SimpleNamespace(order_id=1001, stock_code='830000.BJ', order_type=23, traded_volume=60, traded_price=10.0,
+                            strategy_name='str1001', order_remark='str1001_830000.BJ')
+    tracker.on_stock_trade(trade)
+    gateway.on_order_update(1001)
+    print(f"部分成交: {tracker.get_by_order_id(1001).state}, 已成交 {record.filled_volume}")
+    assert 1001 in gateway.order_id2request
+    trade.traded_volume = 40
+    tracker.on_stock_trade(trade)
+    gateway.on_order_update(1001)
+    print(f"全部成交: {record.state}, 均价 {record.filled_price:.2f}, "
+          f"提交->回报 {(record.ack_time - record.submit_time) * 1000:.1f}ms, 提交->完成 {(record.done_time - record.submit_time) * 1000:.1f}ms")
+    print(f"(830000.BJ, str1001)有买入委托: {tracker.has_order('830000.BJ', 'str1001', 'buy')}")
+    print(f"状态统计: {tracker.summary()}")
+    assert record.state == 'filled' and tracker.get_orders('830000.BJ', 'str1001') == [record]
+    # 到达终态后网关不再保留委托编号的匹配记录
+    print(f"网关待匹配委托: {len(gateway.order_id2request)}")
+    assert 1001 not in gateway.order_id2request and len(gateway.order_id2request) == 9
+
+    gateway.stop()
+
+    print("===== 测试推送先于异步回报到达 =====")
+    tracker = OrderTracker()
+    record = tracker.on_submit(50, '830050.BJ', 23, 100, 10.0, 'str1002', 'str1002_830050.BJ',
+                               allocations=[('str1002', 60), ('str1003', 40)])
+    trade = SimpleNamespace(order_id=2050, stock_code='830050.BJ', order_type=23, traded_volume=100, traded_price=10.0,
+                            strategy_name='str1002', order_remark='str1002_830050.BJ')
+    tracker.on_stock_trade(trade)
+    print(f"回报前: 记录数 {len(tracker.records)}, 提前推送的记录状态 {tracker.get_by_order_id(2050).state}")
+    tracker.on_async_response(50, 2050)
+    print(f"回报后: 记录数 {len(tracker.records)}, 状态 {record.state}, 已成交 {record.filled_volume}")
+    assert tracker.records == [record] and tracker.get_by_order_id(2050) is record
+    assert record.state == 'filled' and record.filled_volume == 100
+    assert tracker.get_orders('830050.BJ', 'str1002') == [record] and tracker.get_orders('830050.BJ', 'str1003') == [record]
+
+    print("===== 测试跨日清空 =====")
+    tracker.records_date = '20000101'
+    print(f"跨日后(830050.BJ, str1002)有买入委托: {tracker.has_order('830050.BJ', 'str1002', 'buy')}")
+    assert not tracker.records and tracker.get_by_order_id(2050) is None
+    print("测试完成")
+
+
+if __name__ == "__main__":
+    unit_test()
@@ -0,0 +1,88 @@
+"""
+RiskManager单策略当日买入额度、SignalNetter轧差单元测试
+使用假的账户，不依赖QMT终端
+"""
+from types import SimpleNamespace
+from risk_manager import RiskManager
+from signal_netting import SignalNetter
+
+
+class FakeAccount:
+    """只提供风控用到的接口，资金充足、没有持仓和委托"""
+    def __init__(self, total_asset=1000000.0):
+        self.total_asset = total_asset
+
+    def get_total_asset(self):
+        return self.total_asset
+
+    def get_market_value(self):
+        return 0.0
+
+    def get_free_cash(self):
+        return self.total_asset
+
+    def get_frozen_cash(self):
+        return 0.0
+
+    def get_position_ratio(self):
+        return 0.0
+
+    def has_order(self, code, remark, trade_type):
+        return False
+
+
+def make_stock(code, price, position=0):
+    return SimpleNamespace(code=code, current_price=price, current_position=position, free_position=position)
+
+
+def unit_test():
+    print("===== 测试两个策略合计超出单策略额度 =====")
+    risk_manager = RiskManager()
+    risk_manager.max_strategy_value = 20000
+    account = FakeAccount()
+    stock = make_stock('830001.BJ', 10.0, position=300)
+    # str1001的买入超出自己的额度被拒绝，str1002的买入不受影响，合计超出单个策略额度也可以通过
+    signals = [(stock, 'buy', 2500, 'str1001'), (stock, 'buy', 1500, 'str1002'), (stock, 'sell', 300, 'str1003')]
+    approved, rejected = risk_manager.review_signals(signals, account)
+    print(f"通过: {[(remark, amount) for _, _, amount, remark in approved]}, 拒绝: {[(signal[3], reason) for signal, reason in rejected]}")
+    assert [signal[3] for signal in approved] == ['str1002', 'str1003']
+    assert [signal[3] for signal, _ in rejected] == ['str1001'] and '额度' in rejected[0][1]
+    netter = SignalNetter()
+    netted = netter.net(approved)
+    print(f"轧差: {[(trade_type, amount, remark) for _, trade_type, amount, remark in netted]}, 参与策略: {netter.code2contributors}")
+    assert [(trade_type, amount) for _, trade_type, amount, _ in netted] == [('buy', 1200)]
+    assert netter.code2contributors['830001.BJ'] == [('str1002', 1200)]
+    assert risk_manager.strategy2buy_value == {'str1002': 15000.0}
+
+    print("===== 测试按信号顺序累计额度 =====")
+    risk_manager = RiskManager()
+    risk_manager.max_strategy_value = 20000
+    stock_a = make_stock('830002.BJ', 10.0, position=200)
+    stock_b = make_stock('830003.BJ', 10.0)
+    stock_c = make_stock('830004.BJ', 10.0)
+    # str1001: 12000 + 6000通过，再加5000超出额度被拒绝，之后2000仍在剩余额度内通过
+    signals = [(stock_a, 'buy', 1200, 'str1001'), (stock_a, 'buy', 800, 'str1002'), (stock_a, 'sell', 200, 'str1003'),
+               (stock_b, 'buy', 600, 'str1001'), (stock_c, 'buy', 500, 'str1001'), (stock_c, 'buy', 200, 'str1002'),
+               (make_stock('830005.BJ', 10.0), 'buy', 200, 'str1001')]
+    approved, rejected = risk_manager.review_signals(signals, account)
+    print(f"拒绝: {[(signal[0].code, signal[3], reason) for signal, reason in rejected]}")
+    assert [(signal[0].code, signal[3]) for signal, _ in rejected] == [('830004.BJ', 'str1001')]
+    assert risk_manager.strategy2buy_value == {'str1001': 20000.0, 'str1002': 10000.0}
+    netted = netter.net(approved)
+    code2order = {stock.code: (trade_type, amount) for stock, trade_type, amount, _ in netted}
+    print(f"轧差: {code2order}, 参与策略: {netter.code2contributors}")
+    # 净买入1800按1200:800缩放到两个策略
+    assert code2order['830002.BJ'] == ('buy', 1800)
+    assert netter.code2contributors['830002.BJ'] == [('str1001', 1080), ('str1002', 720)]
+    # 被拒绝的str1001不参与830004.BJ的委托
+    assert code2order['830004.BJ'] == ('buy', 200) and netter.code2contributors['830004.BJ'] == [('str1002', 200)]
+
+    # 额度已用完，同一天后续买入全部拒绝
+    approved, rejected = risk_manager.review_signals([(make_stock('830006.BJ', 10.0), 'buy', 100, 'str1001')], account)
+    print(f"额度用完后: 通过 {len(approved)}, 拒绝原因 {[reason for _, reason in rejected]}")
+    assert not approved and len(rejected) == 1
+    print("测试完成")
+
+
+if __name__ == "__main__":
+    unit_test()
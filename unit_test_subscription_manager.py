@@ -0,0 +1,113 @@
+"""
+SubscriptionManager单元测试
+使用假的xtdata，不依赖QMT终端
+"""
+from subscription_manager import SubscriptionManager
+
+
+class FakeXtdata:
+    """模拟xtdata的订阅接口"""
+    def __init__(self):
+        self.seq = 0
+        self.seq2code = {}
+        self.seq2callback = {}
+        self.whole_codes = []
+        self.full_tick_calls = []
+        self.tick_time = 1744767365000
+
+    def subscribe_whole_quote(self, code_list, callback=None):
+        self.seq += 1
+        self.whole_codes = list(code_list)
+        return self.seq
+
+    def subscribe_quote(self, stock_code, period='1d', start_time='', end_time='', count=0, callback=None):
+        self.seq += 1
+        self.seq2code[self.seq] = stock_code
+        self.seq2callback[self.seq] = callback
+        return self.seq
+
+    def unsubscribe_quote(self, seq):
+        self.seq2code.pop(seq, None)
+        self.seq2callback.pop(seq, None)
+
+    def get_full_tick(self, code_list):
+        self.full_tick_calls.append(list(code_list))
+        return {code: {'time': self.tick_time, 'lastPrice': 10.0, 'lastClose': 9.9} for code in code_list}
+
+    def push(self, code):
+        """模拟一次单股订阅推送"""
+        for seq, sub_code in self.seq2code.items():
+            if sub_code == code:
+                self.seq2callback[seq]({code: [{'time': self.tick_time, 'lastPrice': 10.0}]})
+
+
+def unit_test():
+    fake = FakeXtdata()
+    manager = SubscriptionManager(fake, max_slots=10, rotating_slots=2, rotate_interval=60, poll_batch=4, poll_interval=3)
+
+    received = {}
+    def on_quote(datas):
+        for code, ticks in datas.items():
+            received[code] = received.get(code, 0) + len(ticks)
+
+    print("===== 测试订阅合并 =====")
+    manager.add_whole_quote(['830001.BJ', '600000.SH'])
+    manager.add_whole_quote(['600000.SH'])
+    codes = {f"6000{i:02d}.SH": 100 - i for i in range(20)}
+    manager.request_quote('strategy_a', codes, on_quote)
+    manager.request_quote('strategy_b', {'600019.SH': 200}, on_quote)
+    manager.start(lambda ticks: None)
+    print(f"全推代码: {fake.whole_codes}")
+    assert fake.whole_codes == ['830001.BJ', '600000.SH']
+    # 600000.SH 已在全推中，不占用订阅位，剩余19只
+    print(f"固定订阅: {manager.pinned_codes}")
+    assert len(manager.pinned_codes) == 8 and '600000.SH' not in manager.pinned_codes
+    # strategy_b 提高了600019.SH的优先级
+    assert manager.pinned_codes[0] == '600019.SH'
+    assert len(manager.overflow_codes) == 11
+    assert len(fake.seq2code) == 10
+
+    print("===== 测试推送分发 =====")
+    fake.push('600019.SH')
+    print(f"收到推送: {received}")
+    assert received.get('600019.SH') == 1
+
+    print("===== 测试轮换 =====")
+    rotating_before = manager.get_rotating_codes()
+    manager.maintain(now=manager._last_rotate + 60)
+    rotating_after = manager.get_rotating_codes()
+    print(f"轮换前: {rotating_before}, 轮换后: {rotating_after}")
+    assert rotating_before != rotating_after
+    assert set(fake.seq2code.values()) == set(manager.pinned_codes) | set(rotating_after)
+
+    print("===== 测试轮询 =====")
+    calls = len(fake.full_tick_calls)
+    manager.maintain(now=manager._last_poll + 1)
+    assert len(fake.full_tick_calls) == calls, "未到轮询间隔不应轮询"
+    fake.tick_time += 3000
+    poll_pos = manager._poll_pos
+    manager.maintain(now=manager._last_poll + 3)
+    batch = fake.full_tick_calls[-1]
+    print(f"轮询批次: {batch}")
+    assert len(batch) == 4 and not set(batch) & set(manager.get_rotating_codes())
+    # 同一批次、tick时间没有变化时不重复推送
+    manager._poll_pos = poll_pos
+    pushed = manager.poll()
+    print(f"重复轮询批次: {fake.full_tick_calls[-1]}, 推送数量: {pushed}")
+    assert fake.full_tick_calls[-1] == batch
+    assert pushed == 0
+    # tick时间更新后同一批次重新推送
+    fake.tick_time += 3000
+    manager._poll_pos = poll_pos
+    pushed = manager.poll()
+    print(f"tick更新后推送数量: {pushed}")
+    assert pushed == 4
+
+    print("===== 测试取消订阅 =====")
+    manager.stop()
+    assert not fake.seq2code
+    print("测试完成")
+
+
+if __name__ == '__main__':
+    unit_test()
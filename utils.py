@@ -1,4 +1,20 @@
-from trade_days import TradeDays
+import importlib
+from trade_calendar import get_calendar
+
+
+class LazyModule:
+    """
+    延迟导入的模块代理，第一次访问属性时才真正导入
+    用于xtquant等导入耗时的模块，只在真正用到时付出导入开销
+    """
+    def __init__(self, module_name):
+        self._module_name = module_name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._module_name)
+        return getattr(self._module, attr)
 
 def get_trading_days(start_date, end_date):
     """
@@ -16,9 +32,4 @@ def get_trading_days(start_date, end_date):
         raise ValueError("日期格式必须为'YYYYMMDD'")
     
     # 获取在日期范围内的交易日
-    trading_days = []
-    for day in TradeDays:
-        if start_date <= day <= end_date:
-            trading_days.append(day)
-    
-    return trading_days
\ No newline at end of file
+    return get_calendar().range(start_date, end_date)
\ No newline at end of file
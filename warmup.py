@@ -0,0 +1,97 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from data_provider import DataProvider
+from logger import logger
+
+
+class WarmupScheduler:
+    """
+    启动预热调度
+    1. 收集各策略声明的历史数据需求（get_data_requirements）
+    2. 同一股票同一周期的需求合并为一次下载，日期范围取并集
+    3. 并发下载，某个策略依赖的数据下载完成后立即执行它的fill_data，不等待其他策略
+    fill_data内部的下载请求由DataProvider根据已下载记录跳过，只读取本地数据
+    """
+    def __init__(self, strategies, max_workers=4, download=DataProvider.download_one):
+        """
+        :param strategies: 策略列表
+        :param max_workers: 并发下载的线程数
+        :param download: 下载函数，参数为 (股票代码, 周期, 开始日期, 结束日期)，便于测试时替换
+        """
+        self.strategies = strategies
+        self.max_workers = max_workers
+        self.download = download
+        self.report = []            # [(策略名, 下载任务数, 等待下载耗时, fill_data耗时, 就绪时间, 是否成功)]
+
+    @staticmethod
+    def merge(requirements):
+        """
+        合并数据需求
+        :param requirements: [(股票代码列表, 周期, 开始日期, 结束日期), ...]
+        :return: {(股票代码, 周期): (开始日期, 结束日期)}
+        """
+        key2range = {}
+        for codes, period, start_date, end_date in requirements:
+            for code in codes:
+                key = (code, period)
+                date_range = key2range.get(key)
+                if date_range is None:
+                    key2range[key] = (start_date, end_date)
+                else:
+                    key2range[key] = (min(start_date, date_range[0]), max(end_date, date_range[1]))
+        return key2range
+
+    def run(self):
+        """
+        执行预热
+        :return: 全部策略是否数据准备成功
+        """
+        start = time.perf_counter()
+        strategy2keys = {}
+        all_requirements = []
+        for strategy in self.strategies:
+            try:
+                requirements = strategy.get_data_requirements()
+            except Exception as e:
+                logger.error(f"获取策略 {strategy.__class__.__name__} 数据需求失败: {e}", exc_info=True)
+                requirements = []
+            strategy2keys[strategy] = {(code, period) for codes, period, _, _ in requirements for code in codes}
+            all_requirements.extend(requirements)
+
+        key2range = self.merge(all_requirements)
+        # 日线需求的并集预告给共享价格面板，各策略的fill_data只切片，不按各自的日期范围重复加载
+        daily = [(codes, start_date, end_date) for codes, period, start_date, end_date in all_requirements if period == '1d']
+        if daily:
+            DataProvider.reserve_daily_data([code for codes, _, _ in daily for code in codes],
+                                            min(start_date for _, start_date, _ in daily),
+                                            max(end_date for _, _, end_date in daily))
+        request_count = sum(len(codes) for codes, _, _, _ in all_requirements)
+        logger.info(f"预热: {len(self.strategies)} 个策略共 {request_count} 个下载需求，合并为 {len(key2range)} 个")
+
+        all_success = True
+        with ThreadPoolExecutor(max_workers=max(1, self.max_workers)) as executor:
+            key2future = {key: executor.submit(self.download, key[0], key[1], *date_range)
+                          for key, date_range in key2range.items()}
+            # 依赖数据少的策略先就绪
+            for strategy in sorted(self.strategies, key=lambda s: len(strategy2keys[s])):
+                name = strategy.__class__.__name__
+                wait_start = time.perf_counter()
+                wait([key2future[key] for key in strategy2keys[strategy]])
+                fill_start = time.perf_counter()
+                try:
+                    success = strategy.fill_data()
+                except Exception as e:
+                    logger.error(f"策略 {name} 数据准备异常: {e}", exc_info=True)
+                    success = False
+                ready = time.perf_counter()
+                self.report.append((name, len(strategy2keys[strategy]), fill_start - wait_start,
+                                    ready - fill_start, ready - start, success))
+                if success:
+                    logger.info(f"策略 {name} 数据准备完成，等待下载 {fill_start - wait_start:.2f}s，"
+                                f"fill_data {ready - fill_start:.2f}s，启动后 {ready - start:.2f}s 就绪")
+                else:
+                    all_success = False
+                    logger.warning(f"警告: 策略 {name} 数据准备失败")
+
+        logger.info(f"预热完成，总耗时 {time.perf_counter() - start:.2f}s")
+        return all_success